@@ -0,0 +1,87 @@
+# batch_writer.py
+"""
+背景批次寫入執行緒 (LogSink 與 Telemetry 共用)。
+
+遊戲迴圈只把資料 put_nowait 到有上限的佇列 (滿了就丟棄並計數，絕不等待)，
+背景執行緒一次取出一批交給 write_batch 寫出，檔案 I/O 與格式化都不在遊戲迴圈裡。
+close() (以及 atexit) 保證結束前把佇列裡剩下的資料都寫出去。
+"""
+import atexit
+import queue
+import threading
+
+# 背景執行緒一次最多寫出幾筆
+WRITE_BATCH_SIZE = 256
+
+_CLOSE = object()
+
+
+class BatchWriter:
+    """
+    屬性:
+        written / dropped: 已寫出與因佇列滿而丟棄的筆數
+        closed: 是否已經關閉
+    """
+
+    def __init__(self, write_batch, queue_size, name, on_close=None):
+        """
+        參數:
+            write_batch: write_batch(items)，在背景執行緒中寫出一批資料
+            queue_size: 佇列上限
+            name: 執行緒名稱
+            on_close: 最後一批寫完後在背景執行緒中呼叫 (例如關閉檔案)
+        """
+        self.write_batch = write_batch
+        self.on_close = on_close
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, item, block=False):
+        """
+        排入一筆資料 (已關閉時丟棄，回傳 False)。
+
+        參數:
+            block: False (遊戲迴圈) 時佇列滿了直接丟棄並計數；
+                   True (大量模擬等不能掉資料的呼叫端) 時等背景執行緒騰出空間
+        """
+        if self.closed:
+            return False
+        try:
+            self._queue.put(item, block=block)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self):
+        """ 寫出佇列中剩下的資料並結束背景執行緒 (可重複呼叫) """
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = batch[-1] is _CLOSE
+            items = [item for item in batch if item is not _CLOSE]
+            if items:
+                self.write_batch(items)
+                self.written += len(items)
+            if done:
+                if self.on_close is not None:
+                    self.on_close()
+                return
@@ -0,0 +1,177 @@
+# compositor.py
+"""
+分層合成器 (Layered Compositor)。
+
+原本所有東西都畫在 560x760 的內部解析度上，每幀再把整張畫面縮放到視窗大小:
+全螢幕時縮放是最貴的一步，而且會把 generate_background 的細牆線縮糊。
+合成器改成:
+- 靜態圖層 (牆壁背景 + 豆子) 在每次縮放視窗時以螢幕倍率重畫一次並快取
+- 角色圖集也以螢幕倍率重畫一份 (SpriteAtlas(scale))
+- 每幀只在螢幕座標上 blit 靜態圖層與幾個小角色，不再縮放整張畫面
+"""
+import pygame
+from settings import *
+from pellet_layer import PelletLayer
+from sprite_atlas import SpriteAtlas
+
+WALL_LINE_WIDTH = 4
+DOOR_LINE_WIDTH = 2
+
+
+def render_maze_background(scale=1):
+    """
+    產生靜態背景 (牆壁)。
+    繪製藍色的線條連接相鄰的牆壁磚塊，形成迷宮。
+
+    參數:
+        scale: 相對於遊戲內部解析度的倍率 (1 = SCREEN_WIDTH x MAP_HEIGHT)
+
+    回傳:
+        地圖大小 × scale 的 Surface
+    """
+    ts = TILE_SIZE * scale
+    background = pygame.Surface((int(SCREEN_WIDTH * scale), int(MAP_HEIGHT * scale)))
+    background.fill(BLACK)
+
+    # Wall color and thickness
+    wall_color = BLUE
+    line_width = max(1, round(WALL_LINE_WIDTH * scale))
+    door_width = max(1, round(DOOR_LINE_WIDTH * scale))
+
+    # Helper to check if a tile is a wall
+    rows = len(MAP_STRINGS)
+    cols = len(MAP_STRINGS[0])
+
+    def is_wall_tile(x, y):
+        if 0 <= y < rows and 0 <= x < cols:
+            return MAP_STRINGS[y][x] == TILE_WALL
+        return False
+
+    for y, row in enumerate(MAP_STRINGS):
+        for x, char in enumerate(row):
+            if char == TILE_WALL:
+                # Center of the current tile
+                cx = int((x + 0.5) * ts)
+                cy = int((y + 0.5) * ts)
+
+                # Check neighbors and draw connections (to the tile edge)
+                if is_wall_tile(x, y - 1):
+                    pygame.draw.line(background, wall_color, (cx, cy), (cx, int(y * ts)), line_width)
+                if is_wall_tile(x, y + 1):
+                    pygame.draw.line(background, wall_color, (cx, cy), (cx, int((y + 1) * ts)), line_width)
+                if is_wall_tile(x - 1, y):
+                    pygame.draw.line(background, wall_color, (cx, cy), (int(x * ts), cy), line_width)
+                if is_wall_tile(x + 1, y):
+                    pygame.draw.line(background, wall_color, (cx, cy), (int((x + 1) * ts), cy), line_width)
+
+            elif char == TILE_DOOR:
+                door_y = int((y + 0.5) * ts)
+                pygame.draw.line(background, PINK, (int(x * ts), door_y),
+                                 (int((x + 1) * ts), door_y), door_width)
+    return background
+
+
+class LayeredCompositor:
+    """
+    以螢幕倍率直接繪製遊戲畫面。
+
+    屬性:
+        scale: 目前的縮放比例
+        map_origin: 地圖左上角在螢幕上的位置
+        atlas: 螢幕倍率的 SpriteAtlas
+        pellets: 螢幕倍率的 PelletLayer (牆壁背景 + 豆子)
+        static_renders: 重畫靜態圖層的次數 (每次縮放視窗 / 新關卡一次)
+        frames: 由合成器繪製的幀數
+    """
+
+    def __init__(self, header_height):
+        self.header_height = header_height
+        self.scale = None
+        self.origin = (0, 0)
+        self.map_origin = (0, 0)
+        self.map_rect = pygame.Rect(0, 0, 0, 0)
+        self.atlas = None
+        self.pellets = None
+        self.needs_rebuild = True
+        self.header = None
+        self.header_key = None
+        self.text_cache = {}
+        self.static_renders = 0
+        self.frames = 0
+
+    def resize(self, scale, offset_x, offset_y):
+        """ 視窗大小改變: 倍率不同時以新的倍率重畫靜態圖層與角色圖集 """
+        if scale != self.scale:
+            self.scale = scale
+            self.atlas = SpriteAtlas(scale)
+            self.pellets = PelletLayer(scale)
+            self.needs_rebuild = True
+            self.header_key = None
+            self.text_cache.clear()
+        self.origin = (offset_x, offset_y)
+        self.map_origin = (offset_x, offset_y + int(self.header_height * scale))
+        self.map_rect = pygame.Rect(self.map_origin, self.pellets.surface.get_size())
+
+    def invalidate(self):
+        """ 新關卡 (豆子全部重置): 下一次繪製前重畫靜態圖層 """
+        self.needs_rebuild = True
+
+    def prepare(self, game_map):
+        """ 需要時重畫靜態圖層 (牆壁背景 + 目前地圖上的豆子) """
+        if self.needs_rebuild and self.pellets is not None:
+            self.pellets.rebuild(render_maze_background(self.scale), game_map)
+            self.needs_rebuild = False
+            self.static_renders += 1
+
+    def erase(self, x, y):
+        """ 豆子被吃掉 (需要重畫時 rebuild 會直接讀地圖，不必處理) """
+        if self.pellets is not None and not self.needs_rebuild:
+            self.pellets.erase(x, y)
+
+    def to_screen(self, x, y):
+        """ 地圖上的像素座標 (內部解析度) -> 螢幕座標 """
+        return (self.map_origin[0] + int(x * self.scale),
+                self.map_origin[1] + int(y * self.scale))
+
+    def draw_map(self, display, ticks):
+        self.pellets.draw(display, ticks, self.map_origin)
+
+    def blit_sprite(self, display, sprite, x, y):
+        """ 以地圖座標 (x, y) 為中心畫一張螢幕倍率圖集中的圖 """
+        sx, sy = self.to_screen(x, y)
+        return display.blit(sprite, (sx - self.atlas.center, sy - self.atlas.center))
+
+    def blit_text(self, display, key, text_surface, x, y):
+        """ 以地圖座標 (x, y) 為左上角畫縮放後的文字 (依 key 快取縮放結果) """
+        scaled = self.text_cache.get(key)
+        if scaled is None:
+            w, h = text_surface.get_size()
+            scaled = _scale_surface(text_surface, (int(w * self.scale), int(h * self.scale)))
+            self.text_cache[key] = scaled
+        return display.blit(scaled, self.to_screen(x, y))
+
+    def draw_path(self, display, color, points):
+        """ VISUAL 模式的路徑線 (points 為地圖座標) """
+        screen_points = [self.to_screen(x, y) for x, y in points]
+        pygame.draw.lines(display, color, False, screen_points,
+                          max(1, round(2 * self.scale)))
+        pygame.draw.circle(display, color, screen_points[-1], max(1, round(4 * self.scale)))
+
+    def draw_header(self, display, content_surface, key, redraw):
+        """
+        畫 HUD 區域: HUD 內容 (key) 改變時才呼叫 redraw() 在內部解析度重畫並縮放一次。
+        """
+        if key != self.header_key:
+            redraw()
+            header_rect = pygame.Rect(0, 0, SCREEN_WIDTH, self.header_height)
+            size = (int(SCREEN_WIDTH * self.scale), int(self.header_height * self.scale))
+            self.header = _scale_surface(content_surface.subsurface(header_rect), size)
+            self.header_key = key
+        display.blit(self.header, self.origin)
+
+
+def _scale_surface(surface, size):
+    """ 小型 surface 的縮放 (可以的話用平滑縮放，文字比較好看) """
+    if surface.get_bitsize() in (24, 32):
+        return pygame.transform.smoothscale(surface, size)
+    return pygame.transform.scale(surface, size)
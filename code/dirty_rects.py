@@ -0,0 +1,85 @@
+# dirty_rects.py
+"""
+髒矩形 (Dirty Rectangle) 追蹤。
+
+遊戲中每幀真正改變的只有五個角色、被吃掉的豆子、水果與偶爾變動的分數，
+其他區域 (牆壁、剩下的豆子、Log 面板) 跟上一幀一模一樣。
+這裡記錄每個會動的東西「上一幀」與「這一幀」的範圍:
+- 上一幀的範圍: 先用快取的圖層蓋回去 (擦掉舊的角色)
+- 這一幀的範圍: 畫上新的角色
+最後只把這些區域交給 pygame.display.update(rects)，不必 flip 整個畫面。
+"""
+import pygame
+
+
+class DirtyRectTracker:
+    """
+    以 key (例如 "player"、("ghost", 0)) 記錄每個物件上一幀的範圍。
+
+    屬性:
+        full_redraw: 下一幀是否需要整個畫面重畫 (狀態切換、縮放視窗後)
+        last_pixels / last_ratio: 上一幀重畫的像素數與佔整個畫面的比例
+        total_pixels / frames: 累計的重畫像素數與幀數
+    """
+
+    def __init__(self):
+        self.previous = {}
+        self.current = {}
+        self.extra = []
+        self.full_redraw = True
+        self.last_pixels = 0
+        self.last_ratio = 0.0
+        self.total_pixels = 0
+        self.frames = 0
+
+    def invalidate(self):
+        """ 下一幀整個畫面重畫 """
+        self.full_redraw = True
+
+    def previous_rects(self):
+        """ 上一幀所有物件的範圍 (需要先用圖層蓋回去) """
+        return list(self.previous.values())
+
+    def track(self, key, rect):
+        """ 記錄物件這一幀的範圍 (rect 為 None 表示這一幀沒有畫) """
+        if rect is not None and rect.width > 0 and rect.height > 0:
+            self.current[key] = pygame.Rect(rect)
+
+    def mark(self, rect):
+        """ 額外標記一塊需要更新的區域 (例如被吃掉的豆子) """
+        self.extra.append(pygame.Rect(rect))
+
+    def collect(self):
+        """
+        結束這一幀: 合併上一幀與這一幀的範圍，並把這一幀變成下一幀的「上一幀」。
+
+        回傳:
+            需要更新的矩形列表 (重疊的矩形已合併)
+        """
+        rects = list(self.previous.values()) + list(self.current.values()) + self.extra
+        self.previous, self.current = self.current, {}
+        self.extra = []
+        return merge_rects(rects)
+
+    def record(self, pixels, full_pixels):
+        """ 記錄這一幀重畫的像素數 (full_pixels 為整個畫面的像素數) """
+        self.last_pixels = pixels
+        self.last_ratio = pixels / full_pixels if full_pixels else 0.0
+        self.total_pixels += pixels
+        self.frames += 1
+
+    def average_pixels(self):
+        return self.total_pixels / self.frames if self.frames else 0.0
+
+
+def merge_rects(rects):
+    """ 把互相重疊的矩形合併成一個，避免同一塊區域重畫兩次 """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
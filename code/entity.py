@@ -22,6 +22,10 @@ class Entity:
         self.speed = speed
         self.direction = (0, 0)  # (dx, dy)
 
+        # 上一個模擬 tick 的像素座標 (繪圖時內插用)
+        self.prev_x = self.pixel_x
+        self.prev_y = self.pixel_y
+
     def get_grid_pos(self):
         """ 計算當前所在的網格座標 """
         self.grid_x = int((self.pixel_x - (TILE_SIZE // 2)) // TILE_SIZE)
@@ -33,6 +37,26 @@ class Entity:
         self.pixel_x = (self.grid_x * TILE_SIZE) + (TILE_SIZE // 2)
         self.pixel_y = (self.grid_y * TILE_SIZE) + (TILE_SIZE // 2)
 
+    def save_previous(self):
+        """ 每個模擬 tick 開始前呼叫，記下目前位置給繪圖內插 """
+        self.prev_x = self.pixel_x
+        self.prev_y = self.pixel_y
+
+    def render_pos(self, alpha):
+        """
+        繪圖用的位置: 在上一個 tick 與目前 tick 的位置之間內插。
+
+        參數:
+            alpha: 0 = 上一個 tick，1 = 目前 tick
+
+        位置一次跳超過一格 (穿過隧道、重生、重新開始) 時不內插，直接用目前位置。
+        """
+        dx = self.pixel_x - self.prev_x
+        dy = self.pixel_y - self.prev_y
+        if abs(dx) > TILE_SIZE or abs(dy) > TILE_SIZE:
+            return self.pixel_x, self.pixel_y
+        return self.prev_x + dx * alpha, self.prev_y + dy * alpha
+
     def is_centered(self, custom_threshold=None):
         """ 判斷是否位於網格中心 (容許小誤差) """
         # 注意: 如果改用 dt 移動，這裡的誤差容許值可能要調整，或者直接用距離判斷
@@ -0,0 +1,174 @@
+# flow_field.py
+"""
+共用的流場 (Flow Field) 服務。
+
+Blinky 追玩家所在的格子、Clyde 常常也追同一格、被吃掉的鬼都要回 home_pos，
+與其每隻鬼各自從自己的位置搜尋，不如對「每個不同的目標格」只建一張到該目標的距離場，
+所有鬼直接讀自己腳下的格子決定下一步。
+
+maze.py 的距離矩陣已經包含每個目標的距離場，所以流場直接引用目標的那一列 (建立是 O(1))，
+只有 MazeDistances 連通區域外的起點才從目標反向 BFS。
+
+回家 / 出鬼屋的目標固定不變，在載入時就建好 (static)，其他目標以 LRU 方式快取。
+驚嚇模式每一格都換一個隨機目標，不要放進共用的 LRU (見 Ghost.get_next_step)。
+"""
+from array import array
+from collections import OrderedDict
+from maze import get_maze_distances
+from pathfinding import NO_NODE, DIR_INDICES, get_grid_graph
+
+UNREACHABLE = -1
+
+# 動態流場 (玩家位置等會變動的目標) 最多保留幾張
+FLOW_FIELD_CAPACITY = 8
+
+
+class FlowField:
+    """
+    到某個目標格的距離場。
+
+    起點在 MazeDistances 的連通區域內時直接查距離矩陣 / 下一步矩陣 (目標那一列)；
+    只有區域外的起點 (例如門關著時的鬼屋裡) 才需要從目標反向 BFS，
+    結果存在 dist[node] (UNREACHABLE 表示到不了)，第一次用到時才計算。
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.dist = array('h', [UNREACHABLE]) * graph.size
+        self.queue = array('i', [0]) * graph.size
+        self.target = None
+        self.door_open = False
+        self.maze = None
+        self.target_index = None  # 目標在 maze 中的編號 (不在連通區域內為 None)
+        self.filled = False       # dist 是否已經反向 BFS 過
+
+    def build(self, target, door_open):
+        """ 換成到 target 的距離場 (只記下目標，不需要搜尋) """
+        self.target = target
+        self.door_open = door_open
+        self.maze = get_maze_distances(door_open)
+        self.target_index = self.maze.index.get(target)
+        self.filled = False
+
+    def _fill(self):
+        """ 從目標反向 BFS 填滿 dist (地圖是無向圖，反向即正向) """
+        self.filled = True
+        dist, queue = self.dist, self.queue
+        for node in range(self.graph.size):
+            dist[node] = UNREACHABLE
+        t = self.graph.node_id(self.target)
+        if t is None:
+            return
+        step = self.graph.step[self.door_open]
+        dist[t] = 0
+        queue[0] = t
+        head, tail = 0, 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            d = dist[current] + 1
+            for i in DIR_INDICES:
+                next_node = step[current * 4 + i]
+                if next_node != NO_NODE and dist[next_node] == UNREACHABLE:
+                    dist[next_node] = d
+                    queue[tail] = next_node
+                    tail += 1
+
+    def distance(self, start):
+        maze = self.maze
+        s = maze.index.get(start)
+        if s is not None:
+            if self.target_index is None:
+                return None
+            d = maze.dist[s * maze.size + self.target_index]
+            return d if d >= 0 else None
+        if not self.filled:
+            self._fill()
+        s = self.graph.node_id(start)
+        if s is None or self.dist[s] == UNREACHABLE:
+            return None
+        return self.dist[s]
+
+    def next_step(self, start):
+        """
+        依鄰居順序 (上、下、左、右) 選第一個「離目標少一步」的鄰居。
+        這剛好就是 BFS 從 start 出發會走的那一步 (也就是 MazeDistances 的下一步矩陣)，
+        所以結果與 ALGO_BFS 相同。
+        """
+        maze = self.maze
+        s = maze.index.get(start)
+        if s is not None:
+            if self.target_index is None:
+                return None
+            hop = maze.next_hop[s * maze.size + self.target_index]
+            return maze.tiles[hop] if hop >= 0 else None
+        if not self.filled:
+            self._fill()
+        graph = self.graph
+        s = graph.node_id(start)
+        if s is None:
+            return None
+        d = self.dist[s]
+        if d <= 0:
+            return None
+        step = graph.step[self.door_open]
+        for i in DIR_INDICES:
+            next_node = step[s * 4 + i]
+            if next_node != NO_NODE and self.dist[next_node] == d - 1:
+                return graph.tiles[next_node]
+        return None
+
+
+class FlowFieldService:
+    """
+    由 Game 擁有、所有鬼魂共用的流場快取。
+
+    屬性:
+        fields_built: 建立了幾張流場
+        lookups: 鬼魂查詢下一步的次數
+    """
+
+    def __init__(self, graph=None, capacity=FLOW_FIELD_CAPACITY):
+        self.graph = graph if graph is not None else get_grid_graph()
+        self.capacity = capacity
+        self.static_fields = {}
+        self.dynamic_fields = OrderedDict()
+        self.fields_built = 0
+        self.lookups = 0
+
+    def add_static_target(self, target, door_open):
+        """ 預先建立固定目標的流場 (例如 home_pos、GHOST_HOUSE_EXIT_POS)，永遠不會被淘汰 """
+        key = (target, door_open)
+        if key not in self.static_fields:
+            field = FlowField(self.graph)
+            field.build(target, door_open)
+            self.fields_built += 1
+            self.static_fields[key] = field
+        return self.static_fields[key]
+
+    def get_field(self, target, door_open):
+        """ 取得到 target 的流場，目標第一次出現時才計算 """
+        key = (target, door_open)
+        field = self.static_fields.get(key)
+        if field is not None:
+            return field
+
+        field = self.dynamic_fields.get(key)
+        if field is not None:
+            self.dynamic_fields.move_to_end(key)
+            return field
+
+        # 目標變了 (例如玩家走到新的格子): 重用最久沒用的流場的陣列
+        if len(self.dynamic_fields) >= self.capacity:
+            _, field = self.dynamic_fields.popitem(last=False)
+        else:
+            field = FlowField(self.graph)
+        field.build(target, door_open)
+        self.fields_built += 1
+        self.dynamic_fields[key] = field
+        return field
+
+    def next_step(self, start, target, door_open):
+        """ 從共用流場讀出 start 的下一步 (與 BFS 結果相同) """
+        self.lookups += 1
+        return self.get_field(target, door_open).next_step(start)
@@ -0,0 +1,27 @@
+# fonts.py
+"""
+UI 字型。
+
+原本 settings.py 在 import 時就初始化字型模組並建立字型，
+所以只想跑規則的 Simulation (或沒有顯示器的批次模擬) 一 import 設定檔就會碰到 SDL_ttf。
+改成由 Game 在開視窗時呼叫 init_fonts()，其他模組以 fonts.LOG_FONT 等方式取用。
+"""
+import pygame
+from settings import *
+
+SCORE_FONT = None
+GAME_OVER_FONT = None
+WIN_FONT = None
+LOG_FONT = None
+
+
+def init_fonts():
+    """ 初始化字型模組並建立 UI 字型 (重複呼叫不會重建) """
+    global SCORE_FONT, GAME_OVER_FONT, WIN_FONT, LOG_FONT
+    if LOG_FONT is not None:
+        return
+    pygame.font.init()
+    SCORE_FONT = pygame.font.Font(None, SCORE_FONT_SIZE)
+    GAME_OVER_FONT = pygame.font.Font(None, GAME_OVER_FONT_SIZE)
+    WIN_FONT = pygame.font.Font(None, WIN_FONT_SIZE)
+    LOG_FONT = pygame.font.Font(None, LOG_FONT_SIZE)
@@ -4,7 +4,11 @@ import random
 import math
 from settings import *
 from entity import Entity
-from queue import PriorityQueue
+from tile_grid import GAME_MAP
+from junction_graph import get_junction_graph
+from pathfinding import create_pathfinder
+from map_index import get_map_index
+from sprite_atlas import get_sprite_atlas
 
 
 class Ghost(Entity):
@@ -14,7 +18,7 @@ class Ghost(Entity):
     以及繪製鬼魂的動畫 (身體、眼睛、腳)。
     """
 
-    def __init__(self, grid_x, grid_y, color, ai_mode, speed=SPEED, scatter_point=None, in_house=False, delay=0, on_log=None, algorithm=ALGO_ASTAR):
+    def __init__(self, grid_x, grid_y, color, ai_mode, speed=SPEED, scatter_point=None, in_house=False, delay=0, on_log=None, algorithm=ALGO_ASTAR, plan_at_junctions=GHOST_JUNCTION_PLANNING, flow_fields=None, path_cache=None, rng=None, use_tables=True):
         """
         初始化鬼魂。
 
@@ -26,8 +30,14 @@ class Ghost(Entity):
             scatter_point: 散開模式下的目標點 (通常是地圖角落)
             in_house: 是否在鬼屋內開始
             delay: 在鬼屋內的等待時間 (毫秒)
-            on_log: 用於輸出除錯訊息的 callback 函數
-            algorithm: 使用的路徑搜尋演算法 (ALGO_ASTAR, ALGO_BFS, ALGO_GREEDY)
+            on_log: 用於輸出除錯訊息的 callback 函數 on_log(訊息, 顏色[, 等級, *格式化參數])
+            algorithm: 使用的路徑搜尋演算法名稱 (ALGO_ASTAR, ALGO_BFS, ALGO_GREEDY, ALGO_JPS...)
+            plan_at_junctions: 是否只在路口做路徑搜尋 (走廊上沿路前進)
+            flow_fields: 所有鬼魂共用的 FlowFieldService (可為 None)
+            path_cache: 與 VISUAL 畫線共用的 PathCache (可為 None)
+            rng: 這場遊戲的 random.Random (驚嚇目標、出門方向與 fallback 都從這裡抽)，
+                 None 時自己建立一個未設定種子的
+            use_tables: 演算法是否可以查 MazeDistances 的表 (False: 每次決策都實際搜尋)
         """
         # 初始化 Entity 父類別
         super().__init__(grid_x, grid_y, speed)
@@ -42,7 +52,13 @@ class Ghost(Entity):
         # 繼承自 Entity 的 pixel_x/y 用來繪圖
 
         self.ai_mode = ai_mode
-        self.algorithm = algorithm
+        self.flow_fields = flow_fields
+        self.path_cache = path_cache
+        self.rng = rng if rng is not None else random.Random()
+        self.use_tables = use_tables
+        self.set_algorithm(algorithm)
+        self.plan_at_junctions = plan_at_junctions
+        self.path_requests = 0  # 路徑搜尋呼叫次數 (統計用)
         self.delay = delay
 
         self.current_ai_mode = ai_mode
@@ -57,89 +73,40 @@ class Ghost(Entity):
         self.scatter_path = scatter_point if scatter_point else [
             (grid_x, grid_y)]
         self.scatter_index = 0
-        self.target = (0, 0)
+        # 最近一次決策的目標格 (VISUAL 模式直接讀取，不重新計算)
+        self.target = None
 
         self.is_frightened = False
         self.is_eaten = False
         self.on_log = on_log
 
+    def get_sprite(self, flash_white=False, atlas=None):
+        """ 從 SpriteAtlas 取出目前狀態的圖 (atlas 預設為遊戲內部解析度的圖集) """
+        if atlas is None:
+            atlas = get_sprite_atlas()
+        if self.is_eaten:
+            # 只畫眼睛
+            return atlas.ghost_eyes(self.direction)
+        phase = atlas.leg_phase(pygame.time.get_ticks())
+        if self.is_frightened:
+            return atlas.frightened_ghost(phase, flash_white)
+        return atlas.ghost(self.color, phase, self.direction)
+
     def draw(self, surface, flash_white=False):
         """
-        繪製鬼魂到畫面上。
+        繪製鬼魂到畫面上 (目前狀態的圖，一次 blit)。
 
         參數:
             surface: 繪製的目標圖層
             flash_white: 驚嚇模式快結束時的閃爍效果
+
+        回傳:
+            實際畫到的範圍 (Rect)
         """
-        if self.is_eaten:
-            # 只畫眼睛
-            self._draw_eyes(surface)
-        else:
-            # 1. 畫身體 (上半圓 + 下半方)
-            if self.is_frightened:
-                draw_color = WHITE if flash_white else FRIGHTENED_BLUE
-            else:
-                draw_color = self.color
-
-            center = (int(self.pixel_x), int(self.pixel_y))
-
-            # 頭部
-            pygame.draw.circle(surface, draw_color, center, self.radius)
-
-            # 身體底部 (矩形向下延伸)
-            rect_top = center[1]
-            rect_h = self.radius
-            rect_w = self.radius * 2
-            body_rect = pygame.Rect(
-                center[0] - self.radius, rect_top, rect_w, rect_h)
-            pygame.draw.rect(surface, draw_color, body_rect)
-
-            # 腳 (波浪) - 簡單畫三個小圓當腳
-            leg_radius = self.radius // 3
-            for i in range(3):
-                lx = center[0] - self.radius + \
-                    (i * 2 * leg_radius) + leg_radius
-                ly = center[1] + self.radius
-
-                # 簡單動畫: 根據 pixel_x 做一點起伏
-                offset = math.sin(pygame.time.get_ticks() * 0.01 + i) * 2
-                pygame.draw.circle(surface, draw_color,
-                                   (int(lx), int(ly + offset)), leg_radius)
-
-            # 2. 畫眼睛 (如果不是驚嚇模式)
-            if not self.is_frightened:
-                self._draw_eyes(surface)
-            else:
-                # 驚嚇模式畫嘴巴或簡單的驚恐眼
-                # 這裡簡單畫驚嚇眼 (小方塊)
-                pygame.draw.rect(surface, (255, 200, 200),
-                                 (center[0]-4, center[1]-2, 2, 2))
-                pygame.draw.rect(surface, (255, 200, 200),
-                                 (center[0]+2, center[1]-2, 2, 2))
-
-    def _draw_eyes(self, surface):
-        """ 繪製眼睛與眼珠 (Helper) """
-        center = (int(self.pixel_x), int(self.pixel_y))
-        eye_radius = 4
-        pupil_radius = 2
-        eye_offset_x = 4
-        eye_offset_y = -2
-
-        # 眼珠偏移量 (看方向)
-        look_x = self.direction[0] * 2
-        look_y = self.direction[1] * 2
-
-        # 左眼
-        left_eye_pos = (center[0] - eye_offset_x, center[1] + eye_offset_y)
-        pygame.draw.circle(surface, WHITE, left_eye_pos, eye_radius)
-        pygame.draw.circle(surface, BLUE, (int(
-            left_eye_pos[0] + look_x), int(left_eye_pos[1] + look_y)), pupil_radius)
-
-        # 右眼
-        right_eye_pos = (center[0] + eye_offset_x, center[1] + eye_offset_y)
-        pygame.draw.circle(surface, WHITE, right_eye_pos, eye_radius)
-        pygame.draw.circle(surface, BLUE, (int(
-            right_eye_pos[0] + look_x), int(right_eye_pos[1] + look_y)), pupil_radius)
+        atlas = get_sprite_atlas()
+        sprite = self.get_sprite(flash_white, atlas)
+        return surface.blit(sprite, (int(self.pixel_x) - atlas.center,
+                                     int(self.pixel_y) - atlas.center))
 
     def eat(self):
         """
@@ -147,8 +114,7 @@ class Ghost(Entity):
         將狀態轉為 '被吃掉' (雙眼模式)，並快速回到鬼屋。
         """
         if self.on_log:
-            self.on_log(
-                f"[{self.ai_mode}] Ghost eaten! Returning home.", GREY)
+            self.on_log("[%s] Ghost eaten! Returning home.", GREY, LOG_INFO, self.ai_mode)
         self.is_frightened = False
         self.is_eaten = True
         self.current_ai_mode = MODE_GO_HOME
@@ -158,8 +124,7 @@ class Ghost(Entity):
 
     def respawn(self):
         if self.on_log:
-            self.on_log(
-                f"[{self.ai_mode}] Ghost respawned! Exiting house.", self.color)
+            self.on_log("[%s] Ghost respawned! Exiting house.", self.color, LOG_INFO, self.ai_mode)
         self.is_eaten = False
         self.current_ai_mode = MODE_EXIT_HOUSE
         self.speed = self.default_speed
@@ -182,8 +147,7 @@ class Ghost(Entity):
             self.speed = 1  # 變慢 (如果用 dt 架構，這裡應該是 0.5 * SPEED)
             self.direction = (self.direction[0] * -1, self.direction[1] * -1)
             if self.on_log:
-                self.on_log(
-                    f"[{self.ai_mode}] Ghost frightened!", FRIGHTENED_BLUE)
+                self.on_log("[%s] Ghost frightened!", FRIGHTENED_BLUE, LOG_DEBUG, self.ai_mode)
 
     def end_frightened(self):
         if self.is_frightened:
@@ -192,8 +156,7 @@ class Ghost(Entity):
                 self.current_ai_mode = self.ai_mode
                 self.speed = self.default_speed
                 if self.on_log:
-                    self.on_log(
-                        f"[{self.ai_mode}] Ghost unfrightened.", self.color)
+                    self.on_log("[%s] Ghost unfrightened.", self.color, LOG_DEBUG, self.ai_mode)
 
     def get_neighbors(self, node):
         """
@@ -202,28 +165,23 @@ class Ghost(Entity):
         """
         x, y = node
         neighbors = []
-        map_width = len(GAME_MAP[0])
-        map_height = len(GAME_MAP)
+        map_width = GAME_MAP.width
+        map_height = GAME_MAP.height
 
         for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
             nx = (x + dx) % map_width
             ny = y + dy
 
             if 0 <= ny < map_height:
-                if nx >= len(GAME_MAP[ny]):
-                    continue
-                if is_wall(GAME_MAP, nx, ny):
+                if GAME_MAP.is_wall(nx, ny):
                     continue
 
-                if GAME_MAP[ny][nx] == TILE_DOOR:
-                    if self.current_ai_mode not in [MODE_EXIT_HOUSE, MODE_GO_HOME]:
+                if GAME_MAP.is_door(nx, ny):
+                    if not self.is_door_passable():
                         continue
                 neighbors.append((nx, ny))
         return neighbors
 
-    def heuristic(self, a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
     def get_target_position(self, player, blinky_pos=None):
         """
         根據目前的 AI 模式決定目標點 (Target Tile)。
@@ -243,12 +201,8 @@ class Ghost(Entity):
             return GHOST_HOUSE_EXIT_POS
         elif self.current_ai_mode == MODE_FRIGHTENED:
             # 隨機漫步: 其實不需要特定的 global target，只要 local 隨機選
-            # 但為了 unified logic，我們隨機選一個合法的點
-            while True:
-                rx = random.randint(1, 26)
-                ry = random.randint(1, 29)
-                if not is_wall(GAME_MAP, rx, ry):
-                    return (rx, ry)
+            # 但為了 unified logic，我們隨機選一個合法的點 (O(1) 抽樣)
+            return get_map_index().random_walkable(self.rng)
 
         elif self.current_ai_mode == MODE_SCATTER:
             target = self.scatter_path[self.scatter_index]
@@ -275,137 +229,62 @@ class Ghost(Entity):
         return self.validate_target(target)
 
     def validate_target(self, target):
-        tx, ty = int(target[0]), int(target[1])
-        max_y = len(GAME_MAP) - 1
-
-        # 修正：確保 max_x 是基於該行的長度 (雖然有 padding 了，但還是檢查一下 safe)
-        if 0 <= ty <= max_y:
-            max_x = len(GAME_MAP[ty]) - 1
-        else:
-            return (self.grid_x, self.grid_y)  # Out of bounds badly
-
-        tx = max(1, min(tx, max_x - 1))
-        ty = max(1, min(ty, max_y - 1))
-
-        if is_wall(GAME_MAP, tx, ty):
-            # 增強版 Fallback: 螺旋搜尋最近的空地
-            for dist in range(1, 10):  # 增加搜尋範圍
-                for dx, dy in [(0, dist), (0, -dist), (dist, 0), (-dist, 0),
-                               (dist, dist), (dist, -dist), (-dist, dist), (-dist, -dist)]:
-                    nx, ny = tx + dx, ty + dy
-                    if 0 <= ny <= max_y and 0 <= nx < len(GAME_MAP[ny]):
-                        if not is_wall(GAME_MAP, nx, ny):
-                            return (nx, ny)
+        """
+        把目標修正成地圖內的非牆壁格子 (查 MapIndex 預先算好的「最近空地」表)。
+        目標嚴重超出地圖或附近都是牆時，回傳鬼魂自己的位置。
+        """
+        result = get_map_index().nearest_walkable(target)
+        if result is None:
             return (self.grid_x, self.grid_y)
+        return result
 
-        return (tx, ty)
-
-    # ... Algo methods (Greedy, BFS, A*) ...
-    # 簡化：為節省篇幅，這裡我只放由 A* 代表，其他可以沿用
+    def is_door_passable(self):
+        """ 目前模式是否可以穿過鬼屋的門 """
+        return self.current_ai_mode in [MODE_EXIT_HOUSE, MODE_GO_HOME]
 
-    def algo_greedy(self, start, target):
+    def set_algorithm(self, algorithm):
+        """ 依名稱切換路徑搜尋演算法 (見 pathfinding.PATHFINDERS) """
+        self.algorithm = algorithm
+        self.pathfinder = create_pathfinder(algorithm, use_tables=self.use_tables)
+
+    def get_next_step(self, start, target):
+        """ 用目前的演算法決定下一步 """
+        if (self.flow_fields is not None and self.pathfinder.uses_flow_fields
+                and self.current_ai_mode != MODE_FRIGHTENED):
+            # 與 BFS 相同結果的演算法直接讀共用流場
+            # (驚嚇模式的隨機目標每次都不同，放進共用 LRU 只會把其他鬼的流場擠掉)
+            return self.flow_fields.next_step(start, target, self.is_door_passable())
+        if self.path_cache is not None and self.pathfinder.cache_paths:
+            # 需要實際搜尋的演算法: 與 VISUAL 畫線共用快取的完整路徑
+            path = self.get_path(start, target)
+            return path[1] if len(path) > 1 else None
+        return self.pathfinder.next_step(start, target, self.is_door_passable(), self.direction)
+
+    def get_path(self, start, target):
+        """ 回傳完整路徑 (給 VISUAL 模式畫線用)，有 path_cache 時優先從快取取得 """
+        door_open = self.is_door_passable()
+        if self.path_cache is None:
+            return self.pathfinder.find_path(start, target, door_open, self.direction)
+
+        key = (self.algorithm, start, target, door_open)
+        if self.pathfinder.uses_direction:
+            key += (self.direction,)
+        return self.path_cache.get_path(
+            key, lambda: self.pathfinder.find_path(start, target, door_open, self.direction))
+
+    def follow_corridor(self, start_pos):
         """
-        Greedy Best-First Search (貪婪演算法)
-        只看眼前哪一步離目標最近，不考慮障礙物後的代價，容易走進死路。
+        路口模式: 如果目前在走廊上 (只有兩個出口)，直接回傳繼續往前的那一格，
+        不需要路徑搜尋。在路口、或需要穿過門的模式下回傳 None (交給演算法決定)。
         """
-        neighbors = self.get_neighbors(start)
-        # 禁止回頭邏輯 (Pac-Man standard)
-        reverse_pos = (start[0] - self.direction[0],
-                       start[1] - self.direction[1])
-        valid_neighbors = [n for n in neighbors if n != reverse_pos]
-        if not valid_neighbors:
-            valid_neighbors = neighbors
-        if not valid_neighbors:
+        if not self.plan_at_junctions or self.is_door_passable():
             return None
-        return min(valid_neighbors, key=lambda n: self.heuristic(n, target))
-
-    def algo_bfs(self, start, target):
-        """
-        Breadth-First Search (廣度優先搜尋)
-        地毯式搜索，保證找到最短路徑，但效能較差，搜尋範圍會擴散得很大。
-        """
-        queue = [start]
-        came_from = {start: None}
-        while queue:
-            current = queue.pop(0)
-            if current == target:
-                break
-            for next_node in self.get_neighbors(current):
-                if next_node not in came_from:
-                    queue.append(next_node)
-                    came_from[next_node] = current
-        return self.reconstruct_next_step(came_from, start, target)
-
-    def algo_astar(self, start, target):
-        """
-        A* Algorithm (A Star 演算法)
-        結合了 Dijkstra (實際代價) 與 Greedy (預估代價 Heuristic) 的優點。
-        是目前遊戲中最常用的路徑搜尋演算法，效能好且能找到最短路徑。
-        """
-        open_set = PriorityQueue()
-        open_set.put((0, start))
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-
-        while not open_set.empty():
-            _, current = open_set.get()
-            if current == target:
-                break
-            for next_node in self.get_neighbors(current):
-                new_cost = cost_so_far[current] + 1
-                if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
-                    cost_so_far[next_node] = new_cost
-                    priority = new_cost + self.heuristic(next_node, target)
-                    open_set.put((priority, next_node))
-                    came_from[next_node] = current
-        return self.reconstruct_next_step(came_from, start, target)
-
-    def get_path_astar(self, start, target):
-        """ Separate method to return the FULL path for visualization """
-        open_set = PriorityQueue()
-        open_set.put((0, start))
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-
-        while not open_set.empty():
-            _, current = open_set.get()
-            if current == target:
-                break
-            for next_node in self.get_neighbors(current):
-                new_cost = cost_so_far[current] + 1
-                if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
-                    cost_so_far[next_node] = new_cost
-                    priority = new_cost + self.heuristic(next_node, target)
-                    open_set.put((priority, next_node))
-                    came_from[next_node] = current
-
-        # Reconstruct full path
-        if target not in came_from:
-            return []
-        curr = target
-        path = []
-        while curr != start:
-            path.append(curr)
-            curr = came_from.get(curr)
-            if curr is None:
-                return []
-        path.append(start)
-        path.reverse()
-        return path
-
-    def reconstruct_next_step(self, came_from, start, target):
-        if target not in came_from:
+        graph = get_junction_graph(door_open=False)
+        if graph.is_junction(start_pos):
             return None
-        curr = target
-        path = []
-        while curr != start:
-            path.append(curr)
-            curr = came_from.get(curr)
-            if curr is None:
-                return None
-        if path:
-            return path[-1]
-        return None
+        behind = ((start_pos[0] - int(self.direction[0])) % graph.width,
+                  start_pos[1] - int(self.direction[1]))
+        return graph.follow_corridor(start_pos, behind)
 
     def _handle_waiting_bounce(self):
         home_pixel_y = (self.home_pos[1] * TILE_SIZE) + (TILE_SIZE // 2)
@@ -463,14 +342,14 @@ class Ghost(Entity):
                 self.is_frightened = False  # 重生後不再驚嚇
                 self.current_ai_mode = MODE_EXIT_HOUSE
                 if self.on_log:
-                    self.on_log(
-                        f"[{self.ai_mode}] Ghost respawned! Exiting house.", self.color)
+                    self.on_log("[%s] Ghost respawned! Exiting house.", self.color, LOG_INFO,
+                                self.ai_mode)
                 self.direction = (0, -1)  # Reset direction to exit house
 
             if self.current_ai_mode == MODE_EXIT_HOUSE:
                 if self.grid_y <= GHOST_HOUSE_Y_THRESHOLD:
                     self.current_ai_mode = self.ai_mode
-                    self.direction = random.choice([(-1, 0), (1, 0)])
+                    self.direction = self.rng.choice([(-1, 0), (1, 0)])
 
             # 速度設定
             if self.current_ai_mode == MODE_GO_HOME:
@@ -480,28 +359,27 @@ class Ghost(Entity):
             else:
                 self.speed = self.default_speed
 
-            # 決策
-            target = self.get_target_position(player, blinky_tile)
-            if self.current_ai_mode == MODE_SCATTER and (self.grid_x, self.grid_y) == target:
+            # 散開點到達時換下一個 (走廊上也要檢查，否則會錯過散開點)
+            if self.current_ai_mode == MODE_SCATTER and (self.grid_x, self.grid_y) == self.scatter_path[self.scatter_index]:
                 self.scatter_index = (
                     self.scatter_index + 1) % len(self.scatter_path)
-                target = self.get_target_position(player, blinky_tile)
 
-            # 執行演算法
-            start_pos = (self.grid_x % len(game_map[0]), self.grid_y)
-            next_step = None
+            start_pos = (self.grid_x % game_map.width, self.grid_y)
+            next_step = self.follow_corridor(start_pos)
+
+            if next_step is None:
+                # 決策
+                target = self.get_target_position(player, blinky_tile)
+                self.target = target
 
-            if self.algorithm == ALGO_GREEDY:
-                next_step = self.algo_greedy(start_pos, target)
-            elif self.algorithm == ALGO_BFS:
-                next_step = self.algo_bfs(start_pos, target)
-            elif self.algorithm == ALGO_ASTAR:
-                next_step = self.algo_astar(start_pos, target)
+                # 執行演算法
+                self.path_requests += 1
+                next_step = self.get_next_step(start_pos, target)
 
             if next_step:
                 dx = next_step[0] - self.grid_x
                 dy = next_step[1] - self.grid_y
-                map_width = len(game_map[0])
+                map_width = game_map.width
                 if dx > map_width // 2:
                     self.direction = (-1, 0)
                 elif dx < -map_width // 2:
@@ -512,7 +390,7 @@ class Ghost(Entity):
                 # Fallback: Just keep moving or random valid neighbor
                 valid = self.get_neighbors(start_pos)
                 if valid:
-                    step = random.choice(valid)
+                    step = self.rng.choice(valid)
                     self.direction = (step[0]-self.grid_x, step[1]-self.grid_y)
 
             # 決策完畢，修正位置
@@ -0,0 +1,103 @@
+# junction_graph.py
+"""
+路口圖 (Junction Graph)。
+
+迷宮裡大部分的格子都是只有兩個出口的走廊，鬼魂在那裡其實沒有選擇可言。
+這裡把地圖收縮成只包含「路口 / 死路 / 隧道口」的圖，走廊則變成帶權重 (長度) 的邊，
+讓鬼魂只需要在進入路口時才做路徑搜尋，其餘時間沿著走廊前進。
+"""
+from settings import *
+from maze import NEIGHBOR_DIRS
+
+
+class JunctionGraph:
+    """
+    從地圖字串建立的路口圖。
+
+    屬性:
+        nodes: 所有路口格子 (集合)
+        edges: {路口: [(相鄰路口, 走廊長度, 走廊格子列表), ...]}
+    """
+
+    def __init__(self, map_strings, door_open=False):
+        """
+        參數:
+            map_strings: 地圖字串 (通常是 MAP_STRINGS)
+            door_open: 鬼屋的門是否可通行 (追逐/散開/驚嚇模式下為 False)
+        """
+        self.map_strings = map_strings
+        self.door_open = door_open
+        self.width = len(map_strings[0])
+        self.height = len(map_strings)
+
+        # 每個可走格子的出口 (順序與 Ghost.get_neighbors 相同)
+        self.exits = {}
+        self.tunnel_mouths = set()
+        for y, row in enumerate(map_strings):
+            for x, char in enumerate(row):
+                if self._is_blocked(char):
+                    continue
+                exits = []
+                for dx, dy in NEIGHBOR_DIRS:
+                    nx, ny = (x + dx) % self.width, y + dy
+                    if 0 <= ny < self.height and not self._is_blocked(map_strings[ny][nx]):
+                        exits.append((nx, ny))
+                        if not 0 <= x + dx < self.width:
+                            self.tunnel_mouths.add((x, y))
+                self.exits[(x, y)] = exits
+
+        # 路口: 出口數不是 2 (路口 / 死路)，或是隧道口
+        self.nodes = set(tile for tile, exits in self.exits.items()
+                         if len(exits) != 2) | self.tunnel_mouths
+
+        self.edges = {}
+        for node in self.nodes:
+            self.edges[node] = [self._walk_corridor(node, first)
+                                for first in self.exits[node]]
+
+    def _is_blocked(self, char):
+        return char == TILE_WALL or (char == TILE_DOOR and not self.door_open)
+
+    def _walk_corridor(self, start, first):
+        """ 從路口 start 往 first 方向沿著走廊走，直到抵達下一個路口 """
+        corridor = []
+        prev, current = start, first
+        while current not in self.nodes:
+            corridor.append(current)
+            a, b = self.exits[current]
+            prev, current = current, (b if a == prev else a)
+        return current, len(corridor) + 1, corridor
+
+    def is_junction(self, tile):
+        """ 是否需要在這格做決策 (路口、死路、隧道口，或根本不在圖上的格子) """
+        return tile in self.nodes or tile not in self.exits
+
+    def follow_corridor(self, tile, came_from):
+        """
+        在走廊格子上，回傳「不是回頭」的那個出口。
+
+        參數:
+            tile: 目前所在的走廊格子
+            came_from: 上一格 (鬼魂背後的格子)
+
+        回傳:
+            下一格座標；如果 came_from 不是這條走廊的出口則回傳 None
+        """
+        a, b = self.exits[tile]
+        if came_from == a:
+            return b
+        if came_from == b:
+            return a
+        return None
+
+
+_JUNCTION_CACHE = {}
+
+
+def get_junction_graph(door_open=False):
+    """ 取得共用的 JunctionGraph (每種門的版本只建立一次) """
+    graph = _JUNCTION_CACHE.get(door_open)
+    if graph is None:
+        graph = JunctionGraph(MAP_STRINGS, door_open)
+        _JUNCTION_CACHE[door_open] = graph
+    return graph
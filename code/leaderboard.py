@@ -0,0 +1,147 @@
+# leaderboard.py
+"""
+排行榜 (Leaderboard) 儲存服務。
+
+原本 settings.py 在 import 時讀 high_score.txt，遊戲結束時在 Game.update 裡
+直接覆寫檔案 (寫到一半當掉檔案就壞了，錯誤也被 except: pass 吃掉)。
+這裡改成:
+- SQLite (WAL 模式) 的 scores 表: 分數、關卡、演算法、時間，每筆一列
+- 寫入由 BatchWriter 的背景執行緒處理，一批資料放在同一個交易裡 (大量模擬也只要幾次 commit)
+- 記憶體中保留前幾名，遊戲迴圈讀取最高分 / 排行榜都不碰磁碟
+SQLite 的交易保證程式在寫入途中當掉時，資料庫仍是上一次 commit 的狀態。
+"""
+import os
+import sqlite3
+import sys
+import time
+from settings import *
+from batch_writer import BatchWriter
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    timestamp REAL NOT NULL
+)
+"""
+
+
+class Leaderboard:
+    """
+    屬性:
+        entries: 前 size 名 [(分數, 關卡, 演算法, 時間)]，分數由高到低
+        writer: 背景寫入執行緒 (written / dropped 統計)
+    """
+
+    def __init__(self, path=LEADERBOARD_FILE, size=LEADERBOARD_SIZE,
+                 queue_size=LEADERBOARD_QUEUE_SIZE):
+        """
+        參數:
+            path: SQLite 檔案
+            size: 記憶體中保留 (與顯示) 的名次數
+        """
+        self.path = path
+        self.size = size
+        self.entries = []
+        self._connection = None
+        self.load()
+        self.writer = BatchWriter(self._write, queue_size, "leaderboard-writer",
+                                  on_close=self._close_connection)
+
+    def load(self):
+        """
+        啟動時讀取前幾名 (只在建立時呼叫一次，不在遊戲迴圈裡)。
+        資料庫是空的而舊的 high_score.txt 存在時，把舊的最高分匯入成一筆紀錄。
+        """
+        try:
+            connection = _connect(self.path)
+            try:
+                rows = connection.execute(
+                    "SELECT score, level, algorithm, timestamp FROM scores "
+                    "ORDER BY score DESC, timestamp ASC LIMIT ?", (self.size,)).fetchall()
+                if not rows:
+                    legacy = _load_legacy_high_score()
+                    if legacy > 0:
+                        row = (legacy, 0, "LEGACY", time.time())
+                        with connection:
+                            connection.execute(
+                                "INSERT INTO scores (score, level, algorithm, timestamp) "
+                                "VALUES (?, ?, ?, ?)", row)
+                        rows = [row]
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"Error loading leaderboard: {e}", file=sys.stderr)
+            rows = []
+        self.entries = [tuple(row) for row in rows]
+
+    def best_score(self):
+        return self.entries[0][0] if self.entries else 0
+
+    def submit(self, score, level, algorithm, block=False):
+        """
+        記錄一場遊戲的結果: 立刻更新記憶體中的排行榜，寫入交給背景執行緒。
+
+        參數:
+            block: 遊戲迴圈用預設的 False (絕不等待)；
+                   大量模擬一次送出很多筆時傳 True，佇列滿了會等待而不是丟棄
+
+        回傳:
+            這場在排行榜上的名次 (從 1 開始)，沒有進榜時為 None
+        """
+        entry = (int(score), int(level), str(algorithm), time.time())
+        self.writer.put(entry, block)
+
+        rank = len(self.entries)
+        while rank > 0 and self.entries[rank - 1][0] < entry[0]:
+            rank -= 1
+        if rank >= self.size:
+            return None
+        self.entries.insert(rank, entry)
+        del self.entries[self.size:]
+        return rank + 1
+
+    def close(self):
+        """ 寫出剩下的紀錄並結束背景執行緒 (可重複呼叫) """
+        self.writer.close()
+
+    # --- 背景執行緒 ---
+
+    def _write(self, entries):
+        try:
+            if self._connection is None:
+                self._connection = _connect(self.path)
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO scores (score, level, algorithm, timestamp) "
+                    "VALUES (?, ?, ?, ?)", entries)
+        except sqlite3.Error as e:
+            # 寫入失敗不應該影響遊戲，只記在 stderr
+            print(f"Error saving leaderboard: {e}", file=sys.stderr)
+
+    def _close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _connect(path):
+    """ 開啟資料庫 (WAL 模式) 並確保資料表存在 """
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(_SCHEMA)
+    return connection
+
+
+def _load_legacy_high_score():
+    """ 舊版的 high_score.txt (檔案不存在或格式錯誤時回傳 0) """
+    if not os.path.exists(HIGH_SCORE_FILE):
+        return 0
+    try:
+        with open(HIGH_SCORE_FILE, "r") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
@@ -0,0 +1,110 @@
+# log_sink.py
+"""
+非阻塞的 Log 系統。
+
+原本 log_message 在遊戲迴圈裡直接 print()，stdout 是 pipe 而讀取端很慢時整個畫面會卡住。
+這裡把 Log 分成兩條路:
+- 畫面上的 Log 面板: 固定長度的 deque (環狀緩衝區)，新增一行是 O(1)
+- 輸出: 交給 BatchWriter 的背景執行緒，整批寫到 stdout 或會依大小輪替的檔案
+"""
+import os
+import sys
+from collections import deque
+from settings import *
+from batch_writer import BatchWriter
+
+LEVEL_NAMES = {
+    LOG_DEBUG: "DEBUG",
+    LOG_INFO: "INFO",
+    LOG_WARNING: "WARNING",
+    LOG_ERROR: "ERROR",
+}
+
+
+class LogSink:
+    """
+    屬性:
+        lines: 畫面上 Log 面板的最近幾行 [(訊息, 顏色)]
+        version: 每新增一行就加 1 (給 Log 面板判斷是否需要重畫)
+        level: 最低輸出等級
+        writer: 背景寫入執行緒 (written / dropped 統計)
+    """
+
+    def __init__(self, panel_size, level=LOG_LEVEL, path=LOG_FILE,
+                 max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                 queue_size=LOG_QUEUE_SIZE):
+        """
+        參數:
+            panel_size: Log 面板保留的行數
+            path: 輸出檔案 (None 表示 stdout)
+            max_bytes / backup_count: 檔案超過 max_bytes 時輪替，保留 backup_count 個舊檔
+        """
+        self.lines = deque(maxlen=panel_size)
+        self.version = 0
+        self.level = level
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._file = None
+        self.writer = BatchWriter(self._write, queue_size, "log-writer",
+                                  on_close=self._close_file)
+
+    def enabled(self, level):
+        """ 這個等級的訊息是否會輸出 (呼叫端可以先檢查，省下格式化字串的成本) """
+        return level >= self.level
+
+    def log(self, message, color=WHITE, level=LOG_INFO, *args):
+        """
+        新增一行訊息到 Log 面板並排入背景輸出，不會阻塞。
+
+        有 args 時 message 是 % 格式字串，通過等級檢查之後才格式化 (被略過的訊息不花格式化的成本)。
+        """
+        if level < self.level:
+            return
+        if args:
+            message = message % args
+        self.lines.append((message, color))
+        self.version += 1
+        self.writer.put((level, message))
+
+    def close(self):
+        """ 寫出剩下的訊息並結束背景執行緒 (可重複呼叫) """
+        self.writer.close()
+
+    # --- 背景執行緒 ---
+
+    def _write(self, items):
+        text = "".join(f"{LEVEL_NAMES.get(level, level)} {message}\n"
+                       for level, message in items)
+        try:
+            if self.path is None:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+                return
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(text)
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except (OSError, ValueError) as e:
+            # 輸出失敗不應該影響遊戲，只記在 stderr
+            print(f"Error writing log: {e}", file=sys.stderr)
+
+    def _rotate(self):
+        """ game.log -> game.log.1 -> game.log.2 ...，最舊的刪掉 """
+        self._close_file()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,8 +1,16 @@
 import pygame
 import math
 from settings import *  # Import all settings (colors, sizes, map)
-from player import Player
-from ghost import Ghost
+import fonts
+from simulation import Simulation
+from text_cache import TextCache
+from log_sink import LogSink
+from leaderboard import Leaderboard
+from telemetry import Telemetry
+from pellet_layer import PelletLayer
+from sprite_atlas import get_sprite_atlas
+from dirty_rects import DirtyRectTracker
+from compositor import LayeredCompositor, render_maze_background
 
 
 class Game:
@@ -10,16 +18,16 @@ class Game:
     Game 類別是遊戲的主控制器。
     負責：
     1. 初始化視窗與 Pygame。
-    2. 管理遊戲狀態 (Menu, Playing, Pause, Game Over)。
-    3. 遊戲主迴圈 (Handle Input -> Update -> Draw)。
-    4. 管理所有實體 (Player, Ghosts) 與地圖。
+    2. 管理畫面狀態 (Menu, Start, Pause)，遊戲進行中的狀態來自 Simulation。
+    3. 遊戲主迴圈 (Handle Input -> Simulation.step -> Draw)。
+    4. 繪製 Simulation 擁有的實體 (Player, Ghosts) 與地圖。
     """
 
     def __init__(self):
         """ 初始化遊戲系統與變數 """
         # Initialize Pygame
         pygame.init()
-        pygame.font.init()
+        fonts.init_fonts()
 
         # Window Setup
         self.window_width = int(SCREEN_WIDTH * 1.0)
@@ -39,59 +47,65 @@ class Game:
         # Map Surface (Just the maze)
         self.map_surface = pygame.Surface((SCREEN_WIDTH, MAP_HEIGHT))
 
+        # Pre-render every ghost / Pac-Man sprite state once
+        get_sprite_atlas().prerender([RED, PINK, CYAN, ORANGE])
+
         # Clock
         self.clock = pygame.time.Clock()
         self.running = True
         self.is_fullscreen = False
 
         # Logs System
-        self.game_logs = []
         self.MAX_LOGS = 6
+        self.logger = LogSink(self.MAX_LOGS)
+
+        # Structured telemetry (frame number + simulation time on every event)
+        self.telemetry = Telemetry()
+
+        # Fixed-timestep loop: leftover time < SIM_DT, and how far rendering
+        # is between the last two ticks (1.0 = draw the latest tick as-is)
+        self.accumulator = 0.0
+        self.render_alpha = 1.0
 
-        # Game State Variables
+        # Game State Variables (MENU / START / PAUSED, otherwise mirrors sim.state)
         self.game_state = GAME_STATE_MENU
-        self.player_lives = MAX_LIVES
-        self.current_level = 1
-        self.selected_algorithm = ALGO_ASTAR
-        self.visual_mode_current_algo = ALGO_ASTAR  # Default for visual mode
-        self.high_score = high_score  # From settings.py
-
-        # Entities
-        self.player = None
-        self.ghosts = []
-
-        # Level Specifics
-        self.game_map = []  # Will hold the mutable map
-        self.total_pellets = 0
-        self.starting_pellets = 0
-        self.frightened_mode = False
-        self.frightened_start_time = 0
-        self.level_frightened_duration = FRIGHTENED_DURATION
-
-        # Ghost Modes
-        self.global_ghost_mode = MODE_SCATTER
-        self.last_mode_switch_time = 0
-
-        # Animation
-        self.ready_animation_start_time = 0
-
-        # Bonus Fruit
-        self.fruit_active = False
-        self.fruit_spawn_time = 0
-        self.fruit_score = 100
-        self.fruit_pos = (14, 29)
-        self.fruits_spawned = 0
-        self.initial_log_shown = False
-
-        # Pre-calculated Paths (Scatter targets)
-        self.path_blinky = [(26, 1), (26, 5), (21, 5), (21, 1)]
-        self.path_pinky = [(1, 1), (1, 5), (6, 5), (6, 1)]
-        self.path_inky = [(26, 29), (26, 26), (21, 26), (21, 29)]
-        self.path_clyde = [(1, 29), (1, 26), (6, 26), (6, 29)]
+        self.leaderboard = Leaderboard()
+        self.high_score = self.leaderboard.best_score()
+
+        # Rules, entities, map and timers (headless core)
+        self.sim = self.new_simulation(ALGO_ASTAR)
+
+        # Pellet layer: background + pellets, patched per eaten tile
+        self.pellet_layer = PelletLayer()
+        self.layer_version = None
 
         # Background Cache
         self.background_surface = None
 
+        # Shared LRU text cache (stable UI strings drawn in main.py)
+        self.text_cache = TextCache()
+        # Log 面板底部的統計: 數字一直在變，不放進文字快取，依 get_panel_key 每秒重畫一次
+        self.stats_key = None
+        self.stats_surfaces = []
+
+        # Cached layout (recomputed on VIDEORESIZE / fullscreen toggle)
+        self.layout_metrics = None
+        self.layout_size = None
+        self.layout_updates = 0
+        self.scale_mode = SCALE_MODE_BLIT
+        self.scaled_surface = None
+        self.scale_allocs_saved = 0
+        self.scale_bytes_saved = 0
+
+        # Layered compositor (static layers rendered at display scale)
+        self.compositor = LayeredCompositor(self.HEADER_HEIGHT) if LAYERED_COMPOSITOR else None
+
+        # Opt-in dirty-rect renderer (only repaint regions that changed)
+        self.dirty_rects = DirtyRectTracker() if DIRTY_RECT_RENDERING else None
+        self.last_frame_key = None
+        self.hud_key = None
+        self.panel_key = None
+
         # Menu Buttons storage
         self.menu_buttons = []
 
@@ -99,25 +113,28 @@ class Game:
         self.generate_background()
         self.log_message(f"Game Loaded! Press ARROW KEYS to start...", GREEN)
 
-    def log_message(self, message, color=WHITE):
+    def log_message(self, message, color=WHITE, level=LOG_INFO, *args):
         """ 
-        新增訊息到遊戲內的 Log 系統 (顯示在視窗側邊或 console)。
+        新增訊息到遊戲內的 Log 系統 (顯示在視窗側邊，並由背景執行緒寫到 console / 檔案)。
 
         參數:
-            message: 訊息內容
+            message: 訊息內容 (有 args 時為 % 格式字串)
             color: 訊息顏色
+            level: 訊息等級 (低於 LOG_LEVEL 的訊息會被略過)
+            args: 格式化參數，通過等級檢查之後才代入
         """
+        if not self.logger.enabled(level):
+            return
+        if args:
+            message = message % args
         ticks = pygame.time.get_ticks() // 1000
-        formatted_msg = f"[{ticks}s] {message}"
-        print(formatted_msg)
-        self.game_logs.append((formatted_msg, color))
-        if len(self.game_logs) > self.MAX_LOGS:
-            self.game_logs.pop(0)
+        self.logger.log(f"[{ticks}s] {message}", color, level)
 
     def get_layout_metrics(self):
         """ 
-        計算遊戲畫面的佈局指標 (Scale, Offset)。
+        取得遊戲畫面的佈局指標 (Scale, Offset)。
         用於保持長寬比並置中顯示 (Letterboxing)。
+        結果會快取起來，只有在 VIDEORESIZE / 切換全螢幕 (或視窗大小改變) 時才重新計算。
 
         回傳:
             scale: 縮放比例
@@ -125,6 +142,16 @@ class Game:
             target_w, target_h: 實際遊戲畫面大小
             is_wide: 是否為寬螢幕模式 (如果是，會顯示 Log 面板)
         """
+        if self.layout_metrics is None or self.layout_size != self.display_surface.get_size():
+            self.update_layout()
+        return self.layout_metrics
+
+    def invalidate_layout(self):
+        """ 視窗大小改變: 下一次取得佈局時重新計算 """
+        self.layout_metrics = None
+
+    def update_layout(self):
+        """ 重新計算佈局，並預先配置縮放用的目標 surface """
         display_w, display_h = self.display_surface.get_size()
 
         # Decide if we are in "Wide Mode" (Sidebar for logs)
@@ -145,14 +172,54 @@ class Game:
         scale_h = available_h / self.game_content_height
         scale = min(scale_w, scale_h)
 
+        # Snap to an integer multiple when it is close enough (crisp and fast)
+        if scale >= 1 and scale - int(scale) <= INTEGER_SCALE_SNAP:
+            scale = int(scale)
+
         target_w = int(SCREEN_WIDTH * scale)
         target_h = int(self.game_content_height * scale)
 
         # Center in the available area
-        offset_x = (available_w - target_w) // 2
-        offset_y = (available_h - target_h) // 2
+        offset_x = int(available_w - target_w) // 2
+        offset_y = int(available_h - target_h) // 2
 
-        return scale, offset_x, offset_y, target_w, target_h, is_wide
+        if scale == 1:
+            self.scale_mode = SCALE_MODE_BLIT
+        elif scale == int(scale):
+            self.scale_mode = SCALE_MODE_INTEGER
+        else:
+            self.scale_mode = SCALE_MODE_FRACTIONAL
+
+        # Preallocated destination (same pixel format as the content surface)
+        if self.scale_mode == SCALE_MODE_BLIT:
+            self.scaled_surface = None
+        else:
+            self.scaled_surface = pygame.Surface(
+                (target_w, target_h), 0, self.game_content_surface)
+
+        self.layout_size = (display_w, display_h)
+        self.layout_metrics = (scale, offset_x, offset_y, target_w, target_h, is_wide)
+        self.layout_updates += 1
+
+    def blit_scaled_content(self):
+        """
+        把 game_content_surface 縮放後畫到螢幕上。
+        1 倍直接 blit，其他倍率縮放進預先配置好的 surface，不會每幀配置新的 surface。
+        (整數倍用最近鄰縮放: 實測比 scale2x 快，線條也一樣銳利)
+        """
+        scale, offset_x, offset_y, target_w, target_h, _ = self.get_layout_metrics()
+        content = self.game_content_surface
+
+        if self.scale_mode == SCALE_MODE_BLIT:
+            self.display_surface.blit(content, (offset_x, offset_y))
+        else:
+            pygame.transform.scale(
+                content, (target_w, target_h), self.scaled_surface)
+            self.display_surface.blit(self.scaled_surface, (offset_x, offset_y))
+
+        # pygame.transform.scale(...) used to allocate a new surface every frame
+        self.scale_allocs_saved += 1
+        self.scale_bytes_saved += target_w * target_h * content.get_bytesize()
 
     def generate_background(self):
         """ 
@@ -160,131 +227,43 @@ class Game:
         繪製藍色的線條連接相鄰的牆壁磚塊，形成迷宮。
         """
         # Matches Map Size only
-        self.background_surface = pygame.Surface((SCREEN_WIDTH, MAP_HEIGHT))
-        self.background_surface.fill(BLACK)
-
-        # Wall color and thickness
-        wall_color = BLUE
-        line_width = 4
-
-        # Helper to check if a tile is a wall
-        rows = len(MAP_STRINGS)
-        cols = len(MAP_STRINGS[0])
-
-        def is_wall_tile(x, y):
-            if 0 <= y < rows and 0 <= x < cols:
-                return MAP_STRINGS[y][x] == TILE_WALL
-            return False
-
-        for y, row in enumerate(MAP_STRINGS):
-            for x, char in enumerate(row):
-                if char == TILE_WALL:
-                    # Center of the current tile
-                    cx = x * TILE_SIZE + TILE_SIZE // 2
-                    cy = y * TILE_SIZE + TILE_SIZE // 2
-
-                    # Check neighbors and draw connections
-                    # UP
-                    if is_wall_tile(x, y - 1):
-                        pygame.draw.line(
-                            self.background_surface, wall_color, (cx, cy), (cx, cy - TILE_SIZE//2), line_width)
-                    # DOWN
-                    if is_wall_tile(x, y + 1):
-                        pygame.draw.line(
-                            self.background_surface, wall_color, (cx, cy), (cx, cy + TILE_SIZE//2), line_width)
-                    # LEFT
-                    if is_wall_tile(x - 1, y):
-                        pygame.draw.line(
-                            self.background_surface, wall_color, (cx, cy), (cx - TILE_SIZE//2, cy), line_width)
-                    # RIGHT
-                    if is_wall_tile(x + 1, y):
-                        pygame.draw.line(
-                            self.background_surface, wall_color, (cx, cy), (cx + TILE_SIZE//2, cy), line_width)
-
-                elif char == TILE_DOOR:
-                    rect_x = x * TILE_SIZE
-                    rect_y = y * TILE_SIZE
-                    pygame.draw.line(self.background_surface, PINK, (rect_x, rect_y + TILE_SIZE//2),
-                                     (rect_x + TILE_SIZE, rect_y + TILE_SIZE//2), 2)
-
-    def init_level(self, new_level=False):
-        """ 
-        初始化關卡狀態。
+        self.background_surface = render_maze_background()
 
-        參數:
-            new_level: 是否為新的一關 (重置地圖豆子)。
-                       如果為 False，通常只是玩家死亡後重置位置 (豆子保留)。
+    def new_simulation(self, algorithm):
+        """ 建立新的一場 Simulation (Log 與遙測接到 Game 的 LogSink / Telemetry) """
+        self.telemetry.start_run()
+        return Simulation(algorithm, on_log=self.log_message, telemetry=self.telemetry)
+
+    def start_new_game(self, algorithm):
+        """ 選好演算法: 建立新的 Simulation 並初始化第一關 (START 畫面) """
+        self.sim = self.new_simulation(algorithm)
+        self.sim.init_level(new_level=True)
+        self.sync_layers()
+        self.game_state = GAME_STATE_START
+
+    def sync_layers(self):
+        """
+        把 Simulation 的地圖變化同步到豆子圖層:
+        新的一關整張重畫，否則只蓋回被吃掉的格子。
         """
-        # Reset Map
-        if new_level:
-            # Deep copy from settings.MAP_STRINGS
-            self.game_map = [list(row) for row in MAP_STRINGS]
+        sim = self.sim
+        if sim.map_version != self.layer_version:
+            self.layer_version = sim.map_version
+            sim.take_eaten_tiles()
             self.generate_background()
-            self.log_message(
-                f"--- Level {self.current_level} Started ---", YELLOW)
-
-        # Difficulty
-        speed_bonus = (self.current_level - 1) * 0.1
-        level_speed = min(SPEED + speed_bonus, 5.0)
-
-        duration_reduction = (self.current_level - 1) * 500
-        self.level_frightened_duration = max(
-            FRIGHTENED_DURATION - duration_reduction, 2000)
-
-        if new_level:
-            self.log_message(
-                f"Difficulty Up! Speed: {level_speed:.1f}, Fright: {self.level_frightened_duration/1000}s", CYAN)
-            self.total_pellets = sum(row.count(TILE_PELLET)
-                                     for row in self.game_map)
-            self.starting_pellets = self.total_pellets
-            self.fruits_spawned = 0
-            self.fruit_active = False
-            self.initial_log_shown = False
-            self.log_message(f"Total pellets: {self.total_pellets}", WHITE)
-
-        old_score = 0
-        old_lives = MAX_LIVES
-
-        if self.player:
-            old_score = self.player.score
-            old_lives = self.player.lives
-
-        self.player = Player(14, 23, speed=level_speed)
-        self.player.score = old_score
-        self.player.lives = old_lives
-
-        # Determine Ghost Algorithm
-        ghost_algo = self.selected_algorithm
-        if self.selected_algorithm == ALGO_VISUAL:
-            ghost_algo = self.visual_mode_current_algo
-
-        # Reset Ghosts
-        blinky = Ghost(13, 14, RED, ai_mode=AI_CHASE_BLINKY,
-                       scatter_point=self.path_blinky, in_house=True, delay=0,
-                       on_log=self.log_message, algorithm=ghost_algo, speed=level_speed)
-        pinky = Ghost(14, 14, PINK, ai_mode=AI_CHASE_PINKY,
-                      scatter_point=self.path_pinky, in_house=True, delay=3000,
-                      on_log=self.log_message, algorithm=ghost_algo, speed=level_speed)
-        inky = Ghost(12, 14, CYAN, ai_mode=AI_CHASE_INKY, scatter_point=self.path_inky,
-                     in_house=True, delay=6000,
-                     on_log=self.log_message, algorithm=ghost_algo, speed=level_speed)
-        clyde = Ghost(15, 14, ORANGE, ai_mode=AI_CHASE_CLYDE,
-                      scatter_point=self.path_clyde, in_house=True, delay=9000,
-                      on_log=self.log_message, algorithm=ghost_algo, speed=level_speed)
-
-        self.ghosts = [blinky, pinky, inky, clyde]
-
-        # Reset modes
-        self.frightened_mode = False
-        self.global_ghost_mode = MODE_SCATTER
-        self.last_mode_switch_time = pygame.time.get_ticks()
+            self.pellet_layer.rebuild(self.background_surface, sim.game_map)
+            if self.compositor is not None:
+                self.compositor.invalidate()
+            return
+        for x, y in sim.take_eaten_tiles():
+            self.pellet_layer.erase(x, y)
+            if self.compositor is not None:
+                self.compositor.erase(x, y)
 
     def reset_game(self):
         """ 重置整個遊戲回到主選單 """
-        self.player_lives = MAX_LIVES
-        self.current_level = 1
         self.game_state = GAME_STATE_MENU
-        self.player = None
+        self.sim = self.new_simulation(self.sim.selected_algorithm)
         self.log_message("Game Reset to Menu", YELLOW)
 
     def handle_input(self):
@@ -296,8 +275,12 @@ class Game:
             if event.type == pygame.QUIT:
                 self.running = False
 
+            if event.type == pygame.VIDEORESIZE:
+                self.invalidate_layout()
+
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_F11:
+                    self.invalidate_layout()
                     self.is_fullscreen = not self.is_fullscreen
                     if self.is_fullscreen:
                         self.display_surface = pygame.display.set_mode(
@@ -324,33 +307,25 @@ class Game:
 
                             for rect, algo in self.menu_buttons:
                                 if rect.collidepoint(game_x, game_y):
-                                    self.selected_algorithm = algo
-                                    self.game_state = GAME_STATE_START
-                                    self.init_level(new_level=True)
+                                    self.start_new_game(algo)
 
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_1:
-                        self.selected_algorithm = ALGO_GREEDY
-                        self.game_state = GAME_STATE_START
-                        self.init_level(new_level=True)
+                        self.start_new_game(ALGO_GREEDY)
                     elif event.key == pygame.K_2:
-                        self.selected_algorithm = ALGO_BFS
-                        self.game_state = GAME_STATE_START
-                        self.init_level(new_level=True)
+                        self.start_new_game(ALGO_BFS)
                     elif event.key == pygame.K_3:
-                        self.selected_algorithm = ALGO_ASTAR
-                        self.game_state = GAME_STATE_START
-                        self.init_level(new_level=True)
+                        self.start_new_game(ALGO_ASTAR)
 
             elif self.game_state == GAME_STATE_START:
                 if event.type == pygame.KEYDOWN:
                     # Allow Arrow keys, Enter, or Space to start
                     if event.key in [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_RETURN, pygame.K_SPACE]:
-                        self.game_state = GAME_STATE_READY
-                        self.ready_animation_start_time = pygame.time.get_ticks()
+                        self.sim.start()
+                        self.game_state = self.sim.state
                         self.log_message("Starting Game Sequence...", YELLOW)
-                        if self.player:
-                            self.player.handle_input(event)
+                        if self.sim.player:
+                            self.sim.player.handle_input(event)
 
             elif self.game_state == GAME_STATE_PAUSED:
                 if event.type == pygame.KEYDOWN:
@@ -364,15 +339,15 @@ class Game:
                         self.reset_game()
 
             elif self.game_state == GAME_STATE_PLAYING:
-                if self.player:
-                    self.player.handle_input(event)
+                if self.sim.player:
+                    self.sim.player.handle_input(event)
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_p or event.key == pygame.K_ESCAPE:
                         self.game_state = GAME_STATE_PAUSED
                         self.log_message("Game Paused", YELLOW)
 
                     # Algorithm Visual Mode Switching
-                    if self.selected_algorithm == ALGO_VISUAL:
+                    if self.sim.selected_algorithm == ALGO_VISUAL:
                         new_algo = None
                         if event.key == pygame.K_1:
                             new_algo = ALGO_GREEDY
@@ -383,240 +358,166 @@ class Game:
                         elif event.key == pygame.K_3:
                             new_algo = ALGO_ASTAR
                             self.log_message("Switched to A*", PINK)
+                        elif event.key == pygame.K_4:
+                            new_algo = ALGO_DIJKSTRA
+                            self.log_message("Switched to DIJKSTRA", WHITE)
+                        elif event.key == pygame.K_5:
+                            new_algo = ALGO_BIBFS
+                            self.log_message("Switched to BIBFS", CYAN)
+                        elif event.key == pygame.K_6:
+                            new_algo = ALGO_JPS
+                            self.log_message("Switched to JPS", GREEN)
 
                         if new_algo:
-                            self.visual_mode_current_algo = new_algo
-                            for ghost in self.ghosts:
-                                ghost.algorithm = new_algo
+                            self.sim.set_ghost_algorithm(new_algo)
 
             elif self.game_state in [GAME_STATE_GAME_OVER, GAME_STATE_WIN]:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
                         self.reset_game()
 
+    def record_result(self):
+        """ 遊戲結束 (Game Over / 勝利): 把成績送進排行榜 (寫入在背景執行緒) """
+        sim = self.sim
+        rank = self.leaderboard.submit(
+            sim.player.score, sim.current_level, sim.selected_algorithm)
+        if rank is not None:
+            self.log_message(f"Leaderboard: #{rank} ({int(sim.player.score)})", YELLOW)
+
+    def advance(self, frame_ms):
+        """
+        固定時間步長: 累加這一幀經過的時間，每滿 SIM_DT 就跑一次 update(SIM_DT)。
+        剩下不足一個 tick 的時間換成 render_alpha，繪圖時在最近兩個 tick 的位置之間內插。
+        (畫面更新率比模擬快時畫面更平滑；比模擬慢時一幀跑多個 tick，遊戲速度不變)
+        選單、暫停與結束畫面時模擬停住: 不累加時間，render_alpha 固定為 1.0 (畫在最後一個 tick 的位置)，
+        否則畫面會在最後兩個 tick 的位置之間來回抖動。
+
+        參數:
+            frame_ms: 距離上一幀的時間 (毫秒)，超過 MAX_FRAME_TIME 的部分會被捨棄
+
+        回傳:
+            這一幀跑了幾個模擬 tick
+        """
+        if not self.is_simulating():
+            self.accumulator = 0.0
+            self.render_alpha = 1.0
+            return 0
+        self.accumulator += min(frame_ms, MAX_FRAME_TIME)
+        ticks = 0
+        while self.accumulator >= SIM_DT:
+            self.update(SIM_DT)
+            self.accumulator -= SIM_DT
+            ticks += 1
+        # 每秒的幀統計量的是畫面 (每個 tick 都是固定的 SIM_DT，記了也沒有意義)
+        sim = self.sim
+        self.telemetry.record_frame(sim.frame, int(sim.now()), frame_ms, state=self.game_state,
+                                    render_fps=round(self.clock.get_fps(), 1))
+        self.render_alpha = self.accumulator / SIM_DT if self.is_simulating() else 1.0
+        return ticks
+
+    def is_simulating(self):
+        """ 目前的畫面是否讓 Simulation 前進 (READY / PLAYING / DEATH) """
+        return self.game_state in (GAME_STATE_READY, GAME_STATE_PLAYING, GAME_STATE_DEATH)
+
     def update(self, dt):
         """
-        遊戲主邏輯更新。
-        包含: 鬼魂行為、玩家移動、碰撞偵測、水果生成、勝利判定等。
+        每個模擬 tick 呼叫一次。
+        遊戲進行中 (READY / PLAYING / DEATH) 時讓 Simulation 前進一個 tick，
+        再把結果同步到畫面 (豆子圖層、最高分、排行榜)；選單、暫停與結束畫面時模擬停住。
         """
-        current_time = pygame.time.get_ticks()
-
-        # Ready Animation Logic (Moved from draw)
-        if self.game_state == GAME_STATE_READY:
-            elapsed = current_time - self.ready_animation_start_time
-            if elapsed > 3000:
-                self.game_state = GAME_STATE_PLAYING
-                self.last_mode_switch_time = current_time
-                self.log_message(
-                    f"Level {self.current_level} Start! Algo: {self.selected_algorithm}", YELLOW)
-
-        # Death Animation
-        elif self.game_state == GAME_STATE_DEATH:
-            anim_done = self.player.update_death_anim()
-            if anim_done:
-                self.player.lives -= 1
-                self.player_lives = self.player.lives  # Sync for HUD
-                if self.player.lives > 0:
-                    self.log_message(
-                        f"Lives: {self.player.lives}, Resetting...", YELLOW)
-                    self.init_level(new_level=False)
-                    self.game_state = GAME_STATE_READY
-                    self.ready_animation_start_time = pygame.time.get_ticks()
-                else:
-                    self.game_state = GAME_STATE_GAME_OVER
-                    self.log_message("Game Over.", RED)
-                    save_high_score(self.high_score)
-
-        elif self.game_state == GAME_STATE_PLAYING:
-            if not self.frightened_mode:
-                time_passed = current_time - self.last_mode_switch_time
-
-                # Check initial log
-                if not self.initial_log_shown and time_passed > 100:
-                    self.log_message(
-                        f">> Init Mode: {self.global_ghost_mode}", YELLOW)
-                    self.initial_log_shown = True
-
-                # Mode Switching
-                if self.global_ghost_mode == MODE_SCATTER and time_passed > SCATTER_DURATION:
-                    self.global_ghost_mode = MODE_CHASE
-                    self.last_mode_switch_time = current_time
-                    self.log_message(">> Mode Switch: CHASE", RED)
-                elif self.global_ghost_mode == MODE_CHASE and time_passed > CHASE_DURATION:
-                    self.global_ghost_mode = MODE_SCATTER
-                    self.last_mode_switch_time = current_time
-                    self.log_message(">> Mode Switch: SCATTER", GREEN)
-
-            # Update Ghosts
-            blinky_pos_for_inky = (
-                self.ghosts[0].grid_x, self.ghosts[0].grid_y)
-            for ghost in self.ghosts:
-                if (not ghost.is_frightened and not ghost.is_eaten and
-                        ghost.current_ai_mode not in [MODE_GO_HOME, MODE_EXIT_HOUSE, MODE_WAITING]):
-                    if self.global_ghost_mode == MODE_SCATTER:
-                        ghost.current_ai_mode = MODE_SCATTER
-                    elif self.global_ghost_mode == MODE_CHASE:
-                        ghost.current_ai_mode = ghost.ai_mode
-
-                ghost.update(self.game_map, self.player, dt,
-                             self.global_ghost_mode, blinky_pos_for_inky)
-
-            # Update Frightened Timer
-            if self.frightened_mode:
-                if current_time - self.frightened_start_time > self.level_frightened_duration:
-                    self.frightened_mode = False
-                    self.log_message(
-                        "Frightened mode ended. Ghosts normal.", WHITE)
-                    for ghost in self.ghosts:
-                        ghost.end_frightened()
-                    self.last_mode_switch_time = current_time
-
-            # Update Player
-            player_event = self.player.update(self.game_map, dt)
-
-            # Logic for Player Events
-            if player_event:
-                px, py = self.player.get_grid_pos()
-
-                # Double check to prevent multiple triggers for same tile
-                if self.game_map[py][px] in [TILE_PELLET, TILE_POWER_PELLET]:
-
-                    if player_event == EVENT_ATE_PELLET:
-                        self.game_map[py][px] = TILE_EMPTY
-                        self.total_pellets -= 1
-                        self.player.score += PELLELETS_POINT
-                        if self.player.score > self.high_score:
-                            self.high_score = self.player.score
-
-                    elif player_event == EVENT_ATE_POWER_PELLET:
-                        self.game_map[py][px] = TILE_EMPTY
-                        self.player.score += POWER_PELLET_POINT
-                        if self.player.score > self.high_score:
-                            self.high_score = self.player.score
-                        self.frightened_mode = True
-                        self.frightened_start_time = pygame.time.get_ticks()
-                        self.log_message(
-                            "Power Pellet eaten! Ghosts Frightened!", CYAN)
-                        for ghost in self.ghosts:
-                            ghost.start_frightened()
-
-                # Bonus Fruit Logic
-                pellets_eaten = self.starting_pellets - self.total_pellets
-                if not self.fruit_active and self.fruits_spawned < 2:
-                    should_spawn = False
-                    if self.fruits_spawned == 0 and pellets_eaten >= 70:
-                        should_spawn = True
-                    elif self.fruits_spawned == 1 and pellets_eaten >= 170:
-                        should_spawn = True
-
-                    if should_spawn:
-                        self.fruit_active = True
-                        self.fruit_spawn_time = pygame.time.get_ticks()
-                        self.fruits_spawned += 1
-                        self.fruit_score = 100 * self.current_level
-                        self.log_message(
-                            f"Bonus Fruit Appeared! ({self.fruit_score} pts)", PINK)
-
-            # Fruit Timer & Collision
-            if self.fruit_active:
-                if current_time - self.fruit_spawn_time > 10000:
-                    self.fruit_active = False
-                    self.log_message("Fruit disappeared...", GREY)
-                else:
-                    fx, fy = self.fruit_pos[0] * TILE_SIZE + \
-                        TILE_SIZE//2, self.fruit_pos[1] * \
-                        TILE_SIZE + TILE_SIZE//2
-                    dist = math.hypot(self.player.pixel_x -
-                                      fx, self.player.pixel_y - fy)
-                    if dist < self.player.radius + 15:
-                        self.fruit_active = False
-                        self.player.score += self.fruit_score
-                        if self.player.score > self.high_score:
-                            self.high_score = self.player.score
-                        self.log_message(
-                            f"Yummy! Bonus Fruit: {self.fruit_score}", PINK)
-
-            # Victory Check
-            if self.total_pellets <= 0:
-                self.game_state = GAME_STATE_WIN
-                self.log_message("VICTORY! All pellets cleared!", GREEN)
-                save_high_score(self.high_score)
-
-            # Collision Detection
-            for ghost in self.ghosts:
-                dx = self.player.pixel_x - ghost.pixel_x
-                dy = self.player.pixel_y - ghost.pixel_y
-                distance = math.hypot(dx, dy)
-                collision_distance = self.player.radius + ghost.radius
-
-                if distance < collision_distance:
-                    if ghost.is_frightened:
-                        ghost.eat()
-                        self.player.score += GHOST_POINT
-                        if self.player.score > self.high_score:
-                            self.high_score = self.player.score
-                    elif not ghost.is_eaten:
-                        self.log_message("Ghost collision!", RED)
-                        self.game_state = GAME_STATE_DEATH
-                        self.player.start_death_anim()
-
-    def draw_map_entities(self):
-        """ 繪製地圖層的所有物件 (背景、豆子、水果、玩家、鬼魂) """
-        # Clear map surface
-        self.map_surface.fill(BLACK)
-
-        # 1. Background (Walls)
-        if self.background_surface:
-            self.map_surface.blit(self.background_surface, (0, 0))
-
-        # 2. Pellets (Dynamic)
-        for y, row in enumerate(self.game_map):
-            for x, char in enumerate(row):
-                rect_x = x * TILE_SIZE
-                rect_y = y * TILE_SIZE
-                if char == TILE_PELLET:
-                    pygame.draw.circle(self.map_surface, WHITE,
-                                       (rect_x + TILE_SIZE//2, rect_y + TILE_SIZE//2), 2)
-                elif char == TILE_POWER_PELLET:
-                    pygame.draw.circle(self.map_surface, WHITE,
-                                       (rect_x + TILE_SIZE//2, rect_y + TILE_SIZE//2), 6)
-
-        # 3. Fruit
-        if self.fruit_active:
-            fx = self.fruit_pos[0] * TILE_SIZE + 10
-            fy = self.fruit_pos[1] * TILE_SIZE + 10
-            pygame.draw.circle(self.map_surface,
-                               RED, (fx - 4, fy + 2), 5)
-            pygame.draw.circle(self.map_surface,
-                               RED, (fx + 4, fy + 6), 5)
-            pygame.draw.line(self.map_surface, GREEN,
-                             (fx - 4, fy + 2), (fx, fy - 6), 2)
-            pygame.draw.line(self.map_surface, GREEN,
-                             (fx + 4, fy + 6), (fx, fy - 6), 2)
-
-            elapsed = pygame.time.get_ticks() - self.fruit_spawn_time
-            remaining_sec = max(0, 10 - elapsed // 1000)
-            timer_text = LOG_FONT.render(f"{remaining_sec}s", True, WHITE)
-            self.map_surface.blit(timer_text, (fx - 10, fy - 25))
-
-        # 4. Entities (Player, Ghosts)
-        if self.game_state != GAME_STATE_DEATH:
-            if self.player:
-                self.player.draw(self.map_surface)
+        if not self.is_simulating():
+            return
+        sim = self.sim
+        sim.step(None, dt)
+        self.game_state = sim.state
+        self.sync_layers()
+
+        if sim.player.score > self.high_score:
+            self.high_score = sim.player.score
+        if sim.is_over():
+            self.record_result()
+
+    def draw_map_entities(self, partial=False):
+        """
+        繪製地圖層的所有物件 (背景、豆子、水果、玩家、鬼魂)。
+
+        參數:
+            partial: 髒矩形模式，只用圖層蓋回上一幀畫過的區域，而不是整張重畫
+        """
+        tracker = self.dirty_rects
+        ticks = pygame.time.get_ticks()
+
+        # 1 + 2. Background (Walls) and Pellets, pre-rendered in one layer
+        if partial:
+            # Erase last frame's sprites and repaint changed pellet tiles
+            for rect in self.pellet_layer.take_changes(ticks):
+                tracker.mark(rect)
+                self.pellet_layer.restore(self.map_surface, rect)
+            for rect in tracker.previous_rects():
+                self.pellet_layer.restore(self.map_surface, rect)
+        elif self.background_surface:
+            self.pellet_layer.draw(self.map_surface, ticks)
+        else:
+            self.map_surface.fill(BLACK)
+
+        # 3 + 4. Fruit, Player, Ghosts (one atlas blit each)
+        atlas = get_sprite_atlas()
+        drawn = {}
+        for key, sprite, x, y in self.get_map_sprites(atlas):
+            rect = self.map_surface.blit(
+                sprite, (int(x) - atlas.center, int(y) - atlas.center))
+            if key == "fruit":
+                _, timer_text, pos = self.get_fruit_timer()
+                rect.union_ip(self.map_surface.blit(timer_text, pos))
+            drawn[key] = rect
+
+        if tracker is not None:
+            for key, rect in drawn.items():
+                tracker.track(key, rect)
+
+    def get_map_sprites(self, atlas):
+        """
+        目前要畫在地圖上的角色 (依繪製順序)。
+
+        回傳:
+            [(key, 圖, 中心 x, 中心 y)]，座標為地圖上的像素 (內部解析度，角色為內插後的浮點數)
+        """
+        sprites = []
+        if self.sim.fruit_active:
+            sprites.append(("fruit", atlas.fruit(),
+                            self.sim.fruit_pos[0] * TILE_SIZE + TILE_SIZE // 2,
+                            self.sim.fruit_pos[1] * TILE_SIZE + TILE_SIZE // 2))
+
+        if self.sim.player:
+            sprite = self.sim.player.get_sprite(atlas)
+            if sprite is not None:
+                x, y = self.sim.player.render_pos(self.render_alpha)
+                sprites.append(("player", sprite, x, y))
 
         if self.game_state != GAME_STATE_DEATH:
             flash_white = False
-            if self.frightened_mode:
-                elapsed = pygame.time.get_ticks() - self.frightened_start_time
-                remaining = self.level_frightened_duration - elapsed
+            if self.sim.frightened_mode:
+                sim_time = self.sim.now()
+                elapsed = sim_time - self.sim.frightened_start_time
+                remaining = self.sim.level_frightened_duration - elapsed
                 if remaining < 2000:
-                    flash_white = (pygame.time.get_ticks() // 200) % 2 == 0
-
-            for ghost in self.ghosts:
-                ghost.draw(self.map_surface, flash_white=flash_white)
-        elif self.game_state == GAME_STATE_DEATH:
-            if self.player:
-                self.player.draw(self.map_surface)
+                    flash_white = (sim_time // 200) % 2 == 0
+
+            for i, ghost in enumerate(self.sim.ghosts):
+                x, y = ghost.render_pos(self.render_alpha)
+                sprites.append((("ghost", i), ghost.get_sprite(flash_white, atlas), x, y))
+        return sprites
+
+    def get_fruit_timer(self):
+        """ 水果上方的倒數文字: (剩餘秒數, 文字 surface, 左上角地圖座標)，沒有水果時為 None """
+        if not self.sim.fruit_active:
+            return None
+        fx = self.sim.fruit_pos[0] * TILE_SIZE + 10
+        fy = self.sim.fruit_pos[1] * TILE_SIZE + 10
+        elapsed = self.sim.now() - self.sim.fruit_spawn_time
+        remaining_sec = max(0, 10 - int(elapsed // 1000))
+        timer_text = self.text_cache.render(fonts.LOG_FONT, f"{remaining_sec}s", True, WHITE)
+        return remaining_sec, timer_text, (fx - 10, fy - 25)
 
     def draw_hud(self):
         """ Draw HUD (Score, Lives) in the header area of game_content_surface """
@@ -627,39 +528,39 @@ class Game:
         cy = self.HEADER_HEIGHT // 2
 
         # Score
-        score_text = SCORE_FONT.render(
-            f"SCORE: {int(self.player.score if self.player else 0)}", True, WHITE)
+        score_text = self.text_cache.render(
+            fonts.SCORE_FONT, f"SCORE: {int(self.sim.player.score if self.sim.player else 0)}", True, WHITE)
         score_rect = score_text.get_rect(midleft=(10, cy))
         self.game_content_surface.blit(score_text, score_rect)
 
         # High Score or Visual Mode Algo
         center_text = f"HIGH: {int(self.high_score)}"
         center_color = YELLOW
-        if self.selected_algorithm == ALGO_VISUAL:
-            center_text = f"MODE: VISUAL ({self.visual_mode_current_algo})"
+        if self.sim.selected_algorithm == ALGO_VISUAL:
+            center_text = f"MODE: VISUAL ({self.sim.visual_mode_current_algo})"
             center_color = GREEN
 
-        hs_text = SCORE_FONT.render(center_text, True, center_color)
+        hs_text = self.text_cache.render(fonts.SCORE_FONT, center_text, True, center_color)
         hs_rect = hs_text.get_rect(center=(SCREEN_WIDTH // 2, cy))
         self.game_content_surface.blit(hs_text, hs_rect)
 
         # Lives
-        lives_label = SCORE_FONT.render("LIVES:", True, WHITE)
+        lives_label = self.text_cache.render(fonts.SCORE_FONT, "LIVES:", True, WHITE)
         lives_rect = lives_label.get_rect(midright=(SCREEN_WIDTH - 100, cy))
         self.game_content_surface.blit(lives_label, lives_rect)
 
         start_x = SCREEN_WIDTH - 90
-        for i in range(self.player_lives):
+        for i in range(self.sim.player_lives):
             pygame.draw.circle(self.game_content_surface,
                                YELLOW, (start_x + i * 25, cy), 8)
 
     def draw_menu_ui(self, surface):
         # Menu is drawn on full content surface
-        title_surf = WIN_FONT.render("PAC-MAN", True, YELLOW)
+        title_surf = self.text_cache.render(fonts.WIN_FONT, "PAC-MAN", True, YELLOW)
         surface.blit(title_surf, (SCREEN_WIDTH // 2 -
                      title_surf.get_width() // 2, 100))
 
-        subtitle = SCORE_FONT.render("Select Algorithm to Start:", True, WHITE)
+        subtitle = self.text_cache.render(fonts.SCORE_FONT, "Select Algorithm to Start:", True, WHITE)
         surface.blit(subtitle, (SCREEN_WIDTH // 2 -
                      subtitle.get_width() // 2, 180))
 
@@ -676,11 +577,80 @@ class Game:
         for label, algo, y, color in buttons:
             rect = pygame.Rect(center_x, y, btn_w, btn_h)
             pygame.draw.rect(surface, color, rect, 2)
-            text = SCORE_FONT.render(label, True, color)
+            text = self.text_cache.render(fonts.SCORE_FONT, label, True, color)
             surface.blit(text, (rect.centerx - text.get_width() //
                          2, rect.centery - text.get_height() // 2))
             self.menu_buttons.append((rect, algo))
 
+        # Leaderboard (top 5, kept in memory by Leaderboard)
+        if self.leaderboard.entries:
+            top_title = self.text_cache.render(fonts.SCORE_FONT, "TOP SCORES", True, YELLOW)
+            surface.blit(top_title, (SCREEN_WIDTH // 2 -
+                         top_title.get_width() // 2, 550))
+            for i, (score, level, algo, _) in enumerate(self.leaderboard.entries[:5]):
+                line = self.text_cache.render(
+                    fonts.LOG_FONT, f"{i + 1}. {score:>6}  L{level}  {algo}", True, WHITE)
+                surface.blit(line, (SCREEN_WIDTH // 2 - line.get_width() // 2,
+                                    580 + i * 22))
+
+    def get_visual_paths(self):
+        """
+        VISUAL 模式: 每隻鬼目前的完整路徑。
+
+        回傳:
+            [(鬼魂編號, 顏色, 路徑上每格中心的地圖像素座標)]
+        """
+        paths = []
+        if not self.sim.player:
+            return paths
+
+        for i, ghost in enumerate(self.sim.ghosts):
+            # Skip if ghost is inactive/dead
+            if ghost.is_eaten or ghost.current_ai_mode in [MODE_GO_HOME, MODE_EXIT_HOUSE, MODE_WAITING]:
+                continue
+
+            # 沿用 update 最近一次決策的目標: 不能在繪圖時重新計算，
+            # 驚嚇模式的隨機目標會用掉 sim.rng，讓結果依賴畫面更新率
+            target = ghost.target
+            if target is None:
+                continue
+            start = (ghost.grid_x, ghost.grid_y)
+
+            # Get Full Path (using the ghost's own strategy)
+            path = ghost.get_path(start, target)
+
+            if len(path) > 1:
+                # Convert grid coords to pixel centers
+                points = []
+                for px, py in path:
+                    cx = px * TILE_SIZE + TILE_SIZE // 2
+                    cy = py * TILE_SIZE + TILE_SIZE // 2
+                    points.append((cx, cy))
+                paths.append((i, ghost.color, points))
+        return paths
+
+    def draw_visual_paths(self):
+        """ VISUAL 模式: 在 map_surface 上畫出每隻鬼目前的完整路徑 """
+        for i, color, points in self.get_visual_paths():
+            # Draw Line on map_surface (so it's behind HUD but on map)
+            path_rect = pygame.draw.lines(
+                self.map_surface, color, False, points, 2)
+            # Draw small target circle
+            path_rect.union_ip(pygame.draw.circle(
+                self.map_surface, color, points[-1], 4))
+            if self.dirty_rects is not None:
+                self.dirty_rects.track(("path", i), path_rect)
+
+    def get_hud_key(self):
+        """ HUD 上會變動的值 (有改變才需要重畫 HUD) """
+        score = int(self.sim.player.score if self.sim.player else 0)
+        return (score, int(self.high_score), self.sim.selected_algorithm,
+                self.sim.visual_mode_current_algo, self.sim.player_lives)
+
+    def get_panel_key(self):
+        """ Log 面板上會變動的值 (新訊息，統計數字每秒更新一次) """
+        return (self.logger.version, pygame.time.get_ticks() // 1000)
+
     def draw(self):
         """ 
         主繪圖函數。
@@ -688,7 +658,30 @@ class Game:
         2. 根據狀態繪製內容 (Menu 或 Game)。
         3. 處理畫面縮放與置中。
         4. 繪製側邊欄 (Logs)。
+
+        回傳:
+            髒矩形模式下為需要更新的螢幕區域列表，否則為 None (整個畫面 flip)
         """
+        tracker = self.dirty_rects
+        if tracker is not None:
+            # Only PLAYING / DEATH frames are incremental; overlays, menus,
+            # state changes and window resizes repaint everything
+            frame_key = (self.game_state, self.display_surface.get_size(),
+                         self.is_fullscreen, self.sim.selected_algorithm)
+            if frame_key != self.last_frame_key or \
+                    self.game_state not in (GAME_STATE_PLAYING, GAME_STATE_DEATH):
+                tracker.invalidate()
+            self.last_frame_key = frame_key
+            if not tracker.full_redraw:
+                return self.draw_dirty()
+
+        # Gameplay at a non-1x scale: draw straight at display resolution
+        self.get_layout_metrics()
+        if self.compositor is not None and tracker is None and \
+                self.scale_mode != SCALE_MODE_BLIT and \
+                self.game_state in (GAME_STATE_PLAYING, GAME_STATE_DEATH):
+            return self.draw_composited()
+
         # 1. Clear Full Content
         self.game_content_surface.fill(BLACK)
 
@@ -700,41 +693,8 @@ class Game:
             self.draw_map_entities()
 
             # --- AI VISUALIZATION DRAWING ---
-            if self.selected_algorithm == ALGO_VISUAL and self.game_state == GAME_STATE_PLAYING:
-                if self.player:
-                    blinky_tile = None
-                    if self.ghosts:
-                        blinky_tile = (
-                            self.ghosts[0].grid_x, self.ghosts[0].grid_y)
-
-                    for ghost in self.ghosts:
-                        # Skip if ghost is inactive/dead
-                        if ghost.is_eaten or ghost.current_ai_mode in [MODE_GO_HOME, MODE_EXIT_HOUSE, MODE_WAITING]:
-                            continue
-
-                        # Calculate Target (Same logic as update)
-                        target = ghost.get_target_position(
-                            self.player, blinky_tile)
-                        start = (ghost.grid_x, ghost.grid_y)
-
-                        # Get Full Path
-                        path = ghost.get_path_astar(start, target)
-
-                        # Draw Line on map_surface (so it's behind HUD but on map)
-                        if len(path) > 1:
-                            # Convert grid coords to pixel centers
-                            points = []
-                            for px, py in path:
-                                cx = px * TILE_SIZE + TILE_SIZE // 2
-                                cy = py * TILE_SIZE + TILE_SIZE // 2
-                                points.append((cx, cy))
-
-                            if len(points) >= 2:
-                                pygame.draw.lines(
-                                    self.map_surface, ghost.color, False, points, 2)
-                                # Draw small target circle
-                                pygame.draw.circle(
-                                    self.map_surface, ghost.color, points[-1], 4)
+            if self.sim.selected_algorithm == ALGO_VISUAL and self.game_state == GAME_STATE_PLAYING:
+                self.draw_visual_paths()
 
             # Blit Map to Content (shifted down by Header)
             self.game_content_surface.blit(
@@ -747,23 +707,22 @@ class Game:
             center_pos = (SCREEN_WIDTH // 2, self.game_content_height // 2)
 
             if self.game_state == GAME_STATE_START:
-                start_text = WIN_FONT.render("READY!", True, YELLOW)
-                hint_text = SCORE_FONT.render(
-                    "Press ARROW KEYS or ENTER to Start", True, WHITE)
+                start_text = self.text_cache.render(fonts.WIN_FONT, "READY!", True, YELLOW)
+                hint_text = self.text_cache.render(
+                    fonts.SCORE_FONT, "Press ARROW KEYS or ENTER to Start", True, WHITE)
                 self.game_content_surface.blit(
                     start_text, start_text.get_rect(center=center_pos))
                 self.game_content_surface.blit(hint_text, hint_text.get_rect(
                     center=(center_pos[0], center_pos[1] + 40)))
 
             elif self.game_state == GAME_STATE_READY:
-                current_ticks = pygame.time.get_ticks()
-                elapsed = current_ticks - self.ready_animation_start_time
+                elapsed = self.sim.now() - self.sim.ready_start_time
                 if elapsed < 2000:
-                    text = WIN_FONT.render("READY!", True, YELLOW)
+                    text = self.text_cache.render(fonts.WIN_FONT, "READY!", True, YELLOW)
                     self.game_content_surface.blit(
                         text, text.get_rect(center=center_pos))
                 elif elapsed < 3000:
-                    text = WIN_FONT.render("GO!", True, GREEN)
+                    text = self.text_cache.render(fonts.WIN_FONT, "GO!", True, GREEN)
                     self.game_content_surface.blit(
                         text, text.get_rect(center=center_pos))
 
@@ -774,54 +733,185 @@ class Game:
                 overlay.set_alpha(128)
                 self.game_content_surface.blit(overlay, (0, 0))
 
-                p_text = WIN_FONT.render("PAUSED", True, YELLOW)
+                p_text = self.text_cache.render(fonts.WIN_FONT, "PAUSED", True, YELLOW)
                 self.game_content_surface.blit(
                     p_text, p_text.get_rect(center=center_pos))
-                resume_text = SCORE_FONT.render(
-                    "Press P / ESC to Resume", True, WHITE)
+                resume_text = self.text_cache.render(
+                    fonts.SCORE_FONT, "Press P / ESC to Resume", True, WHITE)
                 self.game_content_surface.blit(resume_text, resume_text.get_rect(
                     center=(center_pos[0], center_pos[1] + 40)))
-                quit_text = SCORE_FONT.render(
-                    "Press Q to Quit to Menu", True, WHITE)
+                quit_text = self.text_cache.render(
+                    fonts.SCORE_FONT, "Press Q to Quit to Menu", True, WHITE)
                 self.game_content_surface.blit(quit_text, quit_text.get_rect(
                     center=(center_pos[0], center_pos[1] + 70)))
 
             elif self.game_state == GAME_STATE_GAME_OVER:
-                text = GAME_OVER_FONT.render("GAME OVER", True, RED)
+                text = self.text_cache.render(fonts.GAME_OVER_FONT, "GAME OVER", True, RED)
                 self.game_content_surface.blit(
                     text, text.get_rect(center=center_pos))
-                restart_text = SCORE_FONT.render(
-                    "Press R to Restart", True, WHITE)
+                restart_text = self.text_cache.render(
+                    fonts.SCORE_FONT, "Press R to Restart", True, WHITE)
                 self.game_content_surface.blit(restart_text, restart_text.get_rect(
                     center=(center_pos[0], center_pos[1] + 50)))
 
             elif self.game_state == GAME_STATE_WIN:
-                text = WIN_FONT.render("YOU WIN!", True, YELLOW)
+                text = self.text_cache.render(fonts.WIN_FONT, "YOU WIN!", True, YELLOW)
                 self.game_content_surface.blit(
                     text, text.get_rect(center=center_pos))
-                restart_text = SCORE_FONT.render(
-                    "Press R to Play Again", True, WHITE)
+                restart_text = self.text_cache.render(
+                    fonts.SCORE_FONT, "Press R to Play Again", True, WHITE)
                 self.game_content_surface.blit(restart_text, restart_text.get_rect(
                     center=(center_pos[0], center_pos[1] + 50)))
 
         # 3. Final Composition to Display Surface
         self.display_surface.fill(BLACK)
 
-        # Get layout metrics
-        scale, offset_x, offset_y, target_w, target_h, is_wide = self.get_layout_metrics()
-
-        # Scale and Blit Game Content
-        scaled_surf = pygame.transform.scale(
-            self.game_content_surface, (target_w, target_h))
-        self.display_surface.blit(scaled_surf, (offset_x, offset_y))
+        # Scale and Blit Game Content (cached layout, preallocated target)
+        self.blit_scaled_content()
+        is_wide = self.get_layout_metrics()[5]
 
         # 4. Logs (Sidebar)
+        display_w, display_h = self.display_surface.get_size()
         if is_wide:
-            display_w, display_h = self.display_surface.get_size()
             panel_x = int(display_w * 0.7)
             panel_w = int(display_w * 0.3)
             self.draw_logs_panel(panel_x, 0, panel_w, display_h)
 
+        if tracker is not None:
+            # This full frame becomes the baseline for the next dirty frame
+            tracker.collect()
+            tracker.full_redraw = False
+            tracker.record(display_w * display_h, display_w * display_h)
+            self.hud_key = self.get_hud_key()
+            self.panel_key = self.get_panel_key()
+        return None
+
+    def draw_composited(self):
+        """
+        分層合成的一幀: 靜態圖層與角色都直接以螢幕倍率繪製，不縮放整張畫面。
+        (只用在 PLAYING / DEATH 且縮放比例不為 1 時；選單與提示畫面仍走一般流程)
+        """
+        scale, offset_x, offset_y, _, _, is_wide = self.get_layout_metrics()
+        compositor = self.compositor
+        compositor.resize(scale, offset_x, offset_y)
+        compositor.prepare(self.sim.game_map)
+        ticks = pygame.time.get_ticks()
+        display = self.display_surface
+
+        display.fill(BLACK)
+        compositor.draw_map(display, ticks)
+
+        # Sprites and path lines are clipped to the maze, as on map_surface
+        display.set_clip(compositor.map_rect)
+        for key, sprite, x, y in self.get_map_sprites(compositor.atlas):
+            compositor.blit_sprite(display, sprite, x, y)
+            if key == "fruit":
+                remaining_sec, timer_text, (tx, ty) = self.get_fruit_timer()
+                compositor.blit_text(display, ("fruit_timer", remaining_sec), timer_text, tx, ty)
+        if self.sim.selected_algorithm == ALGO_VISUAL and self.game_state == GAME_STATE_PLAYING:
+            for _, color, points in self.get_visual_paths():
+                compositor.draw_path(display, color, points)
+        display.set_clip(None)
+
+        # HUD: re-rendered and scaled only when its values change
+        def redraw_hud():
+            self.game_content_surface.fill(
+                BLACK, (0, 0, SCREEN_WIDTH, self.HEADER_HEIGHT))
+            self.draw_hud()
+        compositor.draw_header(display, self.game_content_surface,
+                               self.get_hud_key(), redraw_hud)
+
+        # Logs (Sidebar)
+        if is_wide:
+            display_w, display_h = display.get_size()
+            self.draw_logs_panel(int(display_w * 0.7), 0, int(display_w * 0.3), display_h)
+
+        compositor.frames += 1
+        return None
+
+    def draw_dirty(self):
+        """
+        髒矩形模式的一幀: 只重畫角色、水果、路徑線、被吃掉的豆子，
+        以及有變動的 HUD / Log 面板。
+
+        回傳:
+            需要 pygame.display.update 的螢幕區域列表
+        """
+        tracker = self.dirty_rects
+
+        # Map: restore last frame's rects from the cached layer, draw sprites
+        self.draw_map_entities(partial=True)
+        if self.sim.selected_algorithm == ALGO_VISUAL and self.game_state == GAME_STATE_PLAYING:
+            self.draw_visual_paths()
+
+        map_bounds = self.map_surface.get_rect()
+        content_rects = []
+        for rect in tracker.collect():
+            rect = rect.clip(map_bounds)
+            dest = rect.move(0, self.HEADER_HEIGHT)
+            self.game_content_surface.blit(self.map_surface, dest, rect)
+            content_rects.append(dest)
+
+        # HUD: only when score / lives / mode text changed
+        hud_key = self.get_hud_key()
+        if hud_key != self.hud_key:
+            self.hud_key = hud_key
+            header = pygame.Rect(0, 0, SCREEN_WIDTH, self.HEADER_HEIGHT)
+            self.game_content_surface.fill(BLACK, header)
+            self.draw_hud()
+            content_rects.append(header)
+
+        display_rects = self.present_content_rects(content_rects)
+
+        # Logs panel: only on new log lines (stats refresh once per second)
+        _, _, _, _, _, is_wide = self.get_layout_metrics()
+        display_w, display_h = self.display_surface.get_size()
+        if is_wide:
+            panel_key = self.get_panel_key()
+            if panel_key != self.panel_key:
+                self.panel_key = panel_key
+                panel_x = int(display_w * 0.7)
+                panel_w = int(display_w * 0.3)
+                self.draw_logs_panel(panel_x, 0, panel_w, display_h)
+                display_rects.append(pygame.Rect(panel_x, 0, panel_w, display_h))
+
+        pixels = sum(rect.width * rect.height for rect in display_rects)
+        tracker.record(pixels, display_w * display_h)
+        return display_rects
+
+    def present_content_rects(self, content_rects):
+        """
+        把 game_content_surface 上的幾個區域複製到螢幕上 (依目前的縮放方式)。
+        整數倍時結果與整張縮放完全相同；非整數倍時每個區域各自縮放，邊緣可能差一個像素。
+
+        回傳:
+            對應的螢幕區域列表
+        """
+        scale, offset_x, offset_y, _, _, _ = self.get_layout_metrics()
+        content = self.game_content_surface
+        display_rects = []
+        for rect in content_rects:
+            if self.scale_mode == SCALE_MODE_BLIT:
+                dest = self.display_surface.blit(
+                    content, (rect.x + offset_x, rect.y + offset_y), rect)
+            elif self.scale_mode == SCALE_MODE_INTEGER:
+                k = int(scale)
+                region = pygame.transform.scale(
+                    content.subsurface(rect), (rect.width * k, rect.height * k))
+                dest = self.display_surface.blit(
+                    region, (offset_x + rect.x * k, offset_y + rect.y * k))
+            else:
+                # Scale just this region (one extra pixel hides rounding seams)
+                x0 = offset_x + int(rect.x * scale)
+                y0 = offset_y + int(rect.y * scale)
+                x1 = offset_x + int(math.ceil(rect.right * scale))
+                y1 = offset_y + int(math.ceil(rect.bottom * scale))
+                size = (x1 - x0 + 1, y1 - y0 + 1)
+                region = pygame.transform.scale(content.subsurface(rect), size)
+                dest = self.display_surface.blit(region, (x0, y0))
+            display_rects.append(dest)
+        return display_rects
+
     def draw_logs_panel(self, x, y, width, height):
         # Background
         rect = pygame.Rect(x, y, width, height)
@@ -834,18 +924,49 @@ class Game:
         # Logs
         log_y_start = height // 2
 
-        title = LOG_FONT.render("Game Logs:", True, GREY)
+        title = self.text_cache.render(fonts.LOG_FONT, "Game Logs:", True, GREY)
         self.display_surface.blit(title, (x + 20, log_y_start))
 
         start_y = log_y_start + 30
         line_spacing = 25
-        for i, (msg, color) in enumerate(self.game_logs):
-            text_surf = LOG_FONT.render(msg, True, color)
+        for i, (msg, color) in enumerate(self.logger.lines):
+            text_surf = self.text_cache.render(fonts.LOG_FONT, msg, True, color)
             self.display_surface.blit(
                 text_surf, (x + 20, start_y + i * line_spacing))
 
+        # 統計數字幾乎每一幀都不同: 不經過文字快取 (只會塞滿一次性的 surface)，
+        # 每秒 (或有新訊息時) 用 font.render 重畫一次
+        panel_key = self.get_panel_key()
+        if panel_key != self.stats_key:
+            self.stats_key = panel_key
+            self.stats_surfaces = [fonts.LOG_FONT.render(text, True, GREY)
+                                   for text in self.get_stats_lines()]
+        for i, surface in enumerate(self.stats_surfaces):
+            self.display_surface.blit(surface, (x + 20, height - 30 - i * 25))
+
+    def get_stats_lines(self):
+        """ Log 面板底部的統計 (由下往上: 路徑快取、文字快取、縮放、合成器、髒矩形) """
+        cache = self.sim.path_cache
+        texts = self.text_cache
+        scale = self.get_layout_metrics()[0]
+        lines = [
+            f"Path cache: {cache.hits} hit / {cache.misses} miss / {cache.evictions} evict ({cache.hit_rate():.0%})",
+            f"Text cache: {texts.hits} hit / {texts.misses} miss / {texts.evictions} evict ({texts.hit_rate():.0%})",
+            # Scaling statistics (surfaces no longer allocated per frame)
+            f"Scale: {self.scale_mode} {scale:.2f}x, {self.scale_allocs_saved} allocs / "
+            f"{self.scale_bytes_saved / (1024 * 1024):.0f} MB saved",
+        ]
+        # Compositor statistics (frames drawn without a full-frame scale)
+        if self.compositor is not None:
+            lines.append(f"Compositor: {self.compositor.frames} frames, {self.compositor.static_renders} static renders")
+        # Dirty-rect statistics (pixels pushed to the display last frame)
+        if self.dirty_rects is not None:
+            tracker = self.dirty_rects
+            lines.append(f"Dirty rects: {tracker.last_pixels} px ({tracker.last_ratio:.1%}), avg {tracker.average_pixels():.0f} px")
+        return lines
+
     def draw_controls(self, x, y, width):
-        title = SCORE_FONT.render("- CONTROLS -", True, YELLOW)
+        title = self.text_cache.render(fonts.SCORE_FONT, "- CONTROLS -", True, YELLOW)
         self.display_surface.blit(title, (x + 20, y))
 
         controls = [
@@ -854,13 +975,13 @@ class Game:
             ("F11", "Fullscreen"),
             ("Q", "Quit (in Menu/Pause)"),
             ("R", "Restart (End Game)"),
-            ("1,2,3", "Select algorithm (in Algorithm VISUAL mode)"),
+            ("1-6", "Select algorithm (in Algorithm VISUAL mode)"),
         ]
 
         curr_y = y + 40
         for key, action in controls:
-            k_surf = LOG_FONT.render(key, True, CYAN)
-            a_surf = LOG_FONT.render(action, True, WHITE)
+            k_surf = self.text_cache.render(fonts.LOG_FONT, key, True, CYAN)
+            a_surf = self.text_cache.render(fonts.LOG_FONT, action, True, WHITE)
             self.display_surface.blit(k_surf, (x + 20, curr_y))
             self.display_surface.blit(a_surf, (x + 20, curr_y + 20))
             curr_y += 50
@@ -868,16 +989,22 @@ class Game:
     def run(self):
         try:
             while self.running:
-                dt = self.clock.tick(60)
+                frame_ms = self.clock.tick(RENDER_FPS_LIMIT)
                 self.handle_input()
-                self.update(dt)
-                self.draw()
-                pygame.display.flip()
+                self.advance(frame_ms)
+                dirty = self.draw()
+                if dirty is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(dirty)
         except Exception as e:
-            print(f"CRITICAL ERROR: {e}")
+            self.log_message(f"CRITICAL ERROR: {e}", RED, LOG_ERROR)
             import traceback
             traceback.print_exc()
         finally:
+            self.logger.close()
+            self.telemetry.close()
+            self.leaderboard.close()
             pygame.quit()
 
 
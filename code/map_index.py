@@ -0,0 +1,95 @@
+# map_index.py
+"""
+地圖索引 (Map Index)。
+
+預先整理好兩種查詢，讓鬼魂不必在遊戲中反覆檢查牆壁:
+1. 驚嚇模式的隨機目標: 把範圍內所有非牆壁格子放進一個列表，抽樣只需 O(1)
+2. validate_target 的「最近空地」: 對每個 (夾住後的) 格子預先跑一次原本的螺旋搜尋
+"""
+import random
+from tile_grid import GAME_MAP
+
+# 驚嚇模式隨機目標的範圍 (與原本 randint(1, 26) / randint(1, 29) 相同)
+FRIGHTENED_X_RANGE = (1, 26)
+FRIGHTENED_Y_RANGE = (1, 29)
+
+# validate_target 螺旋搜尋的最大距離
+SPIRAL_SEARCH_RANGE = 10
+
+
+class MapIndex:
+    """
+    由地圖建立的靜態索引 (牆壁不會改變，所以只需建立一次)。
+
+    屬性:
+        frightened_tiles: 驚嚇模式可抽樣的非牆壁格子
+        nearest: nearest[ty][tx] 為夾住後的 (tx, ty) 所對應的合法目標，找不到為 None
+    """
+
+    def __init__(self, game_map):
+        """
+        參數:
+            game_map: 靜態地圖 (TileGrid)
+        """
+        self.game_map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.max_y = self.height - 1
+
+        # 1. 驚嚇模式的抽樣列表
+        self.frightened_tiles = [
+            (x, y)
+            for y in range(FRIGHTENED_Y_RANGE[0], FRIGHTENED_Y_RANGE[1] + 1)
+            for x in range(FRIGHTENED_X_RANGE[0], FRIGHTENED_X_RANGE[1] + 1)
+            if not game_map.is_wall(x, y)]
+
+        # 2. 最近空地表 (夾住後 tx 在 [1, max_x - 1]、ty 在 [1, max_y - 1])
+        self.nearest = []
+        for ty in range(self.height):
+            row = []
+            for tx in range(self.width):
+                row.append(self._spiral_search(tx, ty))
+            self.nearest.append(row)
+
+    def _spiral_search(self, tx, ty):
+        """ 與原本 Ghost.validate_target 相同的螺旋搜尋 """
+        if not self.game_map.is_wall(tx, ty):
+            return (tx, ty)
+        for dist in range(1, SPIRAL_SEARCH_RANGE):
+            for dx, dy in [(0, dist), (0, -dist), (dist, 0), (-dist, 0),
+                           (dist, dist), (dist, -dist), (-dist, dist), (-dist, -dist)]:
+                nx, ny = tx + dx, ty + dy
+                if 0 <= ny <= self.max_y and 0 <= nx < self.width:
+                    if not self.game_map.is_wall(nx, ny):
+                        return (nx, ny)
+        return None
+
+    def random_walkable(self, rng=random):
+        """ O(1) 隨機抽一個非牆壁格子 (機率分布與原本的 while 迴圈相同) """
+        return self.frightened_tiles[rng.randrange(len(self.frightened_tiles))]
+
+    def nearest_walkable(self, target):
+        """
+        把任意目標座標轉成合法目標 (與原本 validate_target 的結果相同)。
+
+        回傳:
+            合法的網格座標；目標嚴重超出地圖或附近都是牆時回傳 None
+        """
+        tx, ty = int(target[0]), int(target[1])
+        if not 0 <= ty <= self.max_y:
+            return None
+        max_x = self.width - 1
+        tx = max(1, min(tx, max_x - 1))
+        ty = max(1, min(ty, self.max_y - 1))
+        return self.nearest[ty][tx]
+
+
+_MAP_INDEX = None
+
+
+def get_map_index():
+    """ 取得由 GAME_MAP 建立的共用 MapIndex """
+    global _MAP_INDEX
+    if _MAP_INDEX is None:
+        _MAP_INDEX = MapIndex(GAME_MAP)
+    return _MAP_INDEX
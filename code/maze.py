@@ -0,0 +1,191 @@
+# maze.py
+"""
+迷宮距離引擎 (Maze Distance Engine)。
+
+迷宮的牆壁與門在遊戲過程中永遠不會改變 (只有豆子會被吃掉)，
+因此在第一次使用時從 MAP_STRINGS 預先計算:
+1. 所有可走格子之間的最短距離矩陣 (distance matrix)
+2. 與 Ghost.algo_bfs 結果完全相同的下一步矩陣 (next-hop matrix)
+3. A* 下一步的延遲快取 (第一次查詢時計算，之後 O(1))
+
+門 (TILE_DOOR) 分成兩個版本: 可通行 (MODE_EXIT_HOUSE / MODE_GO_HOME) 與不可通行。
+"""
+from array import array
+from settings import *
+
+# 與 Ghost.get_neighbors 相同的鄰居順序 (上、下、左、右)，BFS 的 tie-breaking 依賴這個順序
+NEIGHBOR_DIRS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+NO_STEP = -1       # 已在目標上或無法到達
+UNKNOWN_STEP = -2  # A* 下一步尚未計算
+
+
+class MazeDistances:
+    """
+    以緊湊的 array 儲存迷宮中所有可走格子 (約 300 格) 兩兩之間的距離與下一步。
+
+    只收錄從鬼屋出口 (GHOST_HOUSE_EXIT_POS) 走得到的格子，
+    地圖外圍那些被牆包住的空白區域不會被編號。
+    """
+
+    def __init__(self, map_strings, door_open):
+        """
+        參數:
+            map_strings: 地圖字串 (通常是 MAP_STRINGS)
+            door_open: 鬼屋的門是否可通行
+        """
+        self.map_strings = map_strings
+        self.door_open = door_open
+        self.width = len(map_strings[0])
+        self.height = len(map_strings)
+
+        # 1. 編號: 從出口做一次 flood fill，依發現順序給每一格一個 index
+        self.tiles = []
+        self.index = {}
+        self._number_tiles(GHOST_HOUSE_EXIT_POS)
+        n = len(self.tiles)
+        self.size = n
+
+        # 2. 鄰接表 (以 index 表示，順序與 NEIGHBOR_DIRS 相同)
+        self.neighbors = [[self.index[nb] for nb in self._tile_neighbors(tile)]
+                          for tile in self.tiles]
+
+        # 3. 距離矩陣 dist[s * n + t]，-1 表示無法到達
+        self.dist = array('h', [-1]) * (n * n)
+        for source in range(n):
+            self._bfs_fill(source)
+
+        # 4. 下一步矩陣 next_hop[s * n + t]
+        self.next_hop = array('h', [NO_STEP]) * (n * n)
+        for s in range(n):
+            self._fill_next_hops(s)
+
+        # 5. A* 的下一步 (tie-breaking 跟 BFS 不同，只能第一次查詢時實際搜尋一次)
+        self.astar_hop = array('h', [UNKNOWN_STEP]) * (n * n)
+
+    def _tile_neighbors(self, tile):
+        """ 與 Ghost.get_neighbors 相同規則的鄰居 (包含左右隧道的 wrap around) """
+        x, y = tile
+        result = []
+        for dx, dy in NEIGHBOR_DIRS:
+            nx = (x + dx) % self.width
+            ny = y + dy
+            if not 0 <= ny < self.height:
+                continue
+            char = self.map_strings[ny][nx]
+            if char == TILE_WALL:
+                continue
+            if char == TILE_DOOR and not self.door_open:
+                continue
+            result.append((nx, ny))
+        return result
+
+    def _number_tiles(self, start):
+        self.index[start] = 0
+        self.tiles.append(start)
+        head = 0
+        while head < len(self.tiles):
+            current = self.tiles[head]
+            head += 1
+            for nb in self._tile_neighbors(current):
+                if nb not in self.index:
+                    self.index[nb] = len(self.tiles)
+                    self.tiles.append(nb)
+
+    def _bfs_fill(self, source):
+        """ 從 source 做一次 BFS，填入距離矩陣的第 source 列 """
+        n = self.size
+        dist = self.dist
+        base = source * n
+        dist[base + source] = 0
+        queue = [source]
+        head = 0
+        while head < len(queue):
+            current = queue[head]
+            head += 1
+            d = dist[base + current] + 1
+            for nb in self.neighbors[current]:
+                if dist[base + nb] < 0:
+                    dist[base + nb] = d
+                    queue.append(nb)
+
+    def _fill_next_hops(self, s):
+        """
+        BFS (佇列 + 先到先得) 找到的路徑，剛好是所有最短路徑中方向順序字典序最小的那一條，
+        所以它的第一步就是「依 NEIGHBOR_DIRS 順序第一個距離目標少 1 的鄰居」。
+        """
+        n = self.size
+        dist = self.dist
+        hop = self.next_hop
+        base = s * n
+        for t in range(n):
+            d = dist[base + t]
+            if d <= 0:
+                continue
+            for nb in self.neighbors[s]:
+                if dist[nb * n + t] == d - 1:
+                    hop[base + t] = nb
+                    break
+
+    def contains(self, tile):
+        """ 這一格是否有被編號 (在迷宮的連通區域內) """
+        return tile in self.index
+
+    def distance(self, start, target):
+        """ 迷宮中的最短步數，無法到達回傳 None """
+        s = self.index.get(start)
+        t = self.index.get(target)
+        if s is None or t is None:
+            return None
+        d = self.dist[s * self.size + t]
+        return d if d >= 0 else None
+
+    def next_step(self, start, target):
+        """
+        O(1) 查表取得 BFS 的下一步 (與 Ghost.algo_bfs 結果相同)。
+        已在目標上或無法到達時回傳 None。
+        """
+        s = self.index.get(start)
+        t = self.index.get(target)
+        if s is None or t is None:
+            return None
+        hop = self.next_hop[s * self.size + t]
+        return self.tiles[hop] if hop >= 0 else None
+
+    def astar_next_step(self, start, target, search):
+        """
+        取得 A* 的下一步。第一次查詢某組 (start, target) 時呼叫 search(start, target)
+        實際搜尋並記錄結果，之後都是 O(1) 查表。
+
+        參數:
+            search: 回傳下一步 (或 None) 的 A* 搜尋函式
+        """
+        s = self.index.get(start)
+        t = self.index.get(target)
+        if s is None or t is None:
+            return search(start, target)
+        key = s * self.size + t
+        hop = self.astar_hop[key]
+        if hop == UNKNOWN_STEP:
+            step = search(start, target)
+            hop = self.index[step] if step is not None else NO_STEP
+            self.astar_hop[key] = hop
+        return self.tiles[hop] if hop >= 0 else None
+
+
+# 兩種門的版本各建一次 (第一次使用時才建立)
+_MAZE_CACHE = {}
+
+
+def get_maze_distances(door_open):
+    """
+    取得共用的 MazeDistances。
+
+    參數:
+        door_open: True 為 MODE_EXIT_HOUSE / MODE_GO_HOME 使用的「門可通行」版本
+    """
+    maze = _MAZE_CACHE.get(door_open)
+    if maze is None:
+        maze = MazeDistances(MAP_STRINGS, door_open)
+        _MAZE_CACHE[door_open] = maze
+    return maze
@@ -0,0 +1,115 @@
+# numpy_grid.py
+"""
+以 NumPy 實作的網格工具，給分析程式與 Bot 使用。
+
+一次從 K 個起點 (例如四隻鬼 + 玩家) 同時做 BFS:
+每一輪用陣列平移 (shift) 把 K 個波前一起往上下左右擴散一格，
+得到形狀為 (K, H, W) 的距離張量，比逐一呼叫單一起點的 BFS 快得多。
+"""
+import numpy as np
+from settings import *
+from tile_grid import TileGrid, PADDING, MASK_WALL, MASK_DOOR
+
+UNREACHABLE = -1
+
+
+def grid_view(grid, buffer=None):
+    """
+    TileGrid 的 buffer 以 (H, W) uint8 陣列的形式讀取 (不複製，去掉四周的邊框)。
+
+    參數:
+        grid: TileGrid
+        buffer: grid.tiles (預設)、grid.template 或 grid.mask
+
+    回傳的陣列與 buffer 共用記憶體: 吃掉豆子、重置關卡 (整塊複製回 buffer) 都會直接反映在陣列上。
+    """
+    if buffer is None:
+        buffer = grid.tiles
+    array = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, grid.stride)
+    return array[PADDING:PADDING + grid.height, PADDING:PADDING + grid.width]
+
+
+def walkable_grid(game_map, door_open=False):
+    """
+    把地圖轉成布林陣列 (True = 可通行)。
+
+    參數:
+        game_map: TileGrid (例如 GAME_MAP) 或地圖字串列表 (例如 MAP_STRINGS)
+        door_open: 鬼屋的門是否可通行
+
+    回傳:
+        形狀 (H, W) 的 bool 陣列
+    """
+    if isinstance(game_map, TileGrid):
+        # 直接讀 TileGrid 的 bitmask buffer，去掉四周的邊框
+        mask = grid_view(game_map, game_map.mask)
+        blocked = MASK_WALL if door_open else MASK_WALL | MASK_DOOR
+        return (mask & blocked) == 0
+
+    chars = np.array([list(row) for row in game_map])
+    walkable = chars != TILE_WALL
+    if not door_open:
+        walkable &= chars != TILE_DOOR
+    return walkable
+
+
+def _spread(frontier, out):
+    """
+    把 (K, H, W) 的波前往四個方向各擴散一格，寫進 out。
+    上下不 wrap；左右在 TUNNEL_LEFT_GRID_X / TUNNEL_RIGHT_GRID_X 之間相連 (隧道)。
+    """
+    out[...] = False
+    out[:, :-1, :] |= frontier[:, 1:, :]   # 往上
+    out[:, 1:, :] |= frontier[:, :-1, :]   # 往下
+    out[:, :, :-1] |= frontier[:, :, 1:]   # 往左
+    out[:, :, 1:] |= frontier[:, :, :-1]   # 往右
+    # 隧道: 從左邊出口往左走會出現在右邊出口，反之亦然
+    out[:, :, TUNNEL_RIGHT_GRID_X] |= frontier[:, :, TUNNEL_LEFT_GRID_X]
+    out[:, :, TUNNEL_LEFT_GRID_X] |= frontier[:, :, TUNNEL_RIGHT_GRID_X]
+    return out
+
+
+def multi_source_distances(walkable, sources):
+    """
+    同時計算 K 個起點到每一格的迷宮距離。
+
+    參數:
+        walkable: walkable_grid() 回傳的 (H, W) bool 陣列
+        sources: K 個起點 [(grid_x, grid_y), ...]；x 超出左右邊界時會依隧道換算，
+                 落在牆上或地圖外的起點整層都是 UNREACHABLE
+
+    回傳:
+        形狀 (K, H, W) 的 int32 陣列，到不了的格子為 UNREACHABLE (-1)
+    """
+    height, width = walkable.shape
+    k = len(sources)
+    dist = np.full((k, height, width), UNREACHABLE, dtype=np.int32)
+    frontier = np.zeros((k, height, width), dtype=bool)
+    spread = np.zeros_like(frontier)
+
+    for i, (x, y) in enumerate(sources):
+        x = int(x) % width
+        y = int(y)
+        if 0 <= y < height and walkable[y, x]:
+            frontier[i, y, x] = True
+            dist[i, y, x] = 0
+
+    visited = frontier.copy()
+    step = 0
+    while frontier.any():
+        step += 1
+        _spread(frontier, spread)
+        # 新的波前: 擴散到的、可走的、還沒到過的格子
+        np.logical_and(spread, walkable, out=frontier)
+        frontier &= ~visited
+        visited |= frontier
+        dist[frontier] = step
+    return dist
+
+
+def entity_distances(game_map, entities, door_open=False):
+    """
+    方便用的包裝: 直接從地圖與實體 (Player / Ghost，需有 grid_x, grid_y) 計算距離張量。
+    """
+    sources = [(entity.grid_x, entity.grid_y) for entity in entities]
+    return multi_source_distances(walkable_grid(game_map, door_open), sources)
@@ -0,0 +1,191 @@
+# observation.py
+"""
+給 Bot 使用的觀測 (Observation)。
+
+Bot 原本只能直接翻 Game.game_map、Player 與 Ghost 物件。這裡提供兩種固定形狀的陣列:
+1. TilePlanes: (C, H, W) 的格子平面 (牆壁、豆子、能量球、玩家、各種模式的鬼魂)。
+   地圖代碼以 numpy_grid.grid_view 直接讀 TileGrid 的 bytearray (不複製)，
+   observe() 只把比較結果寫進預先配置好的陣列。
+2. PixelObserver: 用 pygame.surfarray.pixels3d 取得 surface (例如 Game.map_surface) 的像素 view，
+   每隔 factor 個像素取一點，寫進預先配置好的 (H / factor, W / factor, 3) 陣列。
+   沒有視窗時由 MapRenderer 把 Simulation 畫到自己的 map_surface。
+
+兩者都不需要 SDL 視訊，每次 observe() 都不會配置新的大陣列；
+回傳的陣列每次都會被覆寫，需要保留時請自行 copy。
+"""
+import numpy as np
+import pygame
+from settings import *
+from tile_grid import CODE_PELLET, CODE_POWER_PELLET, MASK_BLOCKED
+from numpy_grid import grid_view
+from compositor import render_maze_background
+from pellet_layer import PelletLayer
+from sprite_atlas import get_sprite_atlas
+
+# 平面編號 (TilePlanes 與 VectorEnv.observe_planes 共用)
+PLANE_WALL = 0              # 牆壁與鬼屋的門 (玩家不能進入的格子)
+PLANE_PELLET = 1
+PLANE_POWER_PELLET = 2
+PLANE_PLAYER = 3
+PLANE_GHOST = 4             # 散開 / 追逐中的鬼
+PLANE_GHOST_FRIGHTENED = 5
+PLANE_GHOST_EATEN = 6       # 被吃掉、正在回家的鬼 (只剩眼睛)
+PLANE_GHOST_HOUSE = 7       # 在鬼屋裡等待或正在出門的鬼
+NUM_PLANES = 8
+
+# 下採樣的預設間隔 (560x720 的地圖 → 140x180)
+PIXEL_FACTOR = 4
+
+
+def ghost_plane(ghost):
+    """ 鬼魂目前的模式對應的平面 """
+    if ghost.is_eaten or ghost.current_ai_mode == MODE_GO_HOME:
+        return PLANE_GHOST_EATEN
+    if ghost.is_frightened:
+        return PLANE_GHOST_FRIGHTENED
+    if ghost.current_ai_mode in (MODE_WAITING, MODE_EXIT_HOUSE):
+        return PLANE_GHOST_HOUSE
+    return PLANE_GHOST
+
+
+class TilePlanes:
+    """
+    一場 Simulation 的格子平面。
+
+    屬性:
+        tiles: 與 sim.game_map 共用記憶體的 (H, W) 地圖代碼 (CODE_*)
+        planes: (NUM_PLANES, H, W) 的觀測，observe() 時就地更新
+
+    Simulation 的地圖在整場遊戲中是同一個 TileGrid (換關卡時整塊複製回 buffer)，
+    所以 tiles 一直有效；換成新的 Simulation 時需要建立新的 TilePlanes。
+    """
+
+    def __init__(self, sim, dtype=np.float32):
+        """
+        參數:
+            sim: Simulation
+            dtype: 平面的型別 (神經網路通常用 float32，省記憶體可用 uint8)
+        """
+        self.sim = sim
+        grid = sim.game_map
+        self.width = grid.width
+        self.height = grid.height
+        self.tiles = grid_view(grid)
+        self.planes = np.zeros((NUM_PLANES, grid.height, grid.width), dtype=dtype)
+        # 牆壁不會改變，只算一次
+        self.planes[PLANE_WALL] = grid_view(grid, grid.mask) & MASK_BLOCKED != 0
+
+    def observe(self):
+        """
+        回傳:
+            目前狀態的 (NUM_PLANES, H, W) 平面 (與上一次回傳的是同一個陣列)
+        """
+        planes = self.planes
+        np.equal(self.tiles, CODE_PELLET, out=planes[PLANE_PELLET])
+        np.equal(self.tiles, CODE_POWER_PELLET, out=planes[PLANE_POWER_PELLET])
+        planes[PLANE_PLAYER:].fill(0)
+
+        sim = self.sim
+        if sim.player is not None:
+            self._mark(PLANE_PLAYER, sim.player)
+        for ghost in sim.ghosts:
+            self._mark(ghost_plane(ghost), ghost)
+        return planes
+
+    def _mark(self, plane, entity):
+        """ 在 entity 所在的格子標 1 (隧道口外的座標換算到另一端) """
+        y = entity.grid_y
+        if 0 <= y < self.height:
+            self.planes[plane, y, entity.grid_x % self.width] = 1
+
+
+class PixelObserver:
+    """
+    下採樣的像素觀測。
+
+    屬性:
+        pixels: (H / factor, W / factor, 3) 的 uint8 陣列 (列優先，與 surface 的 (W, H) 相反)
+    """
+
+    def __init__(self, surface, factor=PIXEL_FACTOR):
+        """
+        參數:
+            surface: 要讀取的 Surface (24 / 32 位元，例如 Game.map_surface 或 MapRenderer.map_surface)
+            factor: 每隔幾個像素取一點
+        """
+        self.surface = surface
+        self.factor = factor
+        width, height = surface.get_size()
+        self.pixels = np.zeros((height // factor, width // factor, 3), dtype=np.uint8)
+
+    def observe(self):
+        """
+        回傳:
+            目前 surface 的下採樣畫面 (與上一次回傳的是同一個陣列)
+        """
+        rows, cols = self.pixels.shape[:2]
+        f = self.factor
+        # pixels3d 是 surface 記憶體的 view (不複製)，存在期間 surface 被鎖住不能 blit，
+        # 所以只在這裡短暫持有
+        view = pygame.surfarray.pixels3d(self.surface)
+        try:
+            np.copyto(self.pixels, view[:cols * f:f, :rows * f:f].transpose(1, 0, 2))
+        finally:
+            del view
+        return self.pixels
+
+
+class MapRenderer:
+    """
+    沒有視窗時把 Simulation 畫到自己的 map_surface
+    (與 Game.draw_map_entities 相同的豆子圖層與角色圖集，不含 HUD 與文字)。
+
+    注意: render() 會取走 sim.take_eaten_tiles()，不要與 Game 共用同一個 Simulation。
+    """
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.map_surface = pygame.Surface((SCREEN_WIDTH, MAP_HEIGHT))
+        self.background = render_maze_background()
+        self.pellet_layer = PelletLayer()
+        self.layer_version = None
+
+    def render(self):
+        """
+        回傳:
+            畫好目前狀態的 map_surface
+        """
+        sim = self.sim
+        if sim.map_version != self.layer_version:
+            self.layer_version = sim.map_version
+            sim.take_eaten_tiles()
+            self.pellet_layer.rebuild(self.background, sim.game_map)
+        else:
+            for x, y in sim.take_eaten_tiles():
+                self.pellet_layer.erase(x, y)
+
+        surface = self.map_surface
+        ticks = int(sim.now())
+        self.pellet_layer.draw(surface, ticks)
+
+        atlas = get_sprite_atlas()
+        sprites = []
+        if sim.fruit_active:
+            sprites.append((atlas.fruit(),
+                            sim.fruit_pos[0] * TILE_SIZE + TILE_SIZE // 2,
+                            sim.fruit_pos[1] * TILE_SIZE + TILE_SIZE // 2))
+        if sim.player is not None:
+            sprite = sim.player.get_sprite(atlas)
+            if sprite is not None:
+                sprites.append((sprite, sim.player.pixel_x, sim.player.pixel_y))
+        if sim.state != GAME_STATE_DEATH:
+            flash_white = False
+            if sim.frightened_mode:
+                remaining = sim.level_frightened_duration - (ticks - sim.frightened_start_time)
+                flash_white = remaining < 2000 and (ticks // 200) % 2 == 0
+            for ghost in sim.ghosts:
+                sprites.append((ghost.get_sprite(flash_white, atlas), ghost.pixel_x, ghost.pixel_y))
+
+        for sprite, x, y in sprites:
+            surface.blit(sprite, (int(x) - atlas.center, int(y) - atlas.center))
+        return surface
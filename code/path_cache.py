@@ -0,0 +1,60 @@
+# path_cache.py
+"""
+有容量上限的 LRU 路徑快取。
+
+VISUAL 模式下每一幀 (60 fps) 都要替每隻鬼畫出完整路徑，
+但起點與目標格每秒只會變幾次，Ghost.update 又會再算一次同樣的路徑。
+把完整路徑以 (演算法, 起點, 目標, 門是否可通行) 為 key 快取起來，兩邊共用。
+"""
+from collections import OrderedDict
+
+# 最多保留幾條路徑
+PATH_CACHE_CAPACITY = 256
+
+
+class PathCache:
+    """
+    LRU 路徑快取 (由 Game 擁有，所有鬼魂與 VISUAL 畫線共用)。
+
+    屬性:
+        hits / misses / evictions: 命中、未命中與被淘汰的次數
+    """
+
+    def __init__(self, capacity=PATH_CACHE_CAPACITY):
+        self.capacity = capacity
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_path(self, key, compute):
+        """
+        取得快取的路徑，沒有的話呼叫 compute() 計算並存起來。
+
+        參數:
+            key: (演算法名稱, 起點, 目標, 門是否可通行[, 方向])
+            compute: 回傳路徑列表的函式
+
+        回傳:
+            路徑 (tuple，請勿修改)
+        """
+        path = self.paths.get(key)
+        if path is not None:
+            self.hits += 1
+            self.paths.move_to_end(key)
+            return path
+
+        self.misses += 1
+        path = tuple(compute())
+        self.paths[key] = path
+        if len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+        return path
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self.paths.clear()
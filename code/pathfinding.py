@@ -0,0 +1,631 @@
+# pathfinding.py
+"""
+路徑搜尋引擎 (Pathfinder Registry)。
+
+所有鬼魂使用的演算法都註冊在這裡，以名稱 (ALGO_* 常數) 取得:
+    GREEDY   : 貪婪法，只看眼前一步
+    BFS      : 廣度優先搜尋
+    ASTAR    : A* (heapq 版本，tie-breaking 與原本的 PriorityQueue 相同)
+    DIJKSTRA : Dijkstra (tie-breaking 採先進先出，路徑與 BFS 完全相同)
+    BIBFS    : 雙向 BFS，從起點與終點同時擴展
+    JPS      : Jump Point Search，沿直線跳躍到下一個可轉彎的格子 (支援左右隧道)
+
+節點以整數 id 表示 (id = y * width + x)，每個演算法都會統計展開的節點數。
+搜尋過程使用 SearchWorkspace 中預先配置好的陣列，每次搜尋不會產生新的 dict / list。
+"""
+from array import array
+from heapq import heappush, heappop
+from settings import *
+from maze import NEIGHBOR_DIRS, get_maze_distances
+
+NO_NODE = -1
+
+# 垂直方向 (0, 1) 與水平方向 (2, 3) 在 NEIGHBOR_DIRS 中的索引
+PERPENDICULAR_DIRS = [(2, 3), (2, 3), (0, 1), (0, 1)]
+DIR_INDICES = (0, 1, 2, 3)
+
+MAX_GENERATION = 0xFFFFFFFF
+
+
+class GridGraph:
+    """
+    以整數 id 表示的網格圖。
+    step[door_open][node * 4 + d] 是 node 往方向 d 走一步的鄰居 id (無法通行為 NO_NODE)。
+    """
+
+    def __init__(self, map_strings):
+        self.map_strings = map_strings
+        self.width = len(map_strings[0])
+        self.height = len(map_strings)
+        self.size = self.width * self.height
+        self.xs = [node % self.width for node in range(self.size)]
+        self.ys = [node // self.width for node in range(self.size)]
+        # 預先建立每個 id 的座標 tuple，回傳結果時不必再產生新的 tuple
+        self.tiles = [(self.xs[node], self.ys[node]) for node in range(self.size)]
+
+        self.walkable = [map_strings[self.ys[node]][self.xs[node]] != TILE_WALL
+                         for node in range(self.size)]
+
+        self.step = {}
+        for door_open in (False, True):
+            step = array('i', [NO_NODE]) * (self.size * 4)
+            for node in range(self.size):
+                if not self.walkable[node]:
+                    continue
+                x, y = self.xs[node], self.ys[node]
+                for d, (dx, dy) in enumerate(NEIGHBOR_DIRS):
+                    nx = (x + dx) % self.width
+                    ny = y + dy
+                    if not 0 <= ny < self.height:
+                        continue
+                    char = map_strings[ny][nx]
+                    if char == TILE_WALL:
+                        continue
+                    if char == TILE_DOOR and not door_open:
+                        continue
+                    step[node * 4 + d] = ny * self.width + nx
+            self.step[door_open] = step
+
+    def node_id(self, tile):
+        """ 網格座標轉 id，超出範圍或是牆壁回傳 None """
+        x, y = tile
+        if 0 <= x < self.width and 0 <= y < self.height:
+            node = y * self.width + x
+            if self.walkable[node]:
+                return node
+        return None
+
+    def tile(self, node):
+        return self.tiles[node]
+
+    def manhattan(self, a, b):
+        """ 與原本 Ghost.heuristic 相同 (不考慮隧道) """
+        return abs(self.xs[a] - self.xs[b]) + abs(self.ys[a] - self.ys[b])
+
+    def wrapped_manhattan(self, a, b):
+        """ 考慮左右隧道 wrap around 的曼哈頓距離 (admissible) """
+        dx = abs(self.xs[a] - self.xs[b])
+        return min(dx, self.width - dx) + abs(self.ys[a] - self.ys[b])
+
+
+_GRID_GRAPH = None
+
+
+def get_grid_graph():
+    """ 取得由 MAP_STRINGS 建立的共用 GridGraph """
+    global _GRID_GRAPH
+    if _GRID_GRAPH is None:
+        _GRID_GRAPH = GridGraph(MAP_STRINGS)
+    return _GRID_GRAPH
+
+
+class SearchWorkspace:
+    """
+    搜尋用的暫存空間 (每個 Pathfinder 各自擁有一份)。
+
+    parent / cost / stamp / queue 都是長度為 width * height 的平坦陣列，以 y * width + x 索引。
+    stamp[node] == generation 才代表這一格在「這次搜尋」中被拜訪過，
+    所以開始新搜尋時只要把 generation 加一，就等於 O(1) 清空整個陣列。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.parent = array('i', [NO_NODE]) * size
+        self.cost = array('i', [0]) * size
+        self.stamp = array('I', [0]) * size
+        self.queue = array('i', [0]) * size
+        self.heap = []
+        self.generation = 0
+
+    def reset(self):
+        """ 開始新的搜尋 """
+        if self.generation == MAX_GENERATION:
+            # 世代編號用完 (幾乎不會發生)，真的清一次陣列
+            for node in range(self.size):
+                self.stamp[node] = 0
+            self.generation = 0
+        self.generation += 1
+        del self.heap[:]
+        return self.generation
+
+
+# --- Registry ---
+PATHFINDERS = {}
+
+
+def register_pathfinder(name):
+    """ Class decorator: 把演算法以名稱註冊到 PATHFINDERS """
+    def decorator(cls):
+        cls.name = name
+        PATHFINDERS[name] = cls
+        return cls
+    return decorator
+
+
+def create_pathfinder(name, graph=None, use_tables=True):
+    """
+    依名稱建立演算法實例 (每隻鬼各自擁有一個，統計數字與暫存空間才不會混在一起)。
+
+    參數:
+        name: ALGO_GREEDY / ALGO_BFS / ALGO_ASTAR / ALGO_DIJKSTRA / ALGO_BIBFS / ALGO_JPS
+        use_tables: 是否可以查 MazeDistances 的表 (False: next_step 每次都實際搜尋)
+    """
+    if name not in PATHFINDERS:
+        raise ValueError(f"Unknown pathfinder: {name}")
+    return PATHFINDERS[name](graph, use_tables)
+
+
+class Pathfinder:
+    """
+    所有演算法的基底類別。
+
+    子類別實作 _search(s, t, door_open, direction)，找到路徑時回傳 True，
+    路徑本身保存在 workspace.parent 中 (從 t 一路回溯到 s)。
+    """
+    name = None
+    uses_flow_fields = False  # 下一步與 BFS 完全相同，可以改讀共用流場
+    cache_paths = True        # next_step 需要實際搜尋，適合改用 PathCache 中的完整路徑
+    uses_direction = False    # 結果是否取決於鬼魂目前的方向
+
+    def __init__(self, graph=None, use_tables=True):
+        self.graph = graph if graph is not None else get_grid_graph()
+        # False: 不查 MazeDistances 的表，searches / nodes_expanded 反映每次決策真正的搜尋量
+        self.use_tables = use_tables
+        self.workspace = SearchWorkspace(self.graph.size)
+        self.searches = 0         # 實際執行搜尋的次數
+        self.nodes_expanded = 0   # 累計展開的節點數
+        self.last_expanded = 0    # 最近一次搜尋展開的節點數
+
+    def stats(self):
+        return {"name": self.name, "searches": self.searches,
+                "nodes_expanded": self.nodes_expanded}
+
+    def _run(self, start, target, door_open, direction):
+        """ 執行一次搜尋並更新統計，回傳 (s, t) 的 id；找不到路徑回傳 (None, None) """
+        s = self.graph.node_id(start)
+        t = self.graph.node_id(target)
+        if s is None or t is None:
+            return None, None
+        self.last_expanded = 0
+        found = self._search(s, t, door_open, direction)
+        self.searches += 1
+        self.nodes_expanded += self.last_expanded
+        if not found:
+            return None, None
+        return s, t
+
+    def find_path(self, start, target, door_open=False, direction=(0, 0)):
+        """
+        回傳從 start 到 target 的完整路徑 (包含起點與終點的網格座標列表)。
+        找不到路徑時回傳 []。
+        """
+        s, t = self._run(start, target, door_open, direction)
+        if s is None:
+            return []
+        tiles = self.graph.tiles
+        return [tiles[node] for node in self._trace(s, t, door_open)]
+
+    def next_step(self, start, target, door_open=False, direction=(0, 0)):
+        """ 回傳下一步的網格座標，已在目標上或無法到達時回傳 None """
+        s, t = self._run(start, target, door_open, direction)
+        if s is None:
+            return None
+        node = self._first_step(s, t, door_open)
+        return self.graph.tiles[node] if node != NO_NODE else None
+
+    def _search(self, s, t, door_open, direction):
+        raise NotImplementedError
+
+    def _trace(self, s, t, door_open):
+        """ 從 workspace.parent 回溯出 s -> t 的路徑 (節點 id 列表) """
+        parent = self.workspace.parent
+        path = [t]
+        while path[-1] != s:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def _first_step(self, s, t, door_open):
+        """ 不建立列表，直接沿著 parent 找到 s 之後的第一個節點 """
+        if s == t:
+            return NO_NODE
+        parent = self.workspace.parent
+        node = t
+        while parent[node] != s:
+            node = parent[node]
+        return node
+
+    # --- 共用的 heapq 搜尋核心 (A*, Dijkstra, JPS) ---
+    def _heuristic(self, node, t):
+        return 0
+
+    def _tie(self, node, counter):
+        """ 同分時的排序鍵 (必須不大於 4 * graph.size) """
+        return counter
+
+    def _successor(self, node, d, t, step):
+        """ 往方向 d 的後繼節點，編碼為 cost * size + node；沒有則回傳 NO_NODE """
+        next_node = step[node * 4 + d]
+        if next_node == NO_NODE:
+            return NO_NODE
+        return self.graph.size + next_node
+
+    def _best_first(self, s, t, door_open):
+        """
+        heapq best-first search。
+
+        heap 裡放的是單一整數 ((f * tie_range + tie) * size + node)，
+        排序等同於 (f, tie, node) 的 tuple，但不需要為每個項目配置 tuple。
+
+        記憶體配置: 這些鍵超過 CPython 的小整數快取 (-5 ~ 256)，每次 push 仍會配置一個 int
+        (約 28 bytes)，heap list 也會隨前緣長大；它們在 pop 或搜尋結束清空 heap 時就由
+        參照計數釋放，不會留到下一次呼叫 (也不產生需要 gc 回收的循環)。
+        tests/test_pathfinding_alloc.py 以 tracemalloc 驗證每次呼叫沒有殘留配置。
+        """
+        ws = self.workspace
+        gen = ws.reset()
+        stamp, parent, cost, heap = ws.stamp, ws.parent, ws.cost, ws.heap
+        step = self.graph.step[door_open]
+        size = self.graph.size
+        tie_range = 4 * size + 1
+        heuristic, tie, successor = self._heuristic, self._tie, self._successor
+
+        stamp[s] = gen
+        parent[s] = NO_NODE
+        cost[s] = 0
+        heappush(heap, (heuristic(s, t) * tie_range + tie(s, 0)) * size + s)
+        counter = 0
+        expanded = 0
+        while heap:
+            key = heappop(heap)
+            current = key % size
+            g = cost[current]
+            if key // size // tie_range > g + heuristic(current, t):
+                continue  # 過期的項目 (已經用更低代價展開過)
+            expanded += 1
+            if current == t:
+                break
+            for d in DIR_INDICES:
+                code = successor(current, d, t, step)
+                if code == NO_NODE:
+                    continue
+                next_node = code % size
+                new_cost = g + code // size
+                if stamp[next_node] != gen or new_cost < cost[next_node]:
+                    stamp[next_node] = gen
+                    cost[next_node] = new_cost
+                    parent[next_node] = current
+                    counter += 1
+                    heappush(heap, ((new_cost + heuristic(next_node, t)) * tie_range
+                                    + tie(next_node, counter)) * size + next_node)
+        # 剩下的項目不留到下一次搜尋
+        del heap[:]
+        self.last_expanded += expanded
+        return stamp[t] == gen
+
+
+@register_pathfinder(ALGO_GREEDY)
+class GreedyPathfinder(Pathfinder):
+    """
+    Greedy Best-First Search (貪婪演算法)
+    只看眼前哪一步離目標最近，不考慮障礙物後的代價，容易走進死路。
+    """
+    cache_paths = False  # 每一步都是局部決策，與完整路徑的第一步不一定相同
+    uses_direction = True
+
+    def _choose(self, s, t, step, direction):
+        """ 選出離目標最近、且不是回頭的鄰居 (都不行時才允許回頭) """
+        graph = self.graph
+        xs, ys = graph.xs, graph.ys
+        self.last_expanded += 1
+        # 禁止回頭邏輯 (Pac-Man standard)，與原本一樣不考慮隧道
+        reverse_x = xs[s] - direction[0]
+        reverse_y = ys[s] - direction[1]
+        best = NO_NODE
+        best_h = 0
+        for allow_reverse in (False, True):
+            for d in DIR_INDICES:
+                n = step[s * 4 + d]
+                if n == NO_NODE:
+                    continue
+                if not allow_reverse and xs[n] == reverse_x and ys[n] == reverse_y:
+                    continue
+                h = graph.manhattan(n, t)
+                if best == NO_NODE or h < best_h:
+                    best, best_h = n, h
+            if best != NO_NODE:
+                break
+        return best
+
+    def next_step(self, start, target, door_open=False, direction=(0, 0)):
+        # 貪婪法只做一次局部決策 (即使已在目標上也會選一個鄰居)
+        s = self.graph.node_id(start)
+        t = self.graph.node_id(target)
+        if s is None or t is None:
+            return None
+        self.last_expanded = 0
+        node = self._choose(s, t, self.graph.step[door_open], direction)
+        self.searches += 1
+        self.nodes_expanded += self.last_expanded
+        return self.graph.tiles[node] if node != NO_NODE else None
+
+    def _search(self, s, t, door_open, direction):
+        """
+        模擬鬼魂一路照貪婪法走，直到抵達目標或開始繞圈。
+        路徑依序記錄在 workspace.queue；cost 用來記錄每格已經用哪些方向走過 (偵測繞圈)。
+        """
+        graph = self.graph
+        ws = self.workspace
+        gen = ws.reset()
+        stamp, seen_dirs, queue = ws.stamp, ws.cost, ws.queue
+        step = graph.step[door_open]
+        half_width = graph.width // 2
+        dx, dy = direction
+        current = s
+        length = 0
+        while True:
+            queue[length] = current
+            length += 1
+            if current == t:
+                self._length = length
+                return True
+            # 同一格用同一個方向走第二次 => 開始繞圈
+            bit = 1 << (NEIGHBOR_DIRS.index((dx, dy)) if (dx, dy) in NEIGHBOR_DIRS else 4)
+            if stamp[current] != gen:
+                stamp[current] = gen
+                seen_dirs[current] = 0
+            elif seen_dirs[current] & bit:
+                return False
+            seen_dirs[current] |= bit
+            next_node = self._choose(current, t, step, (dx, dy))
+            if next_node == NO_NODE or length >= ws.size:
+                return False
+            dx = graph.xs[next_node] - graph.xs[current]
+            if dx > half_width:
+                dx = -1
+            elif dx < -half_width:
+                dx = 1
+            dy = graph.ys[next_node] - graph.ys[current]
+            current = next_node
+
+    def _trace(self, s, t, door_open):
+        return self.workspace.queue[:self._length].tolist()
+
+
+@register_pathfinder(ALGO_BFS)
+class BFSPathfinder(Pathfinder):
+    """
+    Breadth-First Search (廣度優先搜尋)
+    地毯式搜索，保證找到最短路徑，但搜尋範圍會擴散得很大。
+    下一步直接查 MazeDistances 預先算好的表 (結果與實際搜尋相同)。
+    """
+    uses_flow_fields = True
+    cache_paths = False  # 查表已經是 O(1)
+
+    def next_step(self, start, target, door_open=False, direction=(0, 0)):
+        maze = get_maze_distances(door_open)
+        if self.use_tables and maze.contains(start):
+            return maze.next_step(start, target)
+        return super().next_step(start, target, door_open, direction)
+
+    def _search(self, s, t, door_open, direction):
+        ws = self.workspace
+        gen = ws.reset()
+        stamp, parent, queue = ws.stamp, ws.parent, ws.queue
+        step = self.graph.step[door_open]
+
+        stamp[s] = gen
+        parent[s] = NO_NODE
+        queue[0] = s
+        head, tail = 0, 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            if current == t:
+                break
+            base = current * 4
+            for d in DIR_INDICES:
+                next_node = step[base + d]
+                if next_node != NO_NODE and stamp[next_node] != gen:
+                    stamp[next_node] = gen
+                    parent[next_node] = current
+                    queue[tail] = next_node
+                    tail += 1
+        self.last_expanded += head
+        return stamp[t] == gen
+
+
+@register_pathfinder(ALGO_ASTAR)
+class AStarPathfinder(Pathfinder):
+    """
+    A* Algorithm (A Star 演算法)
+    結合了 Dijkstra (實際代價) 與 Greedy (預估代價 Heuristic) 的優點。
+    同分時依 (x, y) 排序，與原本 PriorityQueue 的行為相同。
+    """
+
+    def next_step(self, start, target, door_open=False, direction=(0, 0)):
+        # 每組 (起點, 目標) 只實際搜尋一次，之後從 MazeDistances 的快取表取得
+        if not self.use_tables:
+            return super().next_step(start, target, door_open, direction)
+        maze = get_maze_distances(door_open)
+        return maze.astar_next_step(
+            start, target,
+            lambda s, t: Pathfinder.next_step(self, s, t, door_open, direction))
+
+    def _heuristic(self, node, t):
+        return self.graph.manhattan(node, t)
+
+    def _tie(self, node, counter):
+        return self.graph.xs[node] * self.graph.height + self.graph.ys[node]
+
+    def _search(self, s, t, door_open, direction):
+        return self._best_first(s, t, door_open)
+
+
+@register_pathfinder(ALGO_DIJKSTRA)
+class DijkstraPathfinder(Pathfinder):
+    """
+    Dijkstra 演算法。
+    同分時先進先出，在等權重的網格上路徑與 BFS 完全相同，
+    所以下一步也直接查 MazeDistances 的表。
+    """
+    uses_flow_fields = True
+    cache_paths = False  # 查表已經是 O(1)
+
+    def next_step(self, start, target, door_open=False, direction=(0, 0)):
+        maze = get_maze_distances(door_open)
+        if self.use_tables and maze.contains(start):
+            return maze.next_step(start, target)
+        return super().next_step(start, target, door_open, direction)
+
+    def _search(self, s, t, door_open, direction):
+        return self._best_first(s, t, door_open)
+
+
+@register_pathfinder(ALGO_BIBFS)
+class BidirectionalBFSPathfinder(Pathfinder):
+    """
+    雙向 BFS: 同時從起點與終點一層一層擴展，兩邊相遇即可組出最短路徑。
+    每次擴展較小的那一邊，展開的節點數明顯少於單向 BFS。
+    反方向的搜尋使用第二份 workspace。
+    """
+
+    def __init__(self, graph=None, use_tables=True):
+        super().__init__(graph, use_tables)
+        self.backward = SearchWorkspace(self.graph.size)
+        self._meet = NO_NODE
+
+    def _search(self, s, t, door_open, direction):
+        step = self.graph.step[door_open]
+        sides = (self.workspace, self.backward)
+        gens = (sides[0].reset(), sides[1].reset())
+        for ws, gen, root in ((sides[0], gens[0], s), (sides[1], gens[1], t)):
+            ws.stamp[root] = gen
+            ws.parent[root] = NO_NODE
+            ws.cost[root] = 0
+            ws.queue[0] = root
+        if s == t:
+            self.last_expanded += 1
+            self._meet = s
+            return True
+
+        # 每一邊目前這一層在 queue 中的範圍 [head, tail)
+        heads = [0, 0]
+        tails = [1, 1]
+        while heads[0] < tails[0] and heads[1] < tails[1]:
+            side = 0 if tails[0] - heads[0] <= tails[1] - heads[1] else 1
+            ws, other = sides[side], sides[1 - side]
+            gen, other_gen = gens[side], gens[1 - side]
+            stamp, parent, cost, queue = ws.stamp, ws.parent, ws.cost, ws.queue
+            meet = NO_NODE
+            best_total = 0
+            head, level_end, tail = heads[side], tails[side], tails[side]
+            # 擴展完整的一層，再從相遇點中挑總長度最短的
+            while head < level_end:
+                current = queue[head]
+                head += 1
+                depth = cost[current] + 1
+                for d in DIR_INDICES:
+                    next_node = step[current * 4 + d]
+                    if next_node == NO_NODE or stamp[next_node] == gen:
+                        continue
+                    stamp[next_node] = gen
+                    parent[next_node] = current
+                    cost[next_node] = depth
+                    queue[tail] = next_node
+                    tail += 1
+                    if other.stamp[next_node] == other_gen:
+                        total = depth + other.cost[next_node]
+                        if meet == NO_NODE or total < best_total:
+                            meet, best_total = next_node, total
+            self.last_expanded += head - heads[side]
+            heads[side], tails[side] = head, tail
+            if meet != NO_NODE:
+                self._meet = meet
+                return True
+        return False
+
+    def _trace(self, s, t, door_open):
+        meet = self._meet
+        forward, backward = self.workspace.parent, self.backward.parent
+        path = [meet]
+        while path[-1] != s:
+            path.append(forward[path[-1]])
+        path.reverse()
+        while path[-1] != t:
+            path.append(backward[path[-1]])
+        return path
+
+    def _first_step(self, s, t, door_open):
+        if s == t:
+            return NO_NODE
+        meet = self._meet
+        if meet == s:
+            return self.backward.parent[s]
+        parent = self.workspace.parent
+        node = meet
+        while parent[node] != s:
+            node = parent[node]
+        return node
+
+
+@register_pathfinder(ALGO_JPS)
+class JumpPointPathfinder(Pathfinder):
+    """
+    Jump Point Search (四方向版本)。
+    從每個節點沿直線一路跳躍，直到撞牆、抵達目標，或遇到可以轉彎的格子 (跳點)，
+    中間的走廊格子完全不會被放進 open set。
+    水平跳躍會穿過左右隧道 (wrap around)，heuristic 也使用考慮隧道的曼哈頓距離。
+    """
+
+    def _heuristic(self, node, t):
+        return self.graph.wrapped_manhattan(node, t)
+
+    def _successor(self, node, d, t, step):
+        """ 從 node 往方向 d 跳到下一個跳點，編碼為 distance * size + 跳點 """
+        current = node
+        distance = 0
+        p1, p2 = PERPENDICULAR_DIRS[d]
+        while True:
+            current = step[current * 4 + d]
+            if current == NO_NODE or current == node:
+                return NO_NODE
+            distance += 1
+            if (current == t or step[current * 4 + p1] != NO_NODE
+                    or step[current * 4 + p2] != NO_NODE):
+                return distance * self.graph.size + current
+
+    def _search(self, s, t, door_open, direction):
+        return self._best_first(s, t, door_open)
+
+    def _segment_dir(self, a, b, step):
+        """ 回傳從跳點 a 直線走到跳點 b 的方向 """
+        for d in DIR_INDICES:
+            current = a
+            while True:
+                current = step[current * 4 + d]
+                if current == NO_NODE or current == a:
+                    break
+                if current == b:
+                    return d
+        return NO_NODE
+
+    def _trace(self, s, t, door_open):
+        """ 把跳點之間的直線補回完整路徑 """
+        step = self.graph.step[door_open]
+        jump_points = super()._trace(s, t, door_open)
+        path = jump_points[:1]
+        for a, b in zip(jump_points, jump_points[1:]):
+            d = self._segment_dir(a, b, step)
+            current = a
+            while current != b:
+                current = step[current * 4 + d]
+                path.append(current)
+        return path
+
+    def _first_step(self, s, t, door_open):
+        jump_point = super()._first_step(s, t, door_open)
+        if jump_point == NO_NODE:
+            return NO_NODE
+        step = self.graph.step[door_open]
+        return step[s * 4 + self._segment_dir(s, jump_point, step)]
@@ -0,0 +1,63 @@
+# pellet_index.py
+"""
+豆子索引 (Pellet Index)。
+
+豆子直接存在 TileGrid 的 tiles buffer 裡 (以格子 index 為 key 的陣列)，
+這裡另外維護「一般豆子」與「能量球」的即時數量:
+- eat_at 只做一次索引與一次寫入，回傳吃到的是什麼
+- 剩餘數量隨時可讀，不需要掃描地圖
+- 重置關卡時整塊複製樣板，數量直接用樣板的數量
+"""
+from tile_grid import CODE_EMPTY, CODE_PELLET, CODE_POWER_PELLET
+
+
+class PelletIndex:
+    """
+    屬性:
+        pellets: 剩餘的一般豆子數量
+        power_pellets: 剩餘的能量球數量
+        starting_pellets / starting_power_pellets: 關卡開始時的數量
+    """
+
+    def __init__(self, grid):
+        """
+        參數:
+            grid: 遊戲地圖 (TileGrid)，豆子被吃掉時會直接修改它
+        """
+        self.grid = grid
+        self.starting_pellets = grid.template.count(CODE_PELLET)
+        self.starting_power_pellets = grid.template.count(CODE_POWER_PELLET)
+        self.reset()
+
+    def reset(self):
+        """ 重置為關卡開始時的豆子 (一次 buffer 複製) """
+        self.grid.reset()
+        self.pellets = self.starting_pellets
+        self.power_pellets = self.starting_power_pellets
+
+    def eat_at(self, x, y):
+        """
+        吃掉 (x, y) 上的豆子。
+
+        回傳:
+            CODE_PELLET / CODE_POWER_PELLET，該格沒有豆子時回傳 None
+        """
+        grid = self.grid
+        i = grid.origin + y * grid.stride + x
+        code = grid.tiles[i]
+        if code == CODE_PELLET:
+            self.pellets -= 1
+        elif code == CODE_POWER_PELLET:
+            self.power_pellets -= 1
+        else:
+            return None
+        grid.tiles[i] = CODE_EMPTY
+        return code
+
+    def pellets_eaten(self):
+        """ 這一關已經吃掉的一般豆子數量 (水果出現的門檻) """
+        return self.starting_pellets - self.pellets
+
+    def remaining(self):
+        """ 剩餘的豆子總數 (含能量球) """
+        return self.pellets + self.power_pellets
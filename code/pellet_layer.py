@@ -0,0 +1,126 @@
+# pellet_layer.py
+"""
+持久的豆子圖層 (Pellet Layer)。
+
+豆子只有在被吃掉時才會改變，所以不必每幀重畫約 240 個圓:
+- 關卡開始時把「牆壁背景 + 一般豆子」畫成一張 surface，每幀只 blit 一次
+- 吃掉豆子時，只用背景把那一格蓋回去
+- 能量球 (最多 4 顆) 不畫進圖層，改由一小張 overlay 依閃爍狀態逐顆 blit
+
+每幀的豆子繪製成本因此固定，與剩餘的豆子數量無關。
+scale 不為 1 時整個圖層直接以螢幕倍率繪製 (給合成器使用，不必每幀縮放整張地圖)。
+"""
+import math
+import pygame
+from settings import *
+from tile_grid import CODE_PELLET, CODE_POWER_PELLET
+
+PELLET_RADIUS = 2
+POWER_PELLET_RADIUS = 6
+
+
+class PelletLayer:
+    """
+    屬性:
+        scale: 相對於遊戲內部解析度的倍率
+        surface: 背景 + 一般豆子 (地圖大小 × scale)
+        power_overlay: 一格大小的能量球圖
+        power_tiles: 剩餘能量球的網格座標
+        changed: 上次取出後改變過的區域 (給髒矩形渲染使用)
+    """
+
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.tile_size = TILE_SIZE * scale
+        self.surface = pygame.Surface((int(SCREEN_WIDTH * scale), int(MAP_HEIGHT * scale)))
+        self.background = None
+
+        overlay_size = int(math.ceil(self.tile_size))
+        self.power_overlay = pygame.Surface((overlay_size, overlay_size))
+        self.power_overlay.set_colorkey(BLACK)
+        self.power_overlay.fill(BLACK)
+        pygame.draw.circle(self.power_overlay, WHITE,
+                           (int(self.tile_size / 2), int(self.tile_size / 2)),
+                           max(1, round(POWER_PELLET_RADIUS * scale)))
+        self.power_tiles = set()
+        self.changed = []
+        self.blink_visible = True
+
+    def tile_rect(self, x, y):
+        """ 網格 (x, y) 在圖層上的範圍 """
+        ts = self.tile_size
+        left, top = int(x * ts), int(y * ts)
+        return pygame.Rect(left, top, int((x + 1) * ts) - left, int((y + 1) * ts) - top)
+
+    def rebuild(self, background, grid):
+        """
+        關卡開始時重畫整個圖層。
+
+        參數:
+            background: 靜態背景 (牆壁，大小與圖層相同)
+            grid: 遊戲地圖 (TileGrid)
+        """
+        self.background = background
+        self.surface.blit(background, (0, 0))
+        self.power_tiles.clear()
+        self.changed = []
+        ts = self.tile_size
+        radius = max(1, round(PELLET_RADIUS * self.scale))
+        for y in range(grid.height):
+            for x in range(grid.width):
+                code = grid.get(x, y)
+                if code == CODE_PELLET:
+                    pygame.draw.circle(self.surface, WHITE,
+                                       (int((x + 0.5) * ts), int((y + 0.5) * ts)), radius)
+                elif code == CODE_POWER_PELLET:
+                    self.power_tiles.add((x, y))
+
+    def erase(self, x, y):
+        """ 豆子被吃掉: 用背景蓋回那一格 """
+        rect = self.tile_rect(x, y)
+        self.changed.append(rect)
+        if (x, y) in self.power_tiles:
+            self.power_tiles.discard((x, y))
+            return
+        self.surface.blit(self.background, rect, rect)
+
+    def is_blink_visible(self, ticks):
+        return (ticks // POWER_PELLET_BLINK_INTERVAL) % 2 == 0
+
+    def take_changes(self, ticks):
+        """
+        取出上次呼叫後改變過的區域 (被吃掉的豆子、閃爍狀態切換的能量球)。
+        """
+        changed = self.changed
+        self.changed = []
+        visible = self.is_blink_visible(ticks)
+        if visible != self.blink_visible:
+            self.blink_visible = visible
+            for x, y in self.power_tiles:
+                changed.append(self.tile_rect(x, y))
+        return changed
+
+    def restore(self, target, rect):
+        """ 只把 rect 範圍內的圖層 (含目前閃爍狀態的能量球) 蓋回 target """
+        target.blit(self.surface, rect, rect)
+        if self.blink_visible:
+            for x, y in self.power_tiles:
+                tile = self.tile_rect(x, y)
+                if rect.colliderect(tile):
+                    target.blit(self.power_overlay, tile.topleft)
+
+    def draw(self, target, ticks, pos=(0, 0)):
+        """
+        把圖層畫到 target (會覆蓋整個地圖區域，不需要先 fill)。
+
+        參數:
+            ticks: 目前時間 (毫秒)，決定能量球閃爍
+            pos: 地圖左上角在 target 上的位置
+        """
+        target.blit(self.surface, pos)
+        self.changed = []
+        self.blink_visible = self.is_blink_visible(ticks)
+        if self.blink_visible:
+            for x, y in self.power_tiles:
+                tile = self.tile_rect(x, y)
+                target.blit(self.power_overlay, (pos[0] + tile.x, pos[1] + tile.y))
@@ -2,7 +2,8 @@
 import pygame
 from settings import *
 from entity import Entity
-import math
+from tile_grid import CODE_PELLET, CODE_POWER_PELLET
+from sprite_atlas import get_sprite_atlas
 
 
 class Player(Entity):
@@ -64,61 +65,35 @@ class Player(Entity):
                 return True  # 動畫結束
         return False
 
-    def draw(self, surface):
+    def get_sprite(self, atlas=None):
         """
-        繪製小精靈。
-        如果是普通狀態: 畫黃色圓形 + 黑色三角形(模擬嘴巴)。
-        如果是死亡狀態: 畫逐漸縮小的黃色圓形。
+        從 SpriteAtlas 取出目前狀態的圖 (atlas 預設為遊戲內部解析度的圖集)。
+        如果是普通狀態: 黃色圓形 + 黑色三角形(模擬嘴巴)。
+        如果是死亡狀態: 逐漸縮小的黃色圓形，縮到消失時回傳 None。
         """
+        if atlas is None:
+            atlas = get_sprite_atlas()
         if self.is_dying:
-            # 死亡動畫繪製: 旋轉 + 縮小
+            # 死亡動畫: 隨 scale 縮小
             current_radius = int(self.radius * self.death_anim_scale)
-            if current_radius > 0:
-                center = (int(self.pixel_x), int(self.pixel_y))
-                # 繪製簡單的黃色圓形，隨scale變小
-                pygame.draw.circle(surface, YELLOW, center, current_radius)
-                # 可以加個叉叉眼或其他效果，這裡先做簡單的縮小消失
-            return
-
-        # 計算嘴巴角度
-        start_angle = self.rotation_angle + self.current_mouth_angle
-        end_angle = self.rotation_angle + 360 - self.current_mouth_angle
-
-        # Pygame draw.arc 是畫線，畫實心小精靈比較適合用:
-        # 1. 畫滿版黃圓
-        # 2. 畫黑色三角形 (嘴巴) 蓋上去 -> 簡單有效
-
-        # 繪製黃色身體
-        center = (int(self.pixel_x), int(self.pixel_y))
-        pygame.draw.circle(surface, YELLOW, center, self.radius)
-
-        # 計算嘴巴三角形的三個頂點
-        # 頂點 1: 圓心
-        # 頂點 2: 上嘴唇外緣
-        # 頂點 3: 下嘴唇外緣
-
-        # 轉換角度為弧度 (Pygame 座標系: 0度是右邊, 順時針增加? 不, 數學是逆時針, Pygame 是順時針嗎?
-        # Pygame 的 math.cos/sin 通常吃弧度。
-        # 這裡簡單處理：
-        # 0 度 = 右 (1, 0)
-        # 90 度 = 下 (0, 1)
-        # 180 度 = 左 (-1, 0)
-        # 270 度 = 上 (0, -1)
-
-        p2_angle_rad = math.radians(
-            self.rotation_angle + self.current_mouth_angle)
-        p3_angle_rad = math.radians(
-            self.rotation_angle - self.current_mouth_angle)
-
-        p2_x = center[0] + self.radius * math.cos(p2_angle_rad)
-        p2_y = center[1] + self.radius * math.sin(p2_angle_rad)
-
-        p3_x = center[0] + self.radius * math.cos(p3_angle_rad)
-        p3_y = center[1] + self.radius * math.sin(p3_angle_rad)
-
-        # 繪製黑色三角形蓋住嘴巴
-        pygame.draw.polygon(
-            surface, BLACK, [center, (p2_x, p2_y), (p3_x, p3_y)])
+            if current_radius <= 0:
+                return None
+            return atlas.pacman_death(current_radius)
+        return atlas.pacman(self.current_mouth_angle, self.rotation_angle)
+
+    def draw(self, surface):
+        """
+        繪製小精靈 (目前狀態的圖，一次 blit)。
+
+        回傳:
+            實際畫到的範圍 (Rect)，沒有畫時為 None
+        """
+        atlas = get_sprite_atlas()
+        sprite = self.get_sprite(atlas)
+        if sprite is None:
+            return None
+        return surface.blit(sprite, (int(self.pixel_x) - atlas.center,
+                                     int(self.pixel_y) - atlas.center))
 
     def handle_input(self, event):
         """
@@ -144,7 +119,7 @@ class Player(Entity):
         3. 檢查是否吃到豆子或能量球
 
         參數:
-            game_map: 遊戲地圖資料 (二維陣列)
+            game_map: 遊戲地圖 (TileGrid)
             dt: Delta time (毫秒)，若為 0 則使用預設速度
 
         回傳: 
@@ -198,14 +173,9 @@ class Player(Entity):
                 next_grid_x = curr_x + self.next_direction[0]
                 next_grid_y = curr_y + self.next_direction[1]
 
-                can_turn = True
-                if is_wall(game_map, next_grid_x, next_grid_y):
-                    can_turn = False
-
-                # 特殊檢查: 門不能進 (除非有特定邏輯，一般 Play 不能進鬼屋)
-                if 0 <= next_grid_y < len(game_map) and 0 <= next_grid_x < len(game_map[0]):
-                    if game_map[next_grid_y][next_grid_x] == TILE_DOOR:
-                        can_turn = False
+                # 牆壁與門都不能進 (一般 Play 不能進鬼屋)
+                # TileGrid 四周有空白邊框，隧道口外一格不需要邊界檢查
+                can_turn = not game_map.is_blocked(next_grid_x, next_grid_y)
 
                 if can_turn:
                     self.direction = self.next_direction
@@ -227,18 +197,9 @@ class Player(Entity):
             next_grid_x = curr_x + self.direction[0]
             next_grid_y = curr_y + self.direction[1]
 
-            # 邊界檢查 (防止 Index Error) - 雖然 move 會 wrap，但這裡檢查牆壁
-            if 0 <= next_grid_y < len(game_map) and 0 <= next_grid_x < len(game_map[0]):
-                # 撞牆或撞門
-                if is_wall(game_map, next_grid_x, next_grid_y):
-                    can_move = False
-                if game_map[next_grid_y][next_grid_x] == TILE_DOOR:
-                    can_move = False
-            else:
-                # 超出地圖範圍，如果是隧道 (左右) 則允許
-                # 若是上下超出則不允許 (照理說不會發生)
-                if not (next_grid_x < 0 or next_grid_x >= len(game_map[0])):
-                    can_move = False
+            # 撞牆或撞門 (超出左右邊界的隧道口落在空白邊框上，允許通過)
+            if game_map.is_blocked(next_grid_x, next_grid_y):
+                can_move = False
 
         if can_move:
             self.move(dt_seconds)
@@ -250,12 +211,11 @@ class Player(Entity):
         # 取得最新的 grid 座標
         gx, gy = self.get_grid_pos()
 
-        # 邊界保護
-        if 0 <= gy < len(game_map) and 0 <= gx < len(game_map[0]):
-            tile = game_map[gy][gx]
-            if tile == TILE_PELLET:
-                return EVENT_ATE_PELLET
-            elif tile == TILE_POWER_PELLET:
-                return EVENT_ATE_POWER_PELLET
+        # 隧道口外的空白邊框為 CODE_EMPTY，不需要邊界保護
+        tile = game_map.get(gx, gy)
+        if tile == CODE_PELLET:
+            return EVENT_ATE_PELLET
+        elif tile == CODE_POWER_PELLET:
+            return EVENT_ATE_POWER_PELLET
 
         return None
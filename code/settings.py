@@ -3,7 +3,6 @@
 此檔案包含遊戲的所有全域常數與設定。
 包括: 螢幕大小、顏色定義、遊戲參數(速度/時間)、地圖資料以及輔助函式。
 """
-import pygame
 
 # * 遊戲架構有關常數
 # 遊戲視窗
@@ -27,46 +26,20 @@ GREY = (150, 150, 150)
 FRIGHTENED_BLUE = (0, 0, 139)
 GREEN = (0, 255, 0)
 
-# 字型設定
-# 初始化字型模組
-pygame.font.init()
-SCORE_FONT = pygame.font.Font(None, 24)
-GAME_OVER_FONT = pygame.font.Font(None, 64)
-WIN_FONT = pygame.font.Font(None, 64)
-LOG_FONT = pygame.font.Font(None, 20)
+# 字型設定 (字型本身由 fonts.init_fonts() 在開視窗時建立，import 設定檔不會初始化字型模組)
+SCORE_FONT_SIZE = 24
+GAME_OVER_FONT_SIZE = 64
+WIN_FONT_SIZE = 64
+LOG_FONT_SIZE = 20
 
 # --- High Score System ---
+# 排行榜 (leaderboard.py): SQLite，由背景執行緒寫入
+LEADERBOARD_FILE = "leaderboard.db"
+LEADERBOARD_SIZE = 10
+LEADERBOARD_QUEUE_SIZE = 1024
+# 舊版的最高分檔案 (排行榜是空的時候匯入一次)
 HIGH_SCORE_FILE = "high_score.txt"
 
-
-def load_high_score():
-    """ 
-    從檔案讀取最高分。
-    如果檔案不存在或格式錯誤，回傳 0。
-    """
-    try:
-        with open(HIGH_SCORE_FILE, "r") as f:
-            return int(f.read())
-    except:
-        return 0
-
-
-def save_high_score(score):
-    """ 
-    儲存最高分到檔案。
-
-    參數:
-        score: 要儲存的分數整數
-    """
-    try:
-        with open(HIGH_SCORE_FILE, "w") as f:
-            f.write(str(int(score)))
-    except:
-        pass
-
-
-high_score = load_high_score()
-
 # * 運作常數
 
 # 時間與速度常數
@@ -76,6 +49,41 @@ SPEED = 2  # 玩家與鬼的基本速度 (每幀像素)
 FRIGHTENED_DURATION = 7000  # 7 秒
 SCATTER_DURATION = 7000   # 散開 7 秒
 CHASE_DURATION = 20000    # 追逐 20 秒
+POWER_PELLET_BLINK_INTERVAL = 250  # 能量球閃爍間隔 (毫秒)
+
+# 固定時間步長: 模擬固定以 SIM_TICK_RATE 執行，畫面更新率獨立 (位置在兩個 tick 之間內插)
+SIM_TICK_RATE = 60
+SIM_DT = 1000 / SIM_TICK_RATE  # 每個模擬 tick 的毫秒數
+MAX_FRAME_TIME = 250  # 一幀最多補跑這麼多毫秒的模擬 (卡頓後不會一次補跑太多)
+RENDER_FPS_LIMIT = 240  # 畫面更新率上限 (0 = 不限制)
+
+# 髒矩形渲染 (只重畫有變動的區域，用 pygame.display.update(rects) 更新)
+DIRTY_RECT_RENDERING = False
+
+# 遊戲畫面縮放方式
+SCALE_MODE_BLIT = "BLIT"        # 1 倍: 直接 blit
+SCALE_MODE_INTEGER = "INTEGER"  # 2 倍以上的整數倍: 最近鄰縮放
+SCALE_MODE_FRACTIONAL = "FRACTIONAL"  # 非整數倍: pygame.transform.scale
+# 縮放比例與整數倍只差這麼多時，改用整數倍 (畫面略小，但線條清晰且較快)
+INTEGER_SCALE_SNAP = 0.1
+
+# 分層合成器: 縮放比例不為 1 時，牆壁 / 豆子 / 角色直接以螢幕倍率繪製 (不縮放整張畫面)
+LAYERED_COMPOSITOR = True
+
+# Log 系統 (log_sink.py)
+LOG_DEBUG = 10    # 高頻訊息 (例如每次能量球時四隻鬼的驚嚇 / 解除驚嚇)
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+LOG_LEVEL = LOG_INFO  # 低於此等級的訊息在呼叫端就被略過 (不格式化、不輸出)
+LOG_FILE = None       # None: 寫到 stdout；檔名: 寫入檔案並依大小輪替
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_QUEUE_SIZE = 4096  # 背景寫入佇列上限 (滿了就丟棄並計數，不會卡住遊戲迴圈)
+
+# 遊戲遙測 (telemetry.py): 結構化事件，一行一個 JSON
+TELEMETRY_FILE = "telemetry.jsonl"  # None: 關閉遙測
+TELEMETRY_QUEUE_SIZE = 8192
 
 
 # 新增生命值常數
@@ -102,8 +110,15 @@ GAME_STATE_PAUSED = "PAUSED"  # 新增暫停狀態
 ALGO_GREEDY = "GREEDY"
 ALGO_BFS = "BFS"
 ALGO_ASTAR = "ASTAR"
+ALGO_DIJKSTRA = "DIJKSTRA"
+ALGO_BIBFS = "BIBFS"
+ALGO_JPS = "JPS"
 ALGO_VISUAL = "VISUAL"
 
+# 鬼魂只在路口 (Junction) 做路徑搜尋，走廊上直接沿路前進
+# 預設關閉: 開啟後鬼魂在走廊上不會因為目標移動而中途回頭，行為與原本每格搜尋不同
+GHOST_JUNCTION_PLANNING = False
+
 # 全域控制
 MODE_SCATTER = "SCATTER"
 MODE_CHASE = "CHASE"
@@ -176,26 +191,3 @@ MAP_STRINGS = [
 # 2. 自動補齊地圖字串長度 (避免 IndexError)
 MAX_MAP_WIDTH = max(len(row) for row in MAP_STRINGS)
 MAP_STRINGS = [row.ljust(MAX_MAP_WIDTH, ' ') for row in MAP_STRINGS]
-
-# 將字串地圖轉換成可修改的列表 (List)
-GAME_MAP = [list(row) for row in MAP_STRINGS]
-
-
-def is_wall(game_map, x, y):
-    """
-    檢查給定座標是否為牆壁。
-
-    參數:
-        game_map: 二維地圖陣列
-        x, y: 網格座標 (Grid Coordinates)
-
-    回傳:
-        True: 是牆壁
-        False: 可通行 (包含空地、豆子、或超出地圖範圍的隧道)
-    """
-    # 檢查是否在地圖範圍內
-    if 0 <= y < len(game_map):
-        if 0 <= x < len(game_map[y]):
-            return game_map[y][x] == TILE_WALL
-    # 超出範圍 (例如隧道口)，視為非牆壁，可通行
-    return False
@@ -0,0 +1,526 @@
+# simulation.py
+"""
+不需要視窗的遊戲核心 (Headless Simulation)。
+
+原本所有規則都寫在 Game.update 裡，計時又讀 pygame.time.get_ticks()，
+所以規則只能在開著視窗、以真實時間的速度執行。
+Simulation 擁有玩家、鬼魂、地圖、計時器與計分，時間只來自注入的時鐘 (TickClock)，
+每呼叫一次 step(action) 前進一個 tick:
+- Game 只負責輸入與畫面，每個 tick 呼叫一次 step
+- 沒有 SDL 視訊的批次模擬可以不限速度地連續呼叫 step
+
+Simulation 不碰任何 Surface。畫面需要知道的變化 (被吃掉的豆子、新關卡) 用
+take_eaten_tiles() / map_version 交給呼叫端。
+"""
+import math
+import random
+from settings import *
+from player import Player
+from ghost import Ghost
+from flow_field import FlowFieldService
+from path_cache import PathCache
+from tile_grid import TileGrid, CODE_PELLET, CODE_POWER_PELLET
+from pellet_index import PelletIndex
+from telemetry import (EVENT_LEVEL_START, EVENT_PELLET, EVENT_POWER_PELLET,
+                       EVENT_GHOST_EATEN, EVENT_DEATH, EVENT_MODE_SWITCH,
+                       EVENT_FRUIT_SPAWN, EVENT_FRUIT_COLLECT)
+
+# READY! / GO! 動畫的長度 (毫秒)
+READY_DURATION = 3000
+# 水果出現後多久消失 (毫秒)
+FRUIT_DURATION = 10000
+
+# step(action) 的動作 (None 或 ACTION_NONE 表示維持目前的方向)
+ACTION_NONE = 0
+ACTION_UP = 1
+ACTION_DOWN = 2
+ACTION_LEFT = 3
+ACTION_RIGHT = 4
+ACTION_DIRECTIONS = {
+    ACTION_UP: (0, -1),
+    ACTION_DOWN: (0, 1),
+    ACTION_LEFT: (-1, 0),
+    ACTION_RIGHT: (1, 0),
+}
+
+
+class TickClock:
+    """
+    模擬時鐘: 只有在 Simulation.step 時前進，與真實時間無關。
+    (任何有 now() / advance(dt) 的物件都可以注入給 Simulation)
+    """
+
+    def __init__(self, start=0):
+        self.time = start
+
+    def now(self):
+        """ 目前的模擬時間 (毫秒) """
+        return self.time
+
+    def advance(self, dt):
+        self.time += dt
+
+
+class Simulation:
+    """
+    一場遊戲的規則與狀態。
+
+    屬性:
+        state: GAME_STATE_START / READY / PLAYING / DEATH / GAME_OVER / WIN
+        frame: 已經跑了幾個 tick
+        player / ghosts / game_map / pellets: 遊戲物件
+        map_version: 每開始新的一關加 1 (畫面需要重畫整張豆子圖層)
+    """
+
+    def __init__(self, algorithm=ALGO_ASTAR, clock=None, on_log=None, telemetry=None, seed=None,
+                 use_tables=True):
+        """
+        參數:
+            algorithm: 鬼魂的演算法 (ALGO_VISUAL 時實際使用 visual_mode_current_algo)
+            clock: 注入的時鐘 (預設為新的 TickClock)
+            on_log: Log callback on_log(訊息, 顏色, 等級, *格式化參數)，None 表示不輸出
+            telemetry: 遙測 (Telemetry)，None 表示不送出事件
+            seed: 這場遊戲的亂數種子 (None 表示隨機產生一個)；
+                  同樣的種子、演算法與輸入會得到完全相同的遊戲
+            use_tables: 鬼魂是否可以用距離表、流場與路徑快取 (False: 每次決策都實際搜尋，
+                        pathfinder_stats() 才是演算法真正的搜尋量；遊戲結果不變，只是比較慢)
+        """
+        self.clock = clock if clock is not None else TickClock()
+        self.seed_rng(seed)
+        self.on_log = on_log
+        self.telemetry = telemetry
+        self.use_tables = use_tables
+        self.frame = 0
+
+        # Game State Variables
+        self.state = GAME_STATE_START
+        self.player_lives = MAX_LIVES
+        self.current_level = 1
+        self.selected_algorithm = algorithm
+        self.visual_mode_current_algo = ALGO_ASTAR  # Default for visual mode
+
+        # Entities
+        self.player = None
+        self.ghosts = []
+
+        # Level Specifics
+        self.game_map = TileGrid(MAP_STRINGS)  # Mutable map (bytearray)
+        self.pellets = PelletIndex(self.game_map)  # Live pellet counts
+        self.eaten_tiles = []
+        self.map_version = 0
+        self.frightened_mode = False
+        self.frightened_start_time = 0
+        self.level_frightened_duration = FRIGHTENED_DURATION
+
+        # Ghost Modes
+        self.global_ghost_mode = MODE_SCATTER
+        self.last_mode_switch_time = 0
+
+        # Animation
+        self.ready_start_time = 0
+
+        # Bonus Fruit
+        self.fruit_active = False
+        self.fruit_spawn_time = 0
+        self.fruit_score = 100
+        self.fruit_pos = (14, 29)
+        self.fruits_spawned = 0
+        self.initial_log_shown = False
+
+        # Pre-calculated Paths (Scatter targets)
+        self.path_blinky = [(26, 1), (26, 5), (21, 5), (21, 1)]
+        self.path_pinky = [(1, 1), (1, 5), (6, 5), (6, 1)]
+        self.path_inky = [(26, 29), (26, 26), (21, 26), (21, 29)]
+        self.path_clyde = [(1, 29), (1, 26), (6, 26), (6, 29)]
+
+        # Shared flow fields (one reverse BFS per distinct ghost target)
+        self.flow_fields = FlowFieldService()
+
+        # Shared LRU path cache (Ghost.update + VISUAL overlay)
+        self.path_cache = PathCache()
+
+        # 統計 (鬼魂每次重置都會重新建立，舊鬼魂的搜尋次數先累計在這裡)
+        self.ghosts_eaten = 0
+        self.retired_searches = 0
+        self.retired_nodes_expanded = 0
+
+    # --- Log / 遙測 ---
+
+    def log(self, message, color=WHITE, level=LOG_INFO, *args):
+        """ 輸出 Log (有 args 時 message 是 % 格式字串，由 on_log 在等級檢查之後才格式化) """
+        if self.on_log is not None:
+            self.on_log(message, color, level, *args)
+
+    def emit_event(self, event, **fields):
+        """ 送出一個遙測事件 (自動帶上目前的幀數與模擬時間) """
+        if self.telemetry is not None:
+            self.telemetry.emit(event, self.frame, int(self.now()), **fields)
+
+    def now(self):
+        """ 目前的模擬時間 (毫秒) """
+        return self.clock.now()
+
+    def seed_rng(self, seed=None):
+        """
+        設定這場遊戲的亂數產生器 (所有鬼魂共用，不使用模組層級的 random)。
+        seed 為 None 時隨機產生一個並記在 self.seed，之後仍然可以用它重現這場遊戲。
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    # --- 關卡 ---
+
+    def reset(self, seed=None):
+        """
+        從第一關重新開始並直接進入 READY (批次模擬用，等同選單選好演算法後按下方向鍵)。
+
+        參數:
+            seed: 重新設定亂數種子 (None 表示沿用目前的亂數產生器)
+        """
+        if seed is not None:
+            self.seed_rng(seed)
+        self.player = None
+        self.ghosts = []
+        self.player_lives = MAX_LIVES
+        self.current_level = 1
+        self.ghosts_eaten = 0
+        self.retired_searches = 0
+        self.retired_nodes_expanded = 0
+        self.init_level(new_level=True)
+        self.start()
+
+    def start(self):
+        """ 開始 READY! 倒數 """
+        self.state = GAME_STATE_READY
+        self.ready_start_time = self.now()
+
+    def init_level(self, new_level=False):
+        """
+        初始化關卡狀態。
+
+        參數:
+            new_level: 是否為新的一關 (重置地圖豆子)。
+                       如果為 False，通常只是玩家死亡後重置位置 (豆子保留)。
+        """
+        # Reset Map
+        if new_level:
+            # Copy the level template back into the map buffer
+            self.pellets.reset()
+            self.eaten_tiles = []
+            self.map_version += 1
+            self.log("--- Level %s Started (seed %s) ---", YELLOW, LOG_INFO,
+                     self.current_level, self.seed)
+
+        # Difficulty
+        speed_bonus = (self.current_level - 1) * 0.1
+        level_speed = min(SPEED + speed_bonus, 5.0)
+
+        duration_reduction = (self.current_level - 1) * 500
+        self.level_frightened_duration = max(
+            FRIGHTENED_DURATION - duration_reduction, 2000)
+
+        if new_level:
+            self.log("Difficulty Up! Speed: %.1f, Fright: %ss", CYAN, LOG_INFO,
+                     level_speed, self.level_frightened_duration / 1000)
+            self.fruits_spawned = 0
+            self.fruit_active = False
+            self.initial_log_shown = False
+            self.log("Total pellets: %s (+%s power)", WHITE, LOG_INFO,
+                     self.pellets.pellets, self.pellets.power_pellets)
+            self.emit_event(EVENT_LEVEL_START, level=self.current_level,
+                            algorithm=self.selected_algorithm, seed=self.seed,
+                            pellets=self.pellets.pellets,
+                            power_pellets=self.pellets.power_pellets)
+
+        old_score = 0
+        old_lives = MAX_LIVES
+
+        if self.player:
+            old_score = self.player.score
+            old_lives = self.player.lives
+
+        self.player = Player(14, 23, speed=level_speed)
+        self.player.score = old_score
+        self.player.lives = old_lives
+
+        # Determine Ghost Algorithm
+        ghost_algo = self.selected_algorithm
+        if self.selected_algorithm == ALGO_VISUAL:
+            ghost_algo = self.visual_mode_current_algo
+
+        # Reset Ghosts
+        self.retire_pathfinder_stats()
+        on_log = self.log if self.on_log is not None else None
+        flow_fields = self.flow_fields if self.use_tables else None
+        path_cache = self.path_cache if self.use_tables else None
+        blinky = Ghost(13, 14, RED, ai_mode=AI_CHASE_BLINKY,
+                       scatter_point=self.path_blinky, in_house=True, delay=0,
+                       on_log=on_log, algorithm=ghost_algo, speed=level_speed,
+                       flow_fields=flow_fields, path_cache=path_cache,
+                       rng=self.rng, use_tables=self.use_tables)
+        pinky = Ghost(14, 14, PINK, ai_mode=AI_CHASE_PINKY,
+                      scatter_point=self.path_pinky, in_house=True, delay=3000,
+                      on_log=on_log, algorithm=ghost_algo, speed=level_speed,
+                      flow_fields=flow_fields, path_cache=path_cache,
+                      rng=self.rng, use_tables=self.use_tables)
+        inky = Ghost(12, 14, CYAN, ai_mode=AI_CHASE_INKY, scatter_point=self.path_inky,
+                     in_house=True, delay=6000,
+                     on_log=on_log, algorithm=ghost_algo, speed=level_speed,
+                     flow_fields=flow_fields, path_cache=path_cache,
+                     rng=self.rng, use_tables=self.use_tables)
+        clyde = Ghost(15, 14, ORANGE, ai_mode=AI_CHASE_CLYDE,
+                      scatter_point=self.path_clyde, in_house=True, delay=9000,
+                      on_log=on_log, algorithm=ghost_algo, speed=level_speed,
+                      flow_fields=flow_fields, path_cache=path_cache,
+                      rng=self.rng, use_tables=self.use_tables)
+
+        self.ghosts = [blinky, pinky, inky, clyde]
+
+        # Static flow fields: going home and exiting the house never change
+        self.flow_fields.add_static_target(GHOST_HOUSE_EXIT_POS, door_open=True)
+        for ghost in self.ghosts:
+            self.flow_fields.add_static_target(ghost.home_pos, door_open=True)
+
+        # Reset modes
+        self.frightened_mode = False
+        self.global_ghost_mode = MODE_SCATTER
+        self.last_mode_switch_time = self.now()
+
+    def set_ghost_algorithm(self, algorithm):
+        """ VISUAL 模式: 切換所有鬼魂的演算法 (先把舊演算法的統計寫進 Log) """
+        self.log_pathfinder_stats()
+        self.retire_pathfinder_stats()
+        self.visual_mode_current_algo = algorithm
+        for ghost in self.ghosts:
+            ghost.set_algorithm(algorithm)
+
+    def log_pathfinder_stats(self):
+        """ 把目前演算法累計展開的節點數寫進 Log """
+        searches = sum(ghost.pathfinder.searches for ghost in self.ghosts)
+        expanded = sum(ghost.pathfinder.nodes_expanded for ghost in self.ghosts)
+        if self.ghosts:
+            self.log("%s: %s searches, %s nodes expanded", GREY, LOG_INFO,
+                     self.ghosts[0].algorithm, searches, expanded)
+
+    def retire_pathfinder_stats(self):
+        """ 鬼魂 (或演算法) 被換掉之前，把它們的搜尋統計累計起來 """
+        for ghost in self.ghosts:
+            self.retired_searches += ghost.pathfinder.searches
+            self.retired_nodes_expanded += ghost.pathfinder.nodes_expanded
+
+    def pathfinder_stats(self):
+        """
+        回傳:
+            整場遊戲累計的 (搜尋次數, 展開的節點數)
+        """
+        searches = self.retired_searches + sum(ghost.pathfinder.searches for ghost in self.ghosts)
+        expanded = self.retired_nodes_expanded + sum(
+            ghost.pathfinder.nodes_expanded for ghost in self.ghosts)
+        return searches, expanded
+
+    def take_eaten_tiles(self):
+        """ 取出上次呼叫後被吃掉的豆子格子 (畫面用來更新豆子圖層) """
+        tiles = self.eaten_tiles
+        self.eaten_tiles = []
+        return tiles
+
+    def save_previous_positions(self):
+        """ 記下每個角色在這個 tick 之前的位置 (繪圖內插用) """
+        if self.player:
+            self.player.save_previous()
+        for ghost in self.ghosts:
+            ghost.save_previous()
+
+    def is_over(self):
+        return self.state in (GAME_STATE_GAME_OVER, GAME_STATE_WIN)
+
+    # --- 主邏輯 ---
+
+    def step(self, action=None, dt=SIM_DT):
+        """
+        前進一個 tick。
+        包含: READY 倒數、死亡動畫、鬼魂行為、玩家移動、碰撞偵測、水果生成、勝利判定等。
+        必須先呼叫 reset() (或 init_level() + start()) 建立角色；
+        在那之前 (GAME_STATE_START) 只會推進時鐘，action 會被忽略。
+
+        參數:
+            action: ACTION_* (None / ACTION_NONE 表示維持目前的方向)
+            dt: 這個 tick 的長度 (毫秒)
+
+        回傳:
+            這個 tick 之後的 state
+        """
+        if action and self.player is not None:
+            self.player.next_direction = ACTION_DIRECTIONS[action]
+
+        self.save_previous_positions()
+        self.clock.advance(dt)
+        self.frame += 1
+        current_time = self.now()
+
+        # Ready Animation Logic
+        if self.state == GAME_STATE_READY:
+            elapsed = current_time - self.ready_start_time
+            if elapsed > READY_DURATION:
+                self.state = GAME_STATE_PLAYING
+                self.last_mode_switch_time = current_time
+                self.log("Level %s Start! Algo: %s", YELLOW, LOG_INFO,
+                         self.current_level, self.selected_algorithm)
+
+        # Death Animation
+        elif self.state == GAME_STATE_DEATH:
+            anim_done = self.player.update_death_anim()
+            if anim_done:
+                self.player.lives -= 1
+                self.player_lives = self.player.lives  # Sync for HUD
+                if self.player.lives > 0:
+                    self.log("Lives: %s, Resetting...", YELLOW, LOG_INFO, self.player.lives)
+                    self.init_level(new_level=False)
+                    self.start()
+                else:
+                    self.state = GAME_STATE_GAME_OVER
+                    self.log("Game Over.", RED)
+
+        elif self.state == GAME_STATE_PLAYING:
+            self.update_playing(dt, current_time)
+
+        return self.state
+
+    def update_playing(self, dt, current_time):
+        """ PLAYING 狀態的一個 tick """
+        if not self.frightened_mode:
+            time_passed = current_time - self.last_mode_switch_time
+
+            # Check initial log
+            if not self.initial_log_shown and time_passed > 100:
+                self.log(">> Init Mode: %s", YELLOW, LOG_INFO, self.global_ghost_mode)
+                self.initial_log_shown = True
+
+            # Mode Switching
+            if self.global_ghost_mode == MODE_SCATTER and time_passed > SCATTER_DURATION:
+                self.global_ghost_mode = MODE_CHASE
+                self.last_mode_switch_time = current_time
+                self.log(">> Mode Switch: CHASE", RED)
+                self.emit_event(EVENT_MODE_SWITCH, mode=MODE_CHASE)
+            elif self.global_ghost_mode == MODE_CHASE and time_passed > CHASE_DURATION:
+                self.global_ghost_mode = MODE_SCATTER
+                self.last_mode_switch_time = current_time
+                self.log(">> Mode Switch: SCATTER", GREEN)
+                self.emit_event(EVENT_MODE_SWITCH, mode=MODE_SCATTER)
+
+        # Update Ghosts
+        blinky_pos_for_inky = (
+            self.ghosts[0].grid_x, self.ghosts[0].grid_y)
+        for ghost in self.ghosts:
+            if (not ghost.is_frightened and not ghost.is_eaten and
+                    ghost.current_ai_mode not in [MODE_GO_HOME, MODE_EXIT_HOUSE, MODE_WAITING]):
+                if self.global_ghost_mode == MODE_SCATTER:
+                    ghost.current_ai_mode = MODE_SCATTER
+                elif self.global_ghost_mode == MODE_CHASE:
+                    ghost.current_ai_mode = ghost.ai_mode
+
+            ghost.update(self.game_map, self.player, dt,
+                         self.global_ghost_mode, blinky_pos_for_inky)
+
+        # Update Frightened Timer
+        if self.frightened_mode:
+            if current_time - self.frightened_start_time > self.level_frightened_duration:
+                self.frightened_mode = False
+                self.log(
+                    "Frightened mode ended. Ghosts normal.", WHITE)
+                for ghost in self.ghosts:
+                    ghost.end_frightened()
+                self.last_mode_switch_time = current_time
+
+        # Update Player
+        player_event = self.player.update(self.game_map, dt)
+
+        # Logic for Player Events
+        if player_event:
+            px, py = self.player.get_grid_pos()
+
+            # eat_at returns None if the tile was already eaten
+            eaten = self.pellets.eat_at(px, py)
+            if eaten is not None:
+                self.eaten_tiles.append((px, py))
+
+                if eaten == CODE_PELLET:
+                    self.player.score += PELLELETS_POINT
+                    self.emit_event(EVENT_PELLET, x=px, y=py, score=self.player.score,
+                                    remaining=self.pellets.pellets)
+
+                elif eaten == CODE_POWER_PELLET:
+                    self.player.score += POWER_PELLET_POINT
+                    self.frightened_mode = True
+                    self.frightened_start_time = current_time
+                    self.emit_event(EVENT_POWER_PELLET, x=px, y=py, score=self.player.score,
+                                    remaining=self.pellets.power_pellets)
+                    self.log(
+                        "Power Pellet eaten! Ghosts Frightened!", CYAN)
+                    for ghost in self.ghosts:
+                        ghost.start_frightened()
+
+            # Bonus Fruit Logic
+            pellets_eaten = self.pellets.pellets_eaten()
+            if not self.fruit_active and self.fruits_spawned < 2:
+                should_spawn = False
+                if self.fruits_spawned == 0 and pellets_eaten >= 70:
+                    should_spawn = True
+                elif self.fruits_spawned == 1 and pellets_eaten >= 170:
+                    should_spawn = True
+
+                if should_spawn:
+                    self.fruit_active = True
+                    self.fruit_spawn_time = current_time
+                    self.fruits_spawned += 1
+                    self.fruit_score = 100 * self.current_level
+                    self.log("Bonus Fruit Appeared! (%s pts)", PINK, LOG_INFO, self.fruit_score)
+                    self.emit_event(EVENT_FRUIT_SPAWN, x=self.fruit_pos[0], y=self.fruit_pos[1],
+                                    points=self.fruit_score, pellets_eaten=pellets_eaten)
+
+        # Fruit Timer & Collision
+        if self.fruit_active:
+            if current_time - self.fruit_spawn_time > FRUIT_DURATION:
+                self.fruit_active = False
+                self.log("Fruit disappeared...", GREY)
+            else:
+                fx, fy = self.fruit_pos[0] * TILE_SIZE + \
+                    TILE_SIZE//2, self.fruit_pos[1] * \
+                    TILE_SIZE + TILE_SIZE//2
+                dist = math.hypot(self.player.pixel_x -
+                                  fx, self.player.pixel_y - fy)
+                if dist < self.player.radius + 15:
+                    self.fruit_active = False
+                    self.player.score += self.fruit_score
+                    self.log("Yummy! Bonus Fruit: %s", PINK, LOG_INFO, self.fruit_score)
+                    self.emit_event(EVENT_FRUIT_COLLECT, points=self.fruit_score,
+                                    score=self.player.score)
+
+        # Victory Check
+        if self.pellets.pellets <= 0:
+            self.state = GAME_STATE_WIN
+            self.log("VICTORY! All pellets cleared!", GREEN)
+
+        # Collision Detection
+        for ghost in self.ghosts:
+            dx = self.player.pixel_x - ghost.pixel_x
+            dy = self.player.pixel_y - ghost.pixel_y
+            distance = math.hypot(dx, dy)
+            collision_distance = self.player.radius + ghost.radius
+
+            if distance < collision_distance:
+                if ghost.is_frightened:
+                    ghost.eat()
+                    self.ghosts_eaten += 1
+                    self.player.score += GHOST_POINT
+                    self.emit_event(EVENT_GHOST_EATEN, ghost=ghost.ai_mode,
+                                    x=ghost.grid_x, y=ghost.grid_y, score=self.player.score)
+                elif not ghost.is_eaten:
+                    self.log("Ghost collision!", RED)
+                    self.emit_event(EVENT_DEATH, ghost=ghost.ai_mode,
+                                    x=ghost.grid_x, y=ghost.grid_y,
+                                    lives=self.player.lives, score=self.player.score)
+                    self.state = GAME_STATE_DEATH
+                    self.player.start_death_anim()
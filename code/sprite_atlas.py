@@ -0,0 +1,217 @@
+# sprite_atlas.py
+"""
+預先繪製的角色圖集 (Sprite Atlas)。
+
+鬼魂每幀要畫圓、方塊、三隻腳 (含 math.sin) 與四個眼睛，
+小精靈每幀要重算三角函數與嘴巴多邊形。
+這些外觀其實只有有限幾種狀態，所以每種狀態只畫一次並快取起來，
+Ghost.draw / Player.draw 只剩一次 blit:
+- 鬼魂: 顏色 × 腳的相位 × 眼睛方向
+- 驚嚇中的鬼魂: 腳的相位 × (藍 / 白閃爍)
+- 被吃掉的鬼魂: 眼睛方向 (只有眼睛)
+- 小精靈: 嘴巴角度 × 旋轉角度，以及死亡動畫的每個半徑
+- 獎勵水果
+
+所有尺寸都乘上圖集的 scale，合成器可以直接在螢幕倍率下重畫一份清晰的圖集。
+
+圖片在第一次用到時繪製，Game 啟動時會呼叫 prerender() 先畫好常用的狀態。
+"""
+import math
+import pygame
+from settings import *
+
+# 每張圖 (縮放前) 的大小
+SPRITE_SIZE = TILE_SIZE * 2
+
+# 透明色 (不會出現在角色上的顏色，嘴巴的黑色需要保留)
+COLORKEY = (255, 0, 255)
+
+# 與 Entity 相同的角色半徑
+ACTOR_RADIUS = TILE_SIZE // 2 - 2
+
+# 腳的擺動: 原本為 sin(ticks * 0.01 + i) * 2，週期約 628 毫秒，切成 LEG_PHASES 格
+LEG_PERIOD = 628
+LEG_PHASES = 16
+LEG_AMPLITUDE = 2
+
+FRIGHTENED_EYE_COLOR = (255, 200, 200)
+
+# 眼睛可能看的方向 (停住時為 (0, 0))
+EYE_DIRECTIONS = [(0, 0), (0, -1), (0, 1), (-1, 0), (1, 0)]
+
+# 小精靈的旋轉角度 (右、下、左、上) 與嘴巴角度 (0~50 度，每次 5 度)
+PACMAN_ROTATIONS = [0, 90, 180, 270]
+PACMAN_MOUTH_ANGLES = range(0, 55, 5)
+
+
+def _draw_eyes(atlas, sprite, direction):
+    """ 繪製眼睛與眼珠 (眼珠往 direction 偏移) """
+    px = atlas.px
+    center = (atlas.center, atlas.center)
+    eye_radius = px(4)
+    pupil_radius = px(2)
+    eye_offset_x = px(4)
+    eye_offset_y = -px(2)
+
+    look_x = direction[0] * px(2)
+    look_y = direction[1] * px(2)
+
+    for side in (-1, 1):
+        eye_pos = (center[0] + side * eye_offset_x, center[1] + eye_offset_y)
+        pygame.draw.circle(sprite, WHITE, eye_pos, eye_radius)
+        pygame.draw.circle(sprite, BLUE, (int(eye_pos[0] + look_x),
+                                          int(eye_pos[1] + look_y)), pupil_radius)
+
+
+def _draw_ghost_body(atlas, sprite, color, phase):
+    """ 身體: 上半圓 + 下半方 + 三隻會擺動的腳 """
+    center = (atlas.center, atlas.center)
+    radius = atlas.px(ACTOR_RADIUS)
+
+    pygame.draw.circle(sprite, color, center, radius)
+    pygame.draw.rect(sprite, color, pygame.Rect(
+        center[0] - radius, center[1], radius * 2, radius))
+
+    leg_radius = radius // 3
+    t = (phase + 0.5) * 2 * math.pi / LEG_PHASES
+    for i in range(3):
+        lx = center[0] - radius + (i * 2 * leg_radius) + leg_radius
+        ly = center[1] + radius
+        offset = math.sin(t + i) * LEG_AMPLITUDE * atlas.scale
+        pygame.draw.circle(sprite, color, (int(lx), int(ly + offset)), leg_radius)
+
+
+def _draw_pacman(atlas, sprite, mouth_angle, rotation_angle):
+    """
+    黃色圓 + 黑色三角形 (嘴巴)。
+    角度: 0 度 = 右、90 度 = 下、180 度 = 左、270 度 = 上 (Pygame 的 y 軸朝下)。
+    """
+    center = (atlas.center, atlas.center)
+    radius = atlas.px(ACTOR_RADIUS)
+    pygame.draw.circle(sprite, YELLOW, center, radius)
+
+    p2_angle_rad = math.radians(rotation_angle + mouth_angle)
+    p3_angle_rad = math.radians(rotation_angle - mouth_angle)
+    p2 = (center[0] + radius * math.cos(p2_angle_rad),
+          center[1] + radius * math.sin(p2_angle_rad))
+    p3 = (center[0] + radius * math.cos(p3_angle_rad),
+          center[1] + radius * math.sin(p3_angle_rad))
+    pygame.draw.polygon(sprite, BLACK, [center, p2, p3])
+
+
+def _draw_fruit(atlas, sprite):
+    """ 水果 (兩顆櫻桃 + 梗)，中心為水果所在格子的中心 """
+    px = atlas.px
+    c = atlas.center
+    line_width = max(1, px(2))
+    pygame.draw.circle(sprite, RED, (c - px(4), c + px(2)), px(5))
+    pygame.draw.circle(sprite, RED, (c + px(4), c + px(6)), px(5))
+    pygame.draw.line(sprite, GREEN, (c - px(4), c + px(2)), (c, c - px(6)), line_width)
+    pygame.draw.line(sprite, GREEN, (c + px(4), c + px(6)), (c, c - px(6)), line_width)
+
+
+class SpriteAtlas:
+    """
+    以狀態為 key 快取角色圖片。
+
+    屬性:
+        scale: 繪製的縮放比例 (1 = 遊戲內部解析度，合成器會建立螢幕倍率的圖集)
+        size / center: 每張圖的大小與角色中心 (blit 位置 = 角色中心 - center)
+        sprites: {狀態 key: Surface}
+        rendered: 實際繪製過幾張圖
+    """
+
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.size = int(round(SPRITE_SIZE * scale))
+        self.center = self.size // 2
+        self.sprites = {}
+        self.rendered = 0
+
+    def px(self, value):
+        """ 把內部解析度的長度換算成這個圖集的像素 """
+        return int(round(value * self.scale))
+
+    def _get(self, key, render):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((self.size, self.size))
+            sprite.fill(COLORKEY)
+            sprite.set_colorkey(COLORKEY)
+            render(sprite)
+            self.sprites[key] = sprite
+            self.rendered += 1
+        return sprite
+
+    @staticmethod
+    def leg_phase(ticks):
+        """ 由目前時間 (毫秒) 算出腳的相位 (0 ~ LEG_PHASES - 1) """
+        return (ticks % LEG_PERIOD) * LEG_PHASES // LEG_PERIOD
+
+    def ghost(self, color, phase, direction):
+        """ 一般狀態的鬼魂 """
+        def render(sprite):
+            _draw_ghost_body(self, sprite, color, phase)
+            _draw_eyes(self, sprite, direction)
+        return self._get(("ghost", color, phase, direction), render)
+
+    def frightened_ghost(self, phase, flash_white=False):
+        """ 驚嚇中的鬼魂 (快結束時白色閃爍) """
+        color = WHITE if flash_white else FRIGHTENED_BLUE
+
+        def render(sprite):
+            _draw_ghost_body(self, sprite, color, phase)
+            px = self.px
+            pygame.draw.rect(sprite, FRIGHTENED_EYE_COLOR,
+                             (self.center - px(4), self.center - px(2), px(2), px(2)))
+            pygame.draw.rect(sprite, FRIGHTENED_EYE_COLOR,
+                             (self.center + px(2), self.center - px(2), px(2), px(2)))
+        return self._get(("frightened", phase, flash_white), render)
+
+    def ghost_eyes(self, direction):
+        """ 被吃掉的鬼魂 (只有眼睛) """
+        return self._get(("eyes", direction),
+                         lambda sprite: _draw_eyes(self, sprite, direction))
+
+    def pacman(self, mouth_angle, rotation_angle):
+        """ 小精靈 (嘴巴張開 mouth_angle 度，面向 rotation_angle) """
+        return self._get(("pacman", mouth_angle, rotation_angle),
+                         lambda sprite: _draw_pacman(self, sprite, mouth_angle, rotation_angle))
+
+    def pacman_death(self, radius):
+        """ 死亡動畫: 逐漸縮小的黃色圓 (radius 為內部解析度的半徑) """
+        return self._get(("death", radius),
+                         lambda sprite: pygame.draw.circle(
+                             sprite, YELLOW, (self.center, self.center), max(1, self.px(radius))))
+
+    def fruit(self):
+        """ 獎勵水果 """
+        return self._get(("fruit",), lambda sprite: _draw_fruit(self, sprite))
+
+    def prerender(self, ghost_colors):
+        """ 啟動時先畫好所有常用狀態，避免遊戲中第一次出現時卡頓 """
+        for phase in range(LEG_PHASES):
+            for color in ghost_colors:
+                for direction in EYE_DIRECTIONS:
+                    self.ghost(color, phase, direction)
+            self.frightened_ghost(phase, False)
+            self.frightened_ghost(phase, True)
+        for direction in EYE_DIRECTIONS:
+            self.ghost_eyes(direction)
+        for rotation in PACMAN_ROTATIONS:
+            for mouth in PACMAN_MOUTH_ANGLES:
+                self.pacman(mouth, rotation)
+        for radius in range(1, ACTOR_RADIUS + 1):
+            self.pacman_death(radius)
+        self.fruit()
+
+
+_SPRITE_ATLAS = None
+
+
+def get_sprite_atlas():
+    """ 取得共用的 SpriteAtlas (遊戲內部解析度) """
+    global _SPRITE_ATLAS
+    if _SPRITE_ATLAS is None:
+        _SPRITE_ATLAS = SpriteAtlas()
+    return _SPRITE_ATLAS
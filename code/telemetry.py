@@ -0,0 +1,155 @@
+# telemetry.py
+"""
+結構化的遊戲遙測 (JSONL)。
+
+自由格式的 Log 很難拿來做統計，這裡把遊戲中的重要事件寫成一行一個 JSON 物件:
+    {"session": "...", "event": "pellet", "frame": 1234, "t": 20567, "x": 3, "y": 8, ...}
+
+- frame: 第幾次 update (模擬幀數)
+- t: 模擬時間 (毫秒，update 的 dt 累加)
+- session: 每次啟動遊戲的隨機 id，方便把上千個 session 的檔案合在一起分析
+- run: 同一個 session 中的第幾場 Simulation (從 1 開始)
+
+每場新的 Simulation 的幀數與時間都從 0 開始，建立時要呼叫 start_run()；
+寫出的 frame / t 會接在上一場之後，整個 session 內保持遞增。
+
+遊戲迴圈只把 (事件, 幀數, 時間, 欄位) 放進 BatchWriter 的佇列，
+JSON 序列化與檔案 I/O 都在背景執行緒裡做。
+"""
+import json
+import sys
+import uuid
+from settings import *
+from batch_writer import BatchWriter
+
+# 事件名稱
+EVENT_LEVEL_START = "level_start"
+EVENT_PELLET = "pellet"
+EVENT_POWER_PELLET = "power_pellet"
+EVENT_GHOST_EATEN = "ghost_eaten"
+EVENT_DEATH = "death"
+EVENT_MODE_SWITCH = "mode_switch"
+EVENT_FRUIT_SPAWN = "fruit_spawn"
+EVENT_FRUIT_COLLECT = "fruit_collect"
+EVENT_FRAME_STATS = "frame_stats"
+
+
+class Telemetry:
+    """
+    屬性:
+        session_id: 這次遊戲的 id
+        enabled: path 為 None 時不寫任何東西 (emit 直接返回)
+        events: 已送出的事件數
+        run: 目前是第幾場 Simulation (start_run 之前為 0)
+        writer: 背景寫入執行緒 (written / dropped 統計)
+    """
+
+    def __init__(self, path=TELEMETRY_FILE, queue_size=TELEMETRY_QUEUE_SIZE):
+        """
+        參數:
+            path: JSONL 檔案 (附加寫入；None 表示關閉遙測)
+        """
+        self.session_id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.enabled = path is not None
+        self.events = 0
+
+        # 目前這一場的幀數 / 時間要加上的偏移，以及送出過的最大值
+        self.run = 0
+        self.frame_base = 0
+        self.time_base = 0
+        self.last_frame = 0
+        self.last_time = 0
+
+        self._file = None
+        self.writer = None
+        if self.enabled:
+            self.writer = BatchWriter(self._write, queue_size, "telemetry-writer",
+                                      on_close=self._close_file)
+
+        # 每秒的幀統計
+        self.window_start = 0
+        self.window_frames = 0
+        self.window_dt_max = 0
+
+    def start_run(self):
+        """
+        新的一場 Simulation 開始 (幀數與模擬時間重新從 0 起算):
+        把偏移移到目前送出過的最後一幀之後，並重置每秒的幀統計。
+        """
+        self.run += 1
+        self.frame_base = self.last_frame
+        self.time_base = self.last_time
+        self.window_start = 0
+        self.window_frames = 0
+        self.window_dt_max = 0
+
+    def emit(self, event, frame, sim_time, **fields):
+        """
+        送出一個事件 (不會阻塞)。
+
+        參數:
+            event: 事件名稱 (EVENT_*)
+            frame: 模擬幀數
+            sim_time: 模擬時間 (毫秒)
+            fields: 事件的其他欄位 (必須可以轉成 JSON)
+        """
+        if not self.enabled:
+            return
+        self.events += 1
+        frame += self.frame_base
+        sim_time += self.time_base
+        if frame > self.last_frame:
+            self.last_frame = frame
+        if sim_time > self.last_time:
+            self.last_time = sim_time
+        self.writer.put((event, self.run, frame, sim_time, fields))
+
+    def record_frame(self, frame, sim_time, dt, **fields):
+        """
+        每畫一幀呼叫一次 (dt 為這一幀實際經過的毫秒): 累計這一秒的幀數與最大 dt，
+        每滿一秒 (模擬時間) 送出一次 frame_stats。
+        """
+        if not self.enabled:
+            return
+        self.window_frames += 1
+        if dt > self.window_dt_max:
+            self.window_dt_max = dt
+        elapsed = sim_time - self.window_start
+        if elapsed >= 1000:
+            self.emit(EVENT_FRAME_STATS, frame, sim_time,
+                      frames=self.window_frames,
+                      fps=round(self.window_frames * 1000 / elapsed, 1),
+                      avg_dt=round(elapsed / self.window_frames, 2),
+                      max_dt=self.window_dt_max, **fields)
+            self.window_start = sim_time
+            self.window_frames = 0
+            self.window_dt_max = 0
+
+    def close(self):
+        """ 寫出剩下的事件並結束背景執行緒 (可重複呼叫) """
+        if self.writer is not None:
+            self.writer.close()
+
+    # --- 背景執行緒 ---
+
+    def _write(self, items):
+        lines = []
+        for event, run, frame, sim_time, fields in items:
+            record = {"session": self.session_id, "run": run, "event": event,
+                      "frame": frame, "t": sim_time}
+            record.update(fields)
+            lines.append(json.dumps(record, separators=(",", ":")))
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        except (OSError, ValueError) as e:
+            # 寫入失敗不應該影響遊戲，只記在 stderr
+            print(f"Error writing telemetry: {e}", file=sys.stderr)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,57 @@
+# text_cache.py
+"""
+有容量上限的 LRU 文字快取。
+
+font.render 是 UI 繪製裡最貴的呼叫之一，但 Log 面板、操作說明、HUD 與各種提示畫面
+每幀畫的幾乎都是同樣的字串。把渲染好的 Surface 以 (字型, 文字, 反鋸齒, 顏色) 為 key
+快取起來，文字沒變時只剩一次字典查詢。
+"""
+from collections import OrderedDict
+
+# 最多保留幾張文字圖 (Log 面板約 30 行 + 操作說明 12 行 + HUD 與提示畫面)
+TEXT_CACHE_CAPACITY = 256
+
+
+class TextCache:
+    """
+    LRU 文字快取 (由 Game 擁有，main.py 所有的 UI 文字都經過這裡)。
+
+    屬性:
+        hits / misses / evictions: 命中、未命中與被淘汰的次數
+    """
+
+    def __init__(self, capacity=TEXT_CACHE_CAPACITY):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color):
+        """
+        與 font.render 相同，但相同的參數會回傳快取的 Surface。
+
+        回傳:
+            文字 Surface (共用的，請勿在上面繪圖)
+        """
+        key = (font, text, antialias, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self.surfaces.clear()
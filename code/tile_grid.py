@@ -0,0 +1,111 @@
+# tile_grid.py
+"""
+緊湊的地圖表示法 (TileGrid)。
+
+地圖存在一個 bytearray 裡，每格一個整數代碼 (CODE_*)，四周加上 PADDING 格的空白邊框，
+所以查詢稍微超出地圖的座標 (例如隧道口外一格) 時不需要做邊界檢查。
+牆壁 / 門另外預先算成一份 bitmask，is_wall 只剩一次索引與一次 AND。
+重置關卡時只要把樣板 (template) 整塊複製回來。
+"""
+from settings import *
+
+# 地圖代碼
+CODE_EMPTY = 0
+CODE_PELLET = 1
+CODE_POWER_PELLET = 2
+CODE_WALL = 3
+CODE_DOOR = 4
+
+CHAR_TO_CODE = {
+    TILE_EMPTY: CODE_EMPTY,
+    TILE_PELLET: CODE_PELLET,
+    TILE_POWER_PELLET: CODE_POWER_PELLET,
+    TILE_WALL: CODE_WALL,
+    TILE_DOOR: CODE_DOOR,
+}
+CODE_TO_CHAR = {code: char for char, code in CHAR_TO_CODE.items()}
+
+# 牆壁 / 門的 bitmask
+MASK_WALL = 1
+MASK_DOOR = 2
+MASK_BLOCKED = MASK_WALL | MASK_DOOR  # 玩家不能進入的格子
+
+# 四周空白邊框的寬度 (查詢座標最多可以超出地圖這麼多格)
+PADDING = 2
+
+
+class TileGrid:
+    """
+    以 bytearray 儲存的地圖。
+
+    屬性:
+        width, height: 地圖大小 (不含邊框)
+        stride: 每一列在 buffer 中的長度 (含左右邊框)
+        tiles: 目前的地圖代碼 (會隨著吃豆子改變)
+        template: 關卡開始時的地圖代碼
+        mask: 每格的 MASK_WALL / MASK_DOOR (牆壁不會改變)
+    """
+
+    def __init__(self, map_strings):
+        """
+        參數:
+            map_strings: 地圖字串 (通常是 MAP_STRINGS)
+        """
+        self.width = len(map_strings[0])
+        self.height = len(map_strings)
+        self.stride = self.width + 2 * PADDING
+        self.origin = PADDING * self.stride + PADDING  # (0, 0) 在 buffer 中的位置
+
+        size = (self.height + 2 * PADDING) * self.stride
+        self.template = bytearray(size)  # 邊框為 CODE_EMPTY (0)
+        self.mask = bytearray(size)
+        for y, row in enumerate(map_strings):
+            for x, char in enumerate(row):
+                i = self.origin + y * self.stride + x
+                code = CHAR_TO_CODE[char]
+                self.template[i] = code
+                if code == CODE_WALL:
+                    self.mask[i] = MASK_WALL
+                elif code == CODE_DOOR:
+                    self.mask[i] = MASK_DOOR
+        self.tiles = bytearray(self.template)
+
+    def index(self, x, y):
+        """ 網格座標在 buffer 中的位置 (x, y 可以超出地圖最多 PADDING 格) """
+        return self.origin + y * self.stride + x
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, x, y):
+        """
+        是否為牆壁。
+        超出地圖範圍 (例如隧道口) 視為非牆壁，可通行。
+        """
+        return self.mask[self.origin + y * self.stride + x] & MASK_WALL != 0
+
+    def is_blocked(self, x, y):
+        """ 玩家是否不能進入 (牆壁或鬼屋的門) """
+        return self.mask[self.origin + y * self.stride + x] & MASK_BLOCKED != 0
+
+    def is_door(self, x, y):
+        return self.mask[self.origin + y * self.stride + x] & MASK_DOOR != 0
+
+    def get(self, x, y):
+        """ 取得該格的地圖代碼 (CODE_*) """
+        return self.tiles[self.origin + y * self.stride + x]
+
+    def set(self, x, y, code):
+        self.tiles[self.origin + y * self.stride + x] = code
+
+    def count(self, code):
+        """ 計算目前地圖上某種代碼的數量 """
+        return self.tiles.count(code)
+
+    def reset(self):
+        """ 重置為關卡開始時的地圖 (一次 buffer 複製) """
+        self.tiles[:] = self.template
+
+
+# 靜態的迷宮 (牆壁與門永遠不變，鬼魂的路徑判斷使用這一份)
+GAME_MAP = TileGrid(MAP_STRINGS)
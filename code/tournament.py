@@ -0,0 +1,276 @@
+# tournament.py
+"""
+演算法錦標賽 (Tournament)。
+
+用同一組種子，讓每種鬼魂演算法各跑數千場不開視窗的 Simulation，
+由腳本玩家 (或隨機玩家) 操作，比較分數、存活時間、被吃掉的鬼、路徑搜尋展開的節點數與每 tick 的耗時。
+
+    python code/tournament.py --games 1000 --algorithms GREEDY BFS ASTAR --seed 42 --csv results.csv
+
+- 遊戲分給 ProcessPoolExecutor (預設用上所有核心)，每場的結果一完成就傳回主程序，
+  寫進 CSV 並顯示進度，最後印出每種演算法的統計表
+- 第 i 場遊戲的種子由主種子決定，而且每種演算法的第 i 場使用同一個種子 (成對比較)，
+  同一個主種子重跑會得到相同的分數、存活時間與展開的節點數 (耗時除外)
+- 鬼魂不查距離表、流場與路徑快取 (Simulation(use_tables=False))，每次決策都實際搜尋，
+  所以搜尋次數與展開的節點數是演算法本身的工作量，不受各程序的快取是否暖好影響；
+  遊戲結果與查表時相同，每 tick 的耗時也是實際搜尋的成本
+"""
+import argparse
+import csv
+import os
+# 工作程序也會 import pygame，不要每個程序都印一次歡迎訊息
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from settings import *
+from simulation import Simulation, ACTION_NONE
+from pathfinding import PATHFINDERS
+from numpy_grid import grid_view
+from tile_grid import CODE_PELLET, CODE_POWER_PELLET
+from vector_env import get_maze_tables, FAR
+
+DEFAULT_ALGORITHMS = [ALGO_GREEDY, ALGO_BFS, ALGO_ASTAR]
+DEFAULT_GAMES = 1000
+DEFAULT_SEED = 0
+# 一場遊戲最多幾個 tick (10 分鐘的模擬時間)，避免玩家卡在迴圈裡永遠不結束
+DEFAULT_MAX_TICKS = 10 * 60 * SIM_TICK_RATE
+
+PLAYER_SCRIPTED = "scripted"
+PLAYER_RANDOM = "random"
+
+# 腳本玩家: 不在驚嚇中的鬼進入這個迷宮距離時改成逃跑
+FLEE_DISTANCE = 4
+
+CSV_FIELDS = ["game", "algorithm", "seed", "player", "score", "won", "lives", "ticks",
+              "ghosts_eaten", "searches", "nodes_expanded", "ms_per_tick"]
+
+
+class ScriptedPlayer:
+    """
+    簡單的腳本玩家: 每走到新的格子決定一次方向。
+    有危險的鬼靠近時，往「離最近的鬼最遠」的鄰居逃；否則沿最短路徑走向最近的豆子。
+    距離都查 MazeTables 的距離表 (門關閉的版本)。
+    """
+
+    def __init__(self, sim, rng):
+        self.sim = sim
+        self.rng = rng
+        self.tables = get_maze_tables()
+        self.tiles = grid_view(sim.game_map)
+        self.last_tile = None
+
+    def act(self):
+        player = self.sim.player
+        tile = (player.grid_x % self.tables.width, player.grid_y)
+        if tile == self.last_tile:
+            return ACTION_NONE
+        self.last_tile = tile
+        t = self.tables
+        cell = t.index.get(tile)
+        if cell is None:
+            return ACTION_NONE
+        dist = t.dist[0]
+        neighbors = [(d, nb) for d, nb in enumerate(t.neighbor[0, cell]) if nb >= 0]
+        if not neighbors:
+            return ACTION_NONE
+
+        threats = []
+        for ghost in self.sim.ghosts:
+            ghost_cell = t.index.get((ghost.grid_x % t.width, ghost.grid_y))
+            if ghost_cell is not None and not ghost.is_frightened and not ghost.is_eaten:
+                threats.append(ghost_cell)
+        if threats and dist[cell, threats].min() <= FLEE_DISTANCE:
+            return max(neighbors, key=lambda item: dist[item[1], threats].min())[0]
+
+        codes = self.tiles[t.tile_y, t.tile_x]
+        food = (codes == CODE_PELLET) | (codes == CODE_POWER_PELLET)
+        if not food.any():
+            return ACTION_NONE
+        reach = dist[cell].astype(int)
+        reach[~food] = FAR
+        target = int(reach.argmin())
+        if reach[target] >= FAR:
+            return self.rng.choice(neighbors)[0]
+        return min(neighbors, key=lambda item: dist[item[1], target])[0]
+
+
+class RandomPlayer:
+    """ 每走到新的格子隨機選一個方向 (當作基準線) """
+
+    def __init__(self, sim, rng):
+        self.sim = sim
+        self.rng = rng
+        self.last_tile = None
+
+    def act(self):
+        player = self.sim.player
+        tile = (player.grid_x, player.grid_y)
+        if tile == self.last_tile:
+            return ACTION_NONE
+        self.last_tile = tile
+        return self.rng.randint(1, 4)
+
+
+PLAYERS = {
+    PLAYER_SCRIPTED: ScriptedPlayer,
+    PLAYER_RANDOM: RandomPlayer,
+}
+
+
+def game_seeds(master_seed, games):
+    """ 由主種子產生每一場的種子 (每種演算法的第 i 場共用同一個) """
+    rng = random.Random(master_seed)
+    return [rng.getrandbits(32) for _ in range(games)]
+
+
+def play_game(game, algorithm, seed, player_kind, max_ticks):
+    """
+    在工作程序中跑一場遊戲。
+
+    回傳:
+        一列結果 (欄位見 CSV_FIELDS)
+    """
+    sim = Simulation(algorithm, seed=seed, use_tables=False)
+    sim.reset()
+    player = PLAYERS[player_kind](sim, random.Random(seed))
+
+    start = time.perf_counter()
+    while not sim.is_over() and sim.frame < max_ticks:
+        sim.step(player.act())
+    elapsed = time.perf_counter() - start
+
+    searches, expanded = sim.pathfinder_stats()
+    return {
+        "game": game,
+        "algorithm": algorithm,
+        "seed": seed,
+        "player": player_kind,
+        "score": sim.player.score,
+        "won": int(sim.state == GAME_STATE_WIN),
+        "lives": sim.player.lives,
+        "ticks": sim.frame,
+        "ghosts_eaten": sim.ghosts_eaten,
+        "searches": searches,
+        "nodes_expanded": expanded,
+        "ms_per_tick": round(elapsed * 1000 / max(sim.frame, 1), 4),
+    }
+
+
+def run_tournament(algorithms, games, master_seed, player_kind, max_ticks, workers, on_result):
+    """
+    把所有遊戲交給工作程序，每完成一場就呼叫 on_result(結果)。
+
+    回傳:
+        所有結果 (依完成順序)
+    """
+    seeds = game_seeds(master_seed, games)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, i, algorithm, seed, player_kind, max_ticks)
+                   for i, seed in enumerate(seeds)
+                   for algorithm in algorithms]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            on_result(result)
+    return results
+
+
+def summarize(results, algorithms):
+    """
+    依演算法彙整結果。
+
+    回傳:
+        [(演算法, {統計名稱: 數值})]，順序與 algorithms 相同
+    """
+    summary = []
+    for algorithm in algorithms:
+        rows = [row for row in results if row["algorithm"] == algorithm]
+        if not rows:
+            continue
+        scores = [row["score"] for row in rows]
+        summary.append((algorithm, {
+            "games": len(rows),
+            "score": statistics.mean(scores),
+            "score_sd": statistics.pstdev(scores),
+            "score_median": statistics.median(scores),
+            "win_rate": statistics.mean(row["won"] for row in rows),
+            "ticks": statistics.mean(row["ticks"] for row in rows),
+            "ghosts_eaten": statistics.mean(row["ghosts_eaten"] for row in rows),
+            "nodes_expanded": statistics.mean(row["nodes_expanded"] for row in rows),
+            "ms_per_tick": statistics.mean(row["ms_per_tick"] for row in rows),
+        }))
+    return summary
+
+
+def format_summary(summary):
+    """ 統計表 (純文字) """
+    header = (f"{'Algorithm':<10} {'Games':>6} {'Score':>9} {'±SD':>8} {'Median':>8} "
+              f"{'Win%':>6} {'Ticks':>8} {'Ghosts':>7} {'Nodes':>10} {'ms/tick':>8}")
+    lines = [header, "-" * len(header)]
+    for algorithm, s in summary:
+        lines.append(
+            f"{algorithm:<10} {s['games']:>6} {s['score']:>9.1f} {s['score_sd']:>8.1f} "
+            f"{s['score_median']:>8.0f} {s['win_rate'] * 100:>6.1f} {s['ticks']:>8.0f} "
+            f"{s['ghosts_eaten']:>7.2f} {s['nodes_expanded']:>10.0f} {s['ms_per_tick']:>8.4f}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run seeded headless games for each ghost algorithm and compare them.")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES,
+                        help="games per algorithm (default: %(default)s)")
+    parser.add_argument("--algorithms", nargs="+", default=DEFAULT_ALGORITHMS,
+                        help="ghost algorithms to compare (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help="master seed (default: %(default)s)")
+    parser.add_argument("--player", choices=sorted(PLAYERS), default=PLAYER_SCRIPTED,
+                        help="who controls Pac-Man (default: %(default)s)")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                        help="tick limit per game (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--csv", default="tournament.csv",
+                        help="per-game results file (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    algorithms = [name.upper() for name in args.algorithms]
+    unknown = [name for name in algorithms if name not in PATHFINDERS]
+    if unknown:
+        sys.exit(f"Unknown algorithm: {', '.join(unknown)} (choose from {', '.join(PATHFINDERS)})")
+    total = args.games * len(algorithms)
+    print(f"Tournament: {', '.join(algorithms)} x {args.games} games, "
+          f"seed {args.seed}, {args.player} player, {args.workers} workers")
+
+    start = time.perf_counter()
+    with open(args.csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        done = 0
+        step = max(1, total // 20)
+
+        def on_result(result):
+            nonlocal done
+            writer.writerow(result)
+            done += 1
+            if done % step == 0 or done == total:
+                rate = done / (time.perf_counter() - start)
+                print(f"  {done}/{total} games ({rate:.1f} games/s)", file=sys.stderr)
+
+        results = run_tournament(algorithms, args.games, args.seed, args.player,
+                                 args.max_ticks, args.workers, on_result)
+
+    print()
+    print(format_summary(summarize(results, algorithms)))
+    print(f"\n{total} games in {time.perf_counter() - start:.1f}s, results written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,736 @@
+# vector_env.py
+"""
+向量化的批次環境 (Vectorized Environment)，給 Bot 訓練與 AI 評估使用。
+
+一場遊戲一個 Simulation (Python 物件) 時，每個核心每秒只能跑幾百個 tick。
+VectorEnv 把 N 場獨立遊戲的玩家、鬼魂與豆子存成 NumPy 的 struct-of-arrays
+(例如 ghost_cell 是形狀 (N, 4) 的陣列)，每個 tick 用陣列運算同時推進全部 N 場:
+- 移動: 角色位置是「迷宮格子編號 + 往 direction 已經走了幾個像素」，抵達下一格時查鄰居表
+- 鬼魂決策: 目標點依 Ghost.get_target_position 的四種個性計算，
+  下一步是 maze.py 距離矩陣中離目標最近的鄰居 (與 ALGO_BFS 的結果相同)，
+  走廊上不回頭 (與 GHOST_JUNCTION_PLANNING = True 的鬼魂相同)
+- 吃豆、能量球、水果與碰撞都是遮罩 (mask) 運算
+
+介面與 Gym 相同:
+    env = VectorEnv(256)
+    obs = env.reset(seed=0)
+    obs, rewards, dones, infos = env.step(actions)   # actions: 形狀 (N,) 的 ACTION_*
+
+與 Simulation 的差異 (只省略不影響規則的部分):
+- 死亡動畫與 READY! 倒數直接跳過，reset() 後直接開始遊戲
+- 鬼魂在鬼屋裡等待時不做上下彈跳
+"""
+import numpy as np
+from settings import *
+from maze import get_maze_distances, NEIGHBOR_DIRS
+from junction_graph import get_junction_graph
+from map_index import get_map_index
+from tile_grid import (TileGrid, MASK_BLOCKED, CODE_EMPTY, CODE_PELLET,
+                       CODE_POWER_PELLET)
+from numpy_grid import grid_view
+from observation import (PLANE_WALL, PLANE_PELLET, PLANE_POWER_PELLET, PLANE_PLAYER,
+                         PLANE_GHOST, PLANE_GHOST_FRIGHTENED, PLANE_GHOST_EATEN,
+                         PLANE_GHOST_HOUSE, NUM_PLANES)
+from simulation import ACTION_NONE, FRUIT_DURATION
+
+# 方向代碼與 ACTION_* 相同 (0 = 不動)，1~4 的順序與 maze.NEIGHBOR_DIRS 相同
+DIR_NONE = 0
+DIR_UP = 1
+DIR_DOWN = 2
+DIR_LEFT = 3
+DIR_RIGHT = 4
+DIR_DX = np.array([0] + [dx for dx, _ in NEIGHBOR_DIRS], dtype=np.int32)
+DIR_DY = np.array([0] + [dy for _, dy in NEIGHBOR_DIRS], dtype=np.int32)
+REVERSE = np.array([DIR_NONE, DIR_DOWN, DIR_UP, DIR_RIGHT, DIR_LEFT], dtype=np.int8)
+
+# 鬼魂模式 (Ghost.current_ai_mode 對應的整數代碼)
+G_WAITING = 0
+G_EXIT_HOUSE = 1
+G_SCATTER = 2
+G_CHASE = 3        # 依個性追逐 (Ghost.ai_mode)
+G_FRIGHTENED = 4
+G_GO_HOME = 5
+
+# 與 Simulation.init_level 相同的四隻鬼 (順序: Blinky, Pinky, Inky, Clyde)
+NUM_GHOSTS = 4
+GHOST_HOMES = [(13, 14), (14, 14), (12, 14), (15, 14)]
+GHOST_DELAYS = [0, 3000, 6000, 9000]
+SCATTER_PATHS = [
+    [(26, 1), (26, 5), (21, 5), (21, 1)],
+    [(1, 1), (1, 5), (6, 5), (6, 1)],
+    [(26, 29), (26, 26), (21, 26), (21, 29)],
+    [(1, 29), (1, 26), (6, 26), (6, 29)],
+]
+# 每種模式的鬼畫在哪個觀測平面 (以 G_* 為索引)
+GHOST_MODE_PLANES = np.array([PLANE_GHOST_HOUSE, PLANE_GHOST_HOUSE, PLANE_GHOST, PLANE_GHOST,
+                              PLANE_GHOST_FRIGHTENED, PLANE_GHOST_EATEN], dtype=np.intp)
+
+PLAYER_START = (14, 23)
+FRUIT_POS = (14, 29)
+# 第一 / 第二顆水果出現時已吃掉的豆子數
+FRUIT_THRESHOLDS = np.array([70, 170, 1 << 30], dtype=np.int32)
+
+PLAYER_RADIUS = TILE_SIZE // 2 - 2
+GHOST_RADIUS = TILE_SIZE // 2 - 2
+
+# 距離表中「到不了」的距離
+FAR = 10000
+# MazeTables.nearest 的特殊值
+NO_TILE = -1      # 目標不在迷宮的連通區域內 (路徑搜尋會失敗，隨機選鄰居)
+TARGET_SELF = -2  # validate_target 找不到空地，目標改成鬼魂自己的位置
+
+# 觀測向量的欄位 (每場遊戲一列 float32)
+OBS_PLAYER = 0          # 玩家 x, y (格子座標，含走到一半的小數)、方向
+OBS_GHOST_X = 3         # 四隻鬼的 x
+OBS_GHOST_Y = 7         # 四隻鬼的 y
+OBS_GHOST_MODE = 11     # 四隻鬼的模式 (G_*)
+OBS_FRIGHTENED = 15     # 驚嚇模式剩下的秒數
+OBS_PELLETS = 16        # 剩下的一般豆子、能量球
+OBS_LIVES = 18
+OBS_FRUIT = 19          # 水果是否出現
+OBS_SIZE = 20
+
+
+class MazeTables:
+    """
+    向量化環境用的靜態查詢表 (格子編號以 maze.py 門可通行版本為準)。
+
+    屬性:
+        size: 格子數
+        tile_x, tile_y: 每個格子的座標
+        flat: 每個格子在 (H, W) 地圖中的一維位置
+        neighbor: neighbor[door_open, 格子, 方向] 為鄰居的格子編號，不能走時為 -1
+        dist: dist[door_open, 起點, 終點] 為迷宮距離，到不了時為 FAR
+        junction: 門關閉時需要做決策的格子 (路口 / 死路 / 隧道口)
+        nearest: nearest[ty, tx] 為 validate_target 修正後的格子 (或 NO_TILE / TARGET_SELF)
+        frightened_cells: 驚嚇模式隨機目標的抽樣表 (與 MapIndex.frightened_tiles 相同分布)
+    """
+
+    def __init__(self):
+        open_maze = get_maze_distances(door_open=True)
+        closed_maze = get_maze_distances(door_open=False)
+        n = open_maze.size
+        self.size = n
+        self.width = open_maze.width
+        self.height = open_maze.height
+        self.index = open_maze.index
+
+        self.tile_x = np.array([x for x, _ in open_maze.tiles], dtype=np.int32)
+        self.tile_y = np.array([y for _, y in open_maze.tiles], dtype=np.int32)
+        self.flat = self.tile_y * self.width + self.tile_x
+
+        # 1. 鄰居表 (方向 0 = 不動，永遠是 -1)
+        self.neighbor = np.full((2, n, 5), -1, dtype=np.int32)
+        for cell, (x, y) in enumerate(open_maze.tiles):
+            for d, (dx, dy) in enumerate(NEIGHBOR_DIRS, start=1):
+                nb = ((x + dx) % self.width, y + dy)
+                j = self.index.get(nb)
+                if j is None:
+                    continue
+                self.neighbor[1, cell, d] = j
+                if closed_maze.contains((x, y)) and closed_maze.contains(nb):
+                    self.neighbor[0, cell, d] = j
+
+        # 2. 距離表: 直接讀 MazeDistances 的 array buffer，門關閉的版本換成同一套編號
+        self.dist = np.full((2, n, n), FAR, dtype=np.int16)
+        opened = np.frombuffer(open_maze.dist, dtype=np.int16).reshape(n, n)
+        self.dist[1] = np.where(opened >= 0, opened, FAR)
+        m = closed_maze.size
+        closed = np.frombuffer(closed_maze.dist, dtype=np.int16).reshape(m, m)
+        remap = np.array([closed_maze.index.get(tile, -1) for tile in open_maze.tiles])
+        inside = np.flatnonzero(remap >= 0)
+        sub = closed[np.ix_(remap[inside], remap[inside])]
+        self.dist[0][np.ix_(inside, inside)] = np.where(sub >= 0, sub, FAR)
+
+        # 3. 走廊 / 路口
+        graph = get_junction_graph(door_open=False)
+        self.junction = np.array([graph.is_junction(tile) for tile in open_maze.tiles])
+
+        # 4. validate_target 與驚嚇模式的目標
+        map_index = get_map_index()
+        self.max_y = map_index.max_y
+        self.nearest = np.full((self.height, self.width), TARGET_SELF, dtype=np.int32)
+        for ty, row in enumerate(map_index.nearest):
+            for tx, tile in enumerate(row):
+                if tile is not None:
+                    self.nearest[ty, tx] = self.index.get(tile, NO_TILE)
+        self.frightened_cells = np.array(
+            [self.index.get(tile, NO_TILE) for tile in map_index.frightened_tiles],
+            dtype=np.int32)
+
+        # 5. 固定的位置
+        self.exit_cell = self.index[GHOST_HOUSE_EXIT_POS]
+        self.home_cells = np.array([self.index[pos] for pos in GHOST_HOMES], dtype=np.int32)
+        self.scatter_cells = np.array([[self.index[pos] for pos in path]
+                                       for path in SCATTER_PATHS], dtype=np.int32)
+        self.player_start = self.index[PLAYER_START]
+
+
+_MAZE_TABLES = None
+
+
+def get_maze_tables():
+    """ 取得共用的 MazeTables (第一次使用時才建立) """
+    global _MAZE_TABLES
+    if _MAZE_TABLES is None:
+        _MAZE_TABLES = MazeTables()
+    return _MAZE_TABLES
+
+
+class VectorEnv:
+    """
+    N 場同步前進的遊戲。
+
+    屬性 (形狀 (N,) 或 (N, 4) 的陣列，第 i 列是第 i 場遊戲):
+        player_cell / player_dir / player_next / player_progress: 玩家位置、方向、預存的轉彎、
+            往 player_dir 已走的像素
+        ghost_cell / ghost_dir / ghost_mode / ghost_progress / ghost_delay / scatter_index: 鬼魂
+        pellets: 形狀 (N, H, W) 的地圖代碼 (CODE_*)，吃掉的豆子改成 CODE_EMPTY
+        score / lives / pellets_left / power_left / time / ticks: 計分與計時
+    """
+
+    def __init__(self, num_envs, ticks_per_step=1, max_ticks=None, auto_reset=True, seed=None):
+        """
+        參數:
+            num_envs: 同時進行的遊戲數 N
+            ticks_per_step: 每次 step 前進幾個模擬 tick (動作在這段期間維持不變)
+            max_ticks: 一場遊戲最多幾個 tick，超過時以 truncated 結束 (None 表示不限)
+            auto_reset: 結束的遊戲是否在 step 回傳前自動重新開始
+            seed: 亂數種子 (也可以在 reset(seed) 時指定)
+        """
+        self.num_envs = num_envs
+        self.ticks_per_step = ticks_per_step
+        self.max_ticks = max_ticks
+        self.auto_reset = auto_reset
+        self.tables = get_maze_tables()
+        self.rng = np.random.default_rng(seed)
+
+        grid = TileGrid(MAP_STRINGS)
+        self.template = grid_view(grid, grid.template).copy()
+        self.walls = grid_view(grid, grid.mask) & MASK_BLOCKED != 0
+        self.starting_pellets = int(np.count_nonzero(self.template == CODE_PELLET))
+        self.starting_power = int(np.count_nonzero(self.template == CODE_POWER_PELLET))
+        self.level_speed = SPEED
+        # 速度的單位是「每 60 分之 1 秒幾個像素」(與 Entity.move 相同)
+        self.tick_scale = SIM_TICK_RATE * SIM_DT / 1000
+
+        n = num_envs
+        self.pellets = np.empty((n,) + self.template.shape, dtype=np.uint8)
+        self.pellets_left = np.zeros(n, dtype=np.int32)
+        self.power_left = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int32)
+        self.time = np.zeros(n)
+        self.ticks = np.zeros(n, dtype=np.int64)
+
+        self.player_cell = np.zeros(n, dtype=np.int32)
+        self.player_dir = np.zeros(n, dtype=np.int8)
+        self.player_next = np.zeros(n, dtype=np.int8)
+        self.player_progress = np.zeros(n)
+
+        shape = (n, NUM_GHOSTS)
+        self.ghost_cell = np.zeros(shape, dtype=np.int32)
+        self.ghost_dir = np.zeros(shape, dtype=np.int8)
+        self.ghost_mode = np.zeros(shape, dtype=np.int8)
+        self.ghost_progress = np.zeros(shape)
+        self.ghost_delay = np.zeros(shape)
+        self.scatter_index = np.zeros(shape, dtype=np.int32)
+
+        self.global_mode = np.zeros(n, dtype=np.int8)
+        self.mode_switch_time = np.zeros(n)
+        self.frightened_mode = np.zeros(n, dtype=bool)
+        self.frightened_start = np.zeros(n)
+        self.frightened_duration = FRIGHTENED_DURATION
+
+        self.fruit_active = np.zeros(n, dtype=bool)
+        self.fruit_spawn_time = np.zeros(n)
+        self.fruits_spawned = np.zeros(n, dtype=np.int32)
+        self.fruit_score = 100
+
+        # step 回傳的陣列每次都重複使用 (需要保留時請自行 copy)
+        self.obs = np.zeros((n, OBS_SIZE), dtype=np.float32)
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.dones = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+        self.truncated = np.zeros(n, dtype=bool)
+        self.episode_score = np.zeros(n, dtype=np.int64)
+        self.infos = {
+            "score": self.score,
+            "lives": self.lives,
+            "pellets": self.pellets_left,
+            "ticks": self.ticks,
+            "won": self.won,
+            "truncated": self.truncated,
+            "episode_score": self.episode_score,  # 這次 step 結束的遊戲的最終分數
+        }
+        self._running = np.zeros(n, dtype=bool)
+        self._envs = np.arange(n)
+        self.planes = None  # observe_planes() 第一次呼叫時才配置
+
+    # --- Gym 介面 ---
+
+    def reset(self, seed=None):
+        """
+        重新開始全部 N 場遊戲。
+
+        回傳:
+            形狀 (N, OBS_SIZE) 的觀測
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_games(np.arange(self.num_envs))
+        self.dones[:] = False
+        self.won[:] = False
+        self.truncated[:] = False
+        self.episode_score[:] = 0
+        return self._observe()
+
+    def step(self, actions):
+        """
+        每場遊戲套用一個動作並前進 ticks_per_step 個 tick。
+
+        參數:
+            actions: 形狀 (N,) 的 ACTION_* (ACTION_NONE 表示維持目前預存的轉彎)
+
+        回傳:
+            (obs, rewards, dones, infos)
+            rewards 為這次 step 得到的分數；dones 為這次 step 中結束 (勝利 / 沒命 / 超過 max_ticks) 的遊戲
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f"expected {self.num_envs} actions, got shape {actions.shape}")
+        turn = actions != ACTION_NONE
+        self.player_next[turn] = actions[turn]
+
+        self.rewards[:] = self.score
+        self.dones[:] = False
+        self.won[:] = False
+        self.truncated[:] = False
+        running = self._running
+        running[:] = True
+        for _ in range(self.ticks_per_step):
+            self._tick(running)
+            running &= ~self.dones
+            if not running.any():
+                break
+        self.rewards[:] = self.score - self.rewards
+
+        np.copyto(self.episode_score, self.score, where=self.dones)
+        self.episode_score[~self.dones] = 0
+        if self.auto_reset and self.dones.any():
+            self._reset_games(np.flatnonzero(self.dones))
+        return self._observe(), self.rewards, self.dones, self.infos
+
+    # --- 重置 ---
+
+    def _reset_games(self, envs):
+        """ 從頭開始 envs 這幾場遊戲 """
+        self.pellets[envs] = self.template
+        self.pellets_left[envs] = self.starting_pellets
+        self.power_left[envs] = self.starting_power
+        self.score[envs] = 0
+        self.lives[envs] = MAX_LIVES
+        self.time[envs] = 0
+        self.ticks[envs] = 0
+        self.fruit_active[envs] = False
+        self.fruits_spawned[envs] = 0
+        self._reset_positions(envs)
+
+    def _reset_positions(self, envs):
+        """ 玩家與鬼魂回到起點 (新遊戲或玩家死亡後，豆子保留) """
+        t = self.tables
+        self.player_cell[envs] = t.player_start
+        self.player_dir[envs] = DIR_NONE
+        self.player_next[envs] = DIR_NONE
+        self.player_progress[envs] = 0
+
+        self.ghost_cell[envs] = t.home_cells
+        self.ghost_dir[envs] = DIR_UP
+        self.ghost_progress[envs] = 0
+        self.ghost_delay[envs] = GHOST_DELAYS
+        self.ghost_mode[envs] = [G_WAITING if delay > 0 else G_EXIT_HOUSE
+                                 for delay in GHOST_DELAYS]
+        self.scatter_index[envs] = 0
+
+        self.global_mode[envs] = G_SCATTER
+        self.mode_switch_time[envs] = self.time[envs]
+        self.frightened_mode[envs] = False
+
+    # --- 一個 tick ---
+
+    def _tick(self, running):
+        """ 所有 running 的遊戲前進一個 tick (順序與 Simulation.update_playing 相同) """
+        dt = SIM_DT
+        self.time[running] += dt
+        self.ticks[running] += 1
+        now = self.time
+
+        # 1. 散開 / 追逐切換 (驚嚇模式期間暫停計時)
+        elapsed = now - self.mode_switch_time
+        timed = running & ~self.frightened_mode
+        to_chase = timed & (self.global_mode == G_SCATTER) & (elapsed > SCATTER_DURATION)
+        to_scatter = timed & (self.global_mode == G_CHASE) & (elapsed > CHASE_DURATION)
+        self.global_mode[to_chase] = G_CHASE
+        self.global_mode[to_scatter] = G_SCATTER
+        switched = to_chase | to_scatter
+        self.mode_switch_time[switched] = now[switched]
+
+        # 沒有在驚嚇 / 回家 / 出門 / 等待的鬼跟著全域模式
+        follow = (self.ghost_mode == G_SCATTER) | (self.ghost_mode == G_CHASE)
+        np.copyto(self.ghost_mode, self.global_mode[:, None], where=follow)
+
+        # 2. 鬼魂
+        self._update_ghosts(running, dt)
+
+        # 3. 驚嚇模式結束
+        ended = running & self.frightened_mode & (
+            now - self.frightened_start > self.frightened_duration)
+        if ended.any():
+            self.frightened_mode[ended] = False
+            calm = ended[:, None] & (self.ghost_mode == G_FRIGHTENED)
+            np.copyto(self.ghost_mode, self.global_mode[:, None], where=calm)
+            self.mode_switch_time[ended] = now[ended]
+
+        # 4. 玩家移動與吃豆
+        arrived = self._update_player(running, dt)
+        if arrived.any():
+            self._eat(np.flatnonzero(arrived))
+
+        # 5. 水果
+        if self.fruit_active.any():
+            self._update_fruit(running)
+
+        # 6. 勝利與碰撞
+        won = running & (self.pellets_left <= 0)
+        self._collide(running, won)
+
+        self.won |= won
+        over = running & (self.lives <= 0)
+        done = won | over
+        if self.max_ticks is not None:
+            truncated = running & ~done & (self.ticks >= self.max_ticks)
+            self.truncated |= truncated
+            done |= truncated
+        self.dones |= done
+
+    def _update_ghosts(self, running, dt):
+        t = self.tables
+        mode = self.ghost_mode
+        active = running[:, None]
+
+        # 在鬼屋裡等待: 倒數，時間到就開始出門 (下一個 tick 才移動)
+        waiting = active & (mode == G_WAITING)
+        self.ghost_delay[waiting] -= dt
+        leave = waiting & (self.ghost_delay <= 0)
+        mode[leave] = G_EXIT_HOUSE
+        self.ghost_dir[leave] = DIR_UP
+
+        moving = active & ~waiting
+        centered = moving & (self.ghost_progress == 0)
+        if centered.any():
+            self._ghost_decisions(centered)
+
+        # 在格子中心時依模式決定門能不能走，走到一半時一定走得完
+        door = (mode == G_EXIT_HOUSE) | (mode == G_GO_HOME)
+        table = np.where(centered, door, True).astype(np.intp)
+        ahead = t.neighbor[table, self.ghost_cell, self.ghost_dir]
+        go = moving & (ahead >= 0)
+
+        speed = np.where(mode == G_GO_HOME, 2 * SPEED,
+                         np.where(mode == G_FRIGHTENED, 1.0, self.level_speed))
+        self.ghost_progress[go] += speed[go] * self.tick_scale
+        arrive = go & (self.ghost_progress >= TILE_SIZE)
+        self.ghost_cell[arrive] = ahead[arrive]
+        self.ghost_progress[arrive] = 0
+
+    def _ghost_decisions(self, centered):
+        """ 在格子中心的鬼魂決定下一步的方向 (與 Ghost.update 的決策部分相同) """
+        t = self.tables
+        envs, ghosts = np.nonzero(centered)
+        mode = self.ghost_mode[envs, ghosts]
+        cell = self.ghost_cell[envs, ghosts]
+        direction = self.ghost_dir[envs, ghosts]
+
+        # 回到鬼屋: 重生並出門
+        home = (mode == G_GO_HOME) & (cell == t.home_cells[ghosts])
+        mode[home] = G_EXIT_HOUSE
+        direction[home] = DIR_UP
+
+        # 走出鬼屋: 恢復全域模式，隨機往左或往右
+        out = (mode == G_EXIT_HOUSE) & (t.tile_y[cell] <= GHOST_HOUSE_Y_THRESHOLD)
+        if out.any():
+            mode[out] = self.global_mode[envs[out]]
+            direction[out] = self.rng.choice([DIR_LEFT, DIR_RIGHT], size=int(out.sum()))
+
+        # 散開點到達時換下一個
+        scatter = self.scatter_index[envs, ghosts]
+        reached = (mode == G_SCATTER) & (cell == t.scatter_cells[ghosts, scatter])
+        scatter[reached] = (scatter[reached] + 1) % len(SCATTER_PATHS[0])
+        self.scatter_index[envs, ghosts] = scatter
+
+        target = self._targets(envs, ghosts, mode, cell, scatter)
+
+        # 可以走的鄰居；走廊上 (只有兩個出口) 不回頭
+        door = ((mode == G_EXIT_HOUSE) | (mode == G_GO_HOME)).astype(np.intp)
+        neighbors = t.neighbor[door, cell, 1:]
+        valid = neighbors >= 0
+        corridor = (door == 0) & ~t.junction[cell]
+        behind = np.arange(1, 5) == REVERSE[direction][:, None]
+        forward = valid & ~(corridor[:, None] & behind)
+        valid = np.where(forward.any(axis=1)[:, None], forward, valid)
+
+        # 選離目標最近的鄰居 (同距離時依 NEIGHBOR_DIRS 的順序，與 BFS 相同)
+        score = t.dist[door[:, None], neighbors, target[:, None]].astype(np.float64)
+        score[~valid] = np.inf
+        best = score.min(axis=1)
+        # 已在目標上、目標在迷宮外或到不了: 隨機選一個鄰居 (與 Ghost.update 的 fallback 相同)
+        lost = (target < 0) | (target == cell) | (best >= FAR)
+        if lost.any():
+            noise = self.rng.random((int(lost.sum()), NUM_GHOSTS))
+            score[lost] = np.where(valid[lost], noise, np.inf)
+        has_step = valid.any(axis=1)
+        direction = np.where(has_step, score.argmin(axis=1) + 1, direction)
+
+        self.ghost_mode[envs, ghosts] = mode
+        self.ghost_dir[envs, ghosts] = direction
+
+    def _targets(self, envs, ghosts, mode, cell, scatter):
+        """ 各模式的目標格子 (與 Ghost.get_target_position 相同) """
+        t = self.tables
+        target = np.full(len(envs), NO_TILE, dtype=np.int32)
+
+        home = mode == G_GO_HOME
+        target[home] = t.home_cells[ghosts[home]]
+        target[mode == G_EXIT_HOUSE] = t.exit_cell
+        scatter_mode = mode == G_SCATTER
+        target[scatter_mode] = t.scatter_cells[ghosts[scatter_mode], scatter[scatter_mode]]
+        frightened = mode == G_FRIGHTENED
+        if frightened.any():
+            picks = self.rng.integers(len(t.frightened_cells), size=int(frightened.sum()))
+            target[frightened] = t.frightened_cells[picks]
+
+        chase = mode == G_CHASE
+        if chase.any():
+            target[chase] = self._chase_targets(envs[chase], ghosts[chase], cell[chase])
+        return target
+
+    def _chase_targets(self, envs, ghosts, cell):
+        """ 四種個性的追逐目標 (Blinky, Pinky, Inky, Clyde) """
+        t = self.tables
+        player = self.player_cell[envs]
+        px, py = t.tile_x[player], t.tile_y[player]
+        pdx = DIR_DX[self.player_dir[envs]]
+        pdy = DIR_DY[self.player_dir[envs]]
+        tx, ty = px.copy(), py.copy()
+
+        # Pinky: 玩家前方 4 格
+        pinky = ghosts == 1
+        tx[pinky] += 4 * pdx[pinky]
+        ty[pinky] += 4 * pdy[pinky]
+
+        # Inky: 以 Blinky 為起點、玩家前方 2 格為中點的對稱點
+        inky = ghosts == 2
+        blinky = self.ghost_cell[envs[inky], 0]
+        tx[inky] = 2 * (px[inky] + 2 * pdx[inky]) - t.tile_x[blinky]
+        ty[inky] = 2 * (py[inky] + 2 * pdy[inky]) - t.tile_y[blinky]
+
+        target = self._validate(tx, ty, cell)
+
+        # Clyde: 距離玩家 8 格以內時回到自己的散開角落
+        clyde = ghosts == 3
+        near = clyde & (np.hypot(t.tile_x[cell] - px, t.tile_y[cell] - py) <= 8)
+        target[near] = t.scatter_cells[3, 0]
+        return target
+
+    def _validate(self, tx, ty, own):
+        """ 與 Ghost.validate_target 相同: 修正成地圖內的空地，找不到時用鬼魂自己的位置 """
+        t = self.tables
+        outside = (ty < 0) | (ty > t.max_y)
+        cx = np.clip(tx, 1, t.width - 2)
+        cy = np.clip(ty, 1, t.max_y - 1)
+        target = t.nearest[cy, cx]
+        return np.where(outside | (target == TARGET_SELF), own, target)
+
+    def _reverse_ghosts(self, mask):
+        """ 鬼魂立刻掉頭 (走到一半時改成從前方的格子往回走) """
+        t = self.tables
+        midway = mask & (self.ghost_progress > 0)
+        ahead = t.neighbor[1, self.ghost_cell, self.ghost_dir]
+        self.ghost_cell[midway] = ahead[midway]
+        self.ghost_progress[midway] = TILE_SIZE - self.ghost_progress[midway]
+        self.ghost_dir[mask] = REVERSE[self.ghost_dir[mask]]
+
+    def _update_player(self, running, dt):
+        """
+        玩家移動 (與 Player.update 相同: 隨時可以反向，轉彎只能在格子中心，不能進牆與門)。
+
+        回傳:
+            這個 tick 抵達新格子的遊戲 (mask)
+        """
+        t = self.tables
+        cell, direction, wanted = self.player_cell, self.player_dir, self.player_next
+        progress = self.player_progress
+        centered = progress == 0
+
+        # 走到一半時反向: 改成從前方的格子往回走
+        reverse = running & ~centered & (wanted != DIR_NONE) & (wanted == REVERSE[direction])
+        if reverse.any():
+            cell[reverse] = t.neighbor[0, cell[reverse], direction[reverse]]
+            progress[reverse] = TILE_SIZE - progress[reverse]
+            direction[reverse] = wanted[reverse]
+            wanted[reverse] = DIR_NONE
+
+        # 在格子中心轉彎 (前方不是牆才轉)
+        turn = running & centered & (wanted != DIR_NONE)
+        turn &= t.neighbor[0, cell, wanted] >= 0
+        direction[turn] = wanted[turn]
+        wanted[turn] = DIR_NONE
+
+        ahead = t.neighbor[0, cell, direction]
+        go = running & (ahead >= 0)
+        progress[go] += self.level_speed * self.tick_scale
+        arrived = go & (progress >= TILE_SIZE)
+        cell[arrived] = ahead[arrived]
+        progress[arrived] = 0
+        return arrived
+
+    def _eat(self, envs):
+        """ 吃掉 envs 這幾場玩家所在格子的豆子 (含能量球與水果出現) """
+        t = self.tables
+        flat = t.flat[self.player_cell[envs]]
+        board = self.pellets.reshape(self.num_envs, -1)
+        codes = board[envs, flat]
+        pellet = codes == CODE_PELLET
+        power = codes == CODE_POWER_PELLET
+        eaten = pellet | power
+        if not eaten.any():
+            return
+        board[envs[eaten], flat[eaten]] = CODE_EMPTY
+
+        self.score[envs[pellet]] += PELLELETS_POINT
+        self.pellets_left[envs[pellet]] -= 1
+        if power.any():
+            powered = envs[power]
+            self.score[powered] += POWER_PELLET_POINT
+            self.power_left[powered] -= 1
+            self.frightened_mode[powered] = True
+            self.frightened_start[powered] = self.time[powered]
+            mask = np.zeros(self.num_envs, dtype=bool)
+            mask[powered] = True
+            mode = self.ghost_mode
+            scared = mask[:, None] & ((mode == G_SCATTER) | (mode == G_CHASE) |
+                                      (mode == G_FRIGHTENED))
+            mode[scared] = G_FRIGHTENED
+            self._reverse_ghosts(scared)
+
+        # 水果: 吃掉第 70 / 170 顆豆子時出現
+        fed = envs[eaten]
+        spawn = (~self.fruit_active[fed] & (self.fruits_spawned[fed] < 2) &
+                 (self.starting_pellets - self.pellets_left[fed] >=
+                  FRUIT_THRESHOLDS[self.fruits_spawned[fed]]))
+        spawned = fed[spawn]
+        self.fruit_active[spawned] = True
+        self.fruit_spawn_time[spawned] = self.time[spawned]
+        self.fruits_spawned[spawned] += 1
+
+    def _update_fruit(self, running):
+        active = running & self.fruit_active
+        expired = active & (self.time - self.fruit_spawn_time > FRUIT_DURATION)
+        self.fruit_active[expired] = False
+        active &= ~expired
+
+        px, py = self._player_pixels()
+        fx = FRUIT_POS[0] * TILE_SIZE + TILE_SIZE // 2
+        fy = FRUIT_POS[1] * TILE_SIZE + TILE_SIZE // 2
+        collected = active & (np.hypot(px - fx, py - fy) < PLAYER_RADIUS + 15)
+        self.fruit_active[collected] = False
+        self.score[collected] += self.fruit_score
+
+    def _collide(self, running, won):
+        """ 玩家與鬼魂的碰撞: 吃掉驚嚇中的鬼，碰到其他鬼則失去一條命 """
+        t = self.tables
+        px, py = self._player_pixels()
+        gx, gy = self._ghost_pixels()
+        width = t.width * TILE_SIZE
+        dx = (px[:, None] - gx + width / 2) % width - width / 2  # 隧道兩端相連
+        dy = py[:, None] - gy
+        hit = running[:, None] & (np.hypot(dx, dy) < PLAYER_RADIUS + GHOST_RADIUS)
+        if not hit.any():
+            return
+
+        mode = self.ghost_mode
+        eaten = hit & (mode == G_FRIGHTENED)
+        if eaten.any():
+            mode[eaten] = G_GO_HOME
+            self.ghost_progress[eaten] = 0
+            self.score += GHOST_POINT * eaten.sum(axis=1)
+
+        killed = (hit & (mode != G_FRIGHTENED) & (mode != G_GO_HOME)).any(axis=1) & ~won
+        if killed.any():
+            self.lives[killed] -= 1
+            respawn = killed & (self.lives > 0)
+            if respawn.any():
+                self._reset_positions(np.flatnonzero(respawn))
+
+    def _player_pixels(self):
+        t = self.tables
+        cell, direction = self.player_cell, self.player_dir
+        px = t.tile_x[cell] * TILE_SIZE + TILE_SIZE // 2 + DIR_DX[direction] * self.player_progress
+        py = t.tile_y[cell] * TILE_SIZE + TILE_SIZE // 2 + DIR_DY[direction] * self.player_progress
+        return px, py
+
+    def _ghost_pixels(self):
+        t = self.tables
+        cell, direction = self.ghost_cell, self.ghost_dir
+        gx = t.tile_x[cell] * TILE_SIZE + TILE_SIZE // 2 + DIR_DX[direction] * self.ghost_progress
+        gy = t.tile_y[cell] * TILE_SIZE + TILE_SIZE // 2 + DIR_DY[direction] * self.ghost_progress
+        return gx, gy
+
+    # --- 觀測 ---
+
+    def _observe(self):
+        """ 把目前狀態寫進 self.obs (欄位見 OBS_*) """
+        obs = self.obs
+        px, py = self._player_pixels()
+        obs[:, OBS_PLAYER] = (px - TILE_SIZE // 2) / TILE_SIZE
+        obs[:, OBS_PLAYER + 1] = (py - TILE_SIZE // 2) / TILE_SIZE
+        obs[:, OBS_PLAYER + 2] = self.player_dir
+        gx, gy = self._ghost_pixels()
+        obs[:, OBS_GHOST_X:OBS_GHOST_X + NUM_GHOSTS] = (gx - TILE_SIZE // 2) / TILE_SIZE
+        obs[:, OBS_GHOST_Y:OBS_GHOST_Y + NUM_GHOSTS] = (gy - TILE_SIZE // 2) / TILE_SIZE
+        obs[:, OBS_GHOST_MODE:OBS_GHOST_MODE + NUM_GHOSTS] = self.ghost_mode
+        remaining = self.frightened_duration - (self.time - self.frightened_start)
+        obs[:, OBS_FRIGHTENED] = np.where(self.frightened_mode, remaining / 1000, 0)
+        obs[:, OBS_PELLETS] = self.pellets_left
+        obs[:, OBS_PELLETS + 1] = self.power_left
+        obs[:, OBS_LIVES] = self.lives
+        obs[:, OBS_FRUIT] = self.fruit_active
+        return obs
+
+    def observe_planes(self, dtype=np.float32):
+        """
+        格子平面觀測 (平面編號與 observation.TilePlanes 相同)。
+
+        參數:
+            dtype: 平面的型別；與上一次不同時重新配置陣列
+
+        回傳:
+            形狀 (N, NUM_PLANES, H, W) 的陣列 (dtype 不變時每次都是同一個陣列，就地更新)
+        """
+        t = self.tables
+        planes = self.planes
+        if planes is None or planes.dtype != dtype:
+            planes = np.zeros((self.num_envs, NUM_PLANES) + self.template.shape, dtype=dtype)
+            planes[:, PLANE_WALL] = self.walls
+            self.planes = planes
+        np.equal(self.pellets, CODE_PELLET, out=planes[:, PLANE_PELLET])
+        np.equal(self.pellets, CODE_POWER_PELLET, out=planes[:, PLANE_POWER_PELLET])
+        planes[:, PLANE_PLAYER:] = 0
+
+        envs = self._envs
+        player = self.player_cell
+        planes[envs, PLANE_PLAYER, t.tile_y[player], t.tile_x[player]] = 1
+        ghosts = self.ghost_cell
+        planes[envs[:, None], GHOST_MODE_PLANES[self.ghost_mode],
+               t.tile_y[ghosts], t.tile_x[ghosts]] = 1
+        return planes
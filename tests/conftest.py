@@ -0,0 +1,6 @@
+# conftest.py
+""" 測試共用設定: 遊戲模組都在 code/ 底下，以模組名稱直接 import """
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "code"))
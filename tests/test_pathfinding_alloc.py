@@ -0,0 +1,96 @@
+# test_pathfinding_alloc.py
+"""
+以 tracemalloc 檢查路徑搜尋的記憶體配置:
+SearchWorkspace 預先配置好所有陣列，暖機之後重複搜尋不應該留下任何與呼叫次數成正比的配置，
+搜尋過程中的暫時配置 (heap 的鍵與 heap list 本身) 也要很小。
+直接呼叫 Pathfinder._run (只做搜尋): next_step 可能直接查距離表，find_path 還會另外配置回傳的路徑列表。
+"""
+import tracemalloc
+
+import pytest
+
+from settings import *
+from pathfinding import create_pathfinder, get_grid_graph
+
+# 統計數字 (searches / nodes_expanded) 超過小整數快取後會換成新的 int 物件，
+# 這是唯一允許留下的配置，與呼叫次數無關
+RETAINED_LIMIT = 256
+
+# 搜尋中同時存在的配置上限 (實測 200 次搜尋的峰值約 0.5 ~ 3 KB)；
+# 每次搜尋配置一個 visited dict / set 或路徑列表就會超過
+PEAK_LIMIT = 4096
+
+SEARCH_PATHFINDERS = [ALGO_ASTAR, ALGO_DIJKSTRA, ALGO_JPS, ALGO_BFS, ALGO_BIBFS]
+
+
+def walkable_pairs(count):
+    """ 取 count 組 (起點, 終點)，分散在整張地圖上 """
+    graph = get_grid_graph()
+    tiles = [tile for tile in graph.tiles if graph.node_id(tile) is not None]
+    return [(tiles[i * 7 % len(tiles)], tiles[-1 - i * 13 % len(tiles)]) for i in range(count)]
+
+
+def warmed_up(name, pairs):
+    """ 建立演算法並先跑一輪: 第一次搜尋時才建立的共用資料不算在內 """
+    pathfinder = create_pathfinder(name)
+    search(pathfinder, pairs)
+    return pathfinder
+
+
+def search(pathfinder, pairs):
+    for start, target in pairs:
+        pathfinder._run(start, target, True, (0, 0))
+
+
+def retained_bytes(pathfinder, pairs):
+    """ 跑完 pairs 中所有搜尋之後，pathfinding.py 配置而沒有釋放的 bytes """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        search(pathfinder, pairs)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    only = [tracemalloc.Filter(True, "*pathfinding.py")]
+    diff = after.filter_traces(only).compare_to(before.filter_traces(only), "filename")
+    return sum(stat.size_diff for stat in diff)
+
+
+def peak_bytes(pathfinder, pairs):
+    """ 跑 pairs 中所有搜尋的期間，比開始時多出來的最大配置量 """
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        search(pathfinder, pairs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - base
+
+
+@pytest.mark.parametrize("name", SEARCH_PATHFINDERS)
+def test_search_retains_nothing_per_call(name):
+    pairs = walkable_pairs(200)
+    pathfinder = warmed_up(name, pairs)
+    searches = pathfinder.searches
+
+    few = retained_bytes(pathfinder, pairs[:20])
+    many = retained_bytes(pathfinder, pairs * 3)
+
+    assert pathfinder.searches == searches + 20 + len(pairs) * 3
+    assert few <= RETAINED_LIMIT
+    assert many <= RETAINED_LIMIT
+    assert not pathfinder.workspace.heap
+
+
+@pytest.mark.parametrize("name", SEARCH_PATHFINDERS)
+def test_search_peak_allocation_is_small(name):
+    pairs = walkable_pairs(200)
+    pathfinder = warmed_up(name, pairs)
+    expanded = pathfinder.nodes_expanded
+
+    peak = peak_bytes(pathfinder, pairs)
+
+    assert pathfinder.nodes_expanded > expanded
+    assert peak <= PEAK_LIMIT